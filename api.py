@@ -0,0 +1,240 @@
+"""
+Python API: the data of a project as pandas frames or Arrow tables, read from the database
+
+    from api import BugPredictionApi
+
+    api = BugPredictionApi()                        # configured by the environment (.env)
+    versions = api.versions(["name", "bugs"])
+    for commits in api.commits(["hash", "date", "lines"], chunksize=10000):
+        ...
+    api.predict("bugvelocity"), api.risk()
+
+Only the requested columns are read, and with chunksize the rows are streamed from the
+database by chunks instead of being loaded at once. Arrow tables require pyarrow.
+"""
+from typing import Dict, Iterator, List, Optional, Union
+
+import pandas as pd
+from dotenv import load_dotenv
+from sqlalchemy.orm import sessionmaker
+
+from configuration import Configuration
+from metrics.versions import assess_next_release_risk
+from ml.bugvelocity import BugVelocity
+from ml.codemetrics import CodeMetrics
+from ml.commitrisk import CommitRisk
+from ml.filerisk import FileRisk
+from models.commit import Commit
+from models.database import setup_database
+from models.file import File
+from models.issue import Issue
+from models.legacy import Legacy
+from models.model import Model
+from models.project import Project
+from models.version import Version
+from utils.database import create_database_engine
+from utils.featurestore import load_version_metrics, METRIC_COLUMNS, VERSION_COLUMNS
+import models.author
+
+AVAILABLE_FORMATS = ["pandas", "arrow"]
+MODELS = {"bugvelocity": BugVelocity, "codemetrics": CodeMetrics, "commitrisk": CommitRisk,
+          "filerisk": FileRisk}
+
+COMMIT_COLUMNS = [column.name for column in Commit.__table__.columns]
+ISSUE_COLUMNS = [column.name for column in Issue.__table__.columns]
+
+def to_arrow(df: pd.DataFrame):
+    """Convert a frame into an Arrow table"""
+    import pyarrow
+    return pyarrow.Table.from_pandas(df, preserve_index=False)
+
+def get_columns(entity, available_columns: List[str], columns: Optional[List[str]]) -> list:
+    """Get the mapped columns of an entity, all of them if columns is None"""
+    unknown_columns = [name for name in columns or [] if name not in available_columns]
+    if unknown_columns:
+        raise ValueError(f"Unknown {entity.__tablename__} column(s): {', '.join(unknown_columns)}")
+    return [getattr(entity, name) for name in columns or available_columns]
+
+class BugPredictionApi:
+    """
+    Read the data of a project without the command line
+
+    Attributes:
+    -----------
+     - session          Database connection managed by sqlachemy
+     - configuration    Configuration
+     - project_id       Identifier of the project
+     - format           Format of the results ("pandas" or "arrow")
+    """
+
+    def __init__(self, configuration: Configuration = None, session=None, format: str = "pandas"):
+        if format not in AVAILABLE_FORMATS:
+            raise ValueError(f"Unknown format: {format}, expected one of {', '.join(AVAILABLE_FORMATS)}")
+        if configuration is None:
+            load_dotenv()
+            configuration = Configuration()
+        if session is None:
+            engine = create_database_engine(configuration)
+            setup_database(engine)
+            session = sessionmaker(bind=engine)()
+
+        project = session.query(Project).filter(Project.name == configuration.source_project).first()
+        if not project:
+            raise ValueError(f"Unknown project: {configuration.source_project}, run populate first")
+        self.session = session
+        self.configuration = configuration
+        self.project_id = project.project_id
+        self.format = format
+        self.models = {}
+
+    def versions(self, columns: List[str] = None):
+        """
+        Versions of the project (included, current and not excluded), one row per version,
+        with the key columns of the feature store (version_id, name, tag, dates, has_metric)
+
+        Parameters:
+        -----------
+        - columns : List[str]
+            Columns of Version, all of them by default
+        """
+        return self.__load_version_metrics(columns or VERSION_COLUMNS)
+
+    def metrics(self, columns: List[str] = None):
+        """
+        Metrics of the versions of the project, one row per version with the key columns
+        of the feature store (has_metric is False for the versions without metrics)
+
+        Parameters:
+        -----------
+        - columns : List[str]
+            Columns of Metric, all of them by default
+        """
+        return self.__load_version_metrics(columns or METRIC_COLUMNS)
+
+    def commits(self, columns: List[str] = None, chunksize: int = None):
+        """
+        Commits of the project, sorted by date
+
+        Parameters:
+        -----------
+        - columns : List[str]
+            Columns of Commit, all of them by default
+        - chunksize : int
+            Number of rows of each chunk, the result is then an iterator of chunks
+        """
+        statement = self.session.query(*get_columns(Commit, COMMIT_COLUMNS, columns)) \
+            .filter(Commit.project_id == self.project_id) \
+            .order_by(Commit.date, Commit.commit_id) \
+            .statement
+        return self.__read(statement, chunksize)
+
+    def issues(self, columns: List[str] = None, chunksize: int = None):
+        """
+        Issues of the project (all the sources), sorted by creation date
+
+        Parameters:
+        -----------
+        - columns : List[str]
+            Columns of Issue, all of them by default
+        - chunksize : int
+            Number of rows of each chunk, the result is then an iterator of chunks
+        """
+        statement = self.session.query(*get_columns(Issue, ISSUE_COLUMNS, columns)) \
+            .filter(Issue.project_id == self.project_id) \
+            .order_by(Issue.created_at, Issue.issue_id) \
+            .statement
+        return self.__read(statement, chunksize)
+
+    def legacy_files(self, chunksize: int = None):
+        """
+        Legacy files of the versions of the project: version_id, file_id, path and language
+
+        Parameters:
+        -----------
+        - chunksize : int
+            Number of rows of each chunk, the result is then an iterator of chunks
+        """
+        statement = self.session.query(Legacy.version_id, File.file_id, File.path, File.language) \
+            .join(File, File.file_id == Legacy.file_id) \
+            .join(Version, Version.version_id == Legacy.version_id) \
+            .filter(Version.project_id == self.project_id) \
+            .order_by(Legacy.version_id, File.path) \
+            .statement
+        return self.__read(statement, chunksize)
+
+    def predict(self, model_name: str = "bugvelocity") -> int:
+        """
+        Predicted value of the next release by a trained model: number of bugs,
+        of fix-inducing commits (commitrisk) or of files to be fixed (filerisk)
+        """
+        if model_name not in MODELS:
+            raise ValueError(f"Unknown model: {model_name}")
+        if model_name not in self.models:
+            self.models[model_name] = MODELS[model_name](self.project_id, self.session, self.configuration)
+        return self.models[model_name].predict()
+
+    def explain(self, model_name: str = "bugvelocity"):
+        """
+        Predictions of the past versions and of the next release by a trained model (bugvelocity
+        or codemetrics), one row per version with the bias and the contribution of each feature
+        """
+        if model_name not in MODELS:
+            raise ValueError(f"Unknown model: {model_name}")
+        if model_name not in self.models:
+            self.models[model_name] = MODELS[model_name](self.project_id, self.session, self.configuration)
+        explanations = self.models[model_name].explain()
+        if explanations is None:
+            raise ValueError(f"The predictions of the model {model_name} can't be explained")
+        return self.__convert(explanations)
+
+    def predictions(self):
+        """Predicted number of bugs of the next release by each trained model, one row per model"""
+        trained_models = self.session.query(Model.name) \
+            .filter(Model.project_id == self.project_id) \
+            .filter(Model.name.in_(list(MODELS))) \
+            .distinct().order_by(Model.name).all()
+        trained_models = [name for name, in trained_models]
+        df = pd.DataFrame({"model": trained_models,
+                           "predicted_bugs": [self.predict(name) for name in trained_models]})
+        return self.__convert(df)
+
+    def commit_risks(self):
+        """Risk of each commit of the next release of inducing a bug, the riskiest first (commitrisk model)"""
+        if "commitrisk" not in self.models:
+            self.models["commitrisk"] = CommitRisk(self.project_id, self.session, self.configuration)
+        return self.__convert(self.models["commitrisk"].score_commits())
+
+    def file_risks(self):
+        """Risk of each file of the next release of being fixed, the riskiest first (filerisk model)"""
+        if "filerisk" not in self.models:
+            self.models["filerisk"] = FileRisk(self.project_id, self.session, self.configuration)
+        return self.__convert(self.models["filerisk"].score_files())
+
+    def risk(self) -> Dict[str, int]:
+        """Risk score of the next release, with the median and max risk of the versions"""
+        return assess_next_release_risk(self.session, self.configuration, self.project_id)
+
+    def __load_version_metrics(self, columns: List[str]):
+        unknown_columns = [name for name in columns if name not in VERSION_COLUMNS + METRIC_COLUMNS]
+        if unknown_columns:
+            raise ValueError(f"Unknown version or metric column(s): {', '.join(unknown_columns)}")
+        return self.__convert(load_version_metrics(self.session, self.configuration, self.project_id, columns))
+
+    def __read(self, statement, chunksize: Optional[int]):
+        if chunksize is None:
+            result = self.session.execute(statement)
+            return self.__convert(pd.DataFrame.from_records(result.fetchall(), columns=list(result.keys())))
+        return self.__read_chunks(statement, chunksize)
+
+    def __read_chunks(self, statement, chunksize: int) -> Iterator:
+        # Server-side cursor where supported: rows are fetched as the chunks are consumed
+        result = self.session.connection().execution_options(stream_results=True).execute(statement)
+        columns = list(result.keys())
+        try:
+            for rows in result.partitions(chunksize):
+                yield self.__convert(pd.DataFrame.from_records(rows, columns=columns))
+        finally:
+            result.close()
+
+    def __convert(self, df: pd.DataFrame) -> Union[pd.DataFrame, "pyarrow.Table"]:
+        return to_arrow(df) if self.format == "arrow" else df
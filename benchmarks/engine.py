@@ -0,0 +1,56 @@
+"""
+Benchmark of the database profiles (OTTM_DATABASE_PROFILE, utils.database.create_database_engine)
+
+The per-row write pattern of populate (one commit per new file, see save_file_if_not_found)
+followed by lookups of the same files is timed on a SQLite file database, with the "none"
+and the "performance" profiles:
+
+    python -m benchmarks.engine [--files 3000]
+
+The gain of the performance profile grows with the cost of an fsync on the disk.
+"""
+import argparse
+import os
+import tempfile
+import time
+from types import SimpleNamespace
+
+from sqlalchemy.orm import sessionmaker
+
+from models.database import setup_database
+from models.file import File
+from utils.database import create_database_engine, save_file_if_not_found
+import models.author
+
+def run(directory: str, profile: str, files: int) -> None:
+    config = SimpleNamespace(target_database=f"sqlite:///{os.path.join(directory, profile + '.db')}",
+                             database_profile=profile, database_pool_size=5)
+    engine = create_database_engine(config)
+    setup_database(engine)
+    session = sessionmaker(bind=engine)()
+
+    started_at = time.perf_counter()
+    for i in range(files):
+        save_file_if_not_found(session, f"src/f{i}.java")
+    written_at = time.perf_counter()
+    for i in range(files):
+        session.query(File).filter(File.path == f"src/f{i}.java").first()
+    session.commit()
+    read_at = time.perf_counter()
+
+    print(f"{profile:12} {files} inserts with a commit each: {written_at - started_at:.3f}s, "
+          f"lookups: {read_at - written_at:.3f}s")
+    session.close()
+    engine.dispose()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=3000, help="Number of files inserted then looked up")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        for profile in ["none", "performance"]:
+            run(directory, profile, args.files)
+
+if __name__ == "__main__":
+    main()
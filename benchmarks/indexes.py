@@ -0,0 +1,119 @@
+"""
+Benchmark of the indexes on the hot predicates (migration 1 of models.migrations)
+
+The version-window queries of compute_version_metrics and the lookups of the release report
+are timed on an in-memory SQLite database, with the indexes and once they are dropped:
+
+    python -m benchmarks.indexes [--projects 5] [--commits 40000]
+
+The default dataset (5 projects, 200k commits, 40k issues, 555 versions, 50k legacy rows) takes
+a few minutes without the indexes.
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, func, insert
+from sqlalchemy.orm import sessionmaker
+
+from models.commit import Commit
+from models.database import setup_database
+from models.file import File
+from models.issue import Issue
+from models.legacy import Legacy
+from models.ownership import Ownership
+from models.project import Project
+from models.version import Version
+import models.author
+
+# Tables indexed by migration 1
+INDEXED_TABLES = [Commit.__table__, Issue.__table__, Version.__table__, Legacy.__table__,
+                  Ownership.__table__, File.__table__]
+START = datetime(2015, 1, 1)
+
+def create_dataset(engine, projects: int, commits: int) -> None:
+    random.seed(1)
+    issues, versions, files = commits // 5, 110, 20000
+    with engine.begin() as connection:
+        connection.execute(insert(File), [{"path": f"src/f{i}.java"} for i in range(files)])
+        for project_id in range(1, projects + 1):
+            connection.execute(insert(Project), [{"project_id": project_id, "name": f"p{project_id}"}])
+            connection.execute(insert(Commit), [
+                {"project_id": project_id, "hash": f"{project_id}-{i}", "committer": f"dev{random.randint(0, 300)}",
+                 "date": START + timedelta(minutes=20 * i + random.randint(0, 10)),
+                 "lines": random.randint(1, 500), "message": "m"} for i in range(commits)])
+            connection.execute(insert(Issue), [
+                {"project_id": project_id, "number": str(i), "source": "git",
+                 "created_at": START + timedelta(hours=2 * i),
+                 "updated_at": START + timedelta(hours=2 * i + 5)} for i in range(issues)])
+            connection.execute(insert(Version), [
+                {"project_id": project_id, "name": f"v{i}", "tag": f"v{i}",
+                 "start_date": START + timedelta(days=5 * i),
+                 "end_date": START + timedelta(days=5 * (i + 1))} for i in range(versions)] +
+                [{"project_id": project_id, "name": "Next Release", "tag": "devel",
+                  "start_date": START + timedelta(days=5 * versions),
+                  "end_date": START + timedelta(days=5 * versions + 10)}])
+        connection.execute(insert(Legacy), [{"version_id": random.randint(1, projects * (versions + 1)),
+                                             "file_id": random.randint(1, files)} for _ in range(50000)])
+
+def run_version_queries(session, project_id: int) -> None:
+    """Queries of compute_version_metrics on the version windows, code churn excluded"""
+    versions = session.query(Version).filter(Version.project_id == project_id).order_by(Version.start_date).all()
+    for version in versions:
+        session.query(Issue) \
+            .filter(Issue.project_id == project_id) \
+            .filter(Issue.created_at.between(version.start_date, version.end_date)).count()
+        session.query(func.sum(Commit.lines)) \
+            .filter(Commit.project_id == project_id) \
+            .filter(Commit.date.between(version.start_date, version.end_date)).scalar()
+        members = session.query(Commit.committer) \
+            .filter(Commit.project_id == project_id) \
+            .filter(Commit.date.between(version.start_date, version.end_date)) \
+            .group_by(Commit.committer).all()
+        for committer, in members:
+            session.query(func.min(Commit.date)).filter(Commit.committer == committer).scalar()
+
+def run_report_queries(session, project_id: int) -> None:
+    """Lookups of the release report and of the connectors"""
+    next_release = session.query(Version) \
+        .filter(Version.project_id == project_id) \
+        .filter(Version.name == "Next Release").first()
+    session.query(Legacy, File) \
+        .join(File, Legacy.file_id == File.file_id) \
+        .filter(Legacy.version_id == next_release.version_id).all()
+    for i in range(200):
+        session.query(File).filter(File.path == f"src/f{i * 97}.java").first()
+    session.query(Issue) \
+        .filter(Issue.project_id == project_id) \
+        .filter(Issue.source == "git") \
+        .order_by(Issue.updated_at.desc()).first()
+
+def run(engine, label: str, project_id: int) -> None:
+    session = sessionmaker(bind=engine)()
+    for name, queries in [("compute_version_metrics queries", run_version_queries),
+                          ("release report queries", run_report_queries)]:
+        started_at = time.perf_counter()
+        queries(session, project_id)
+        print(f"{label:16} {name}: {time.perf_counter() - started_at:.3f}s")
+    session.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--projects", type=int, default=5, help="Number of projects")
+    parser.add_argument("--commits", type=int, default=40000, help="Number of commits per project")
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://")
+    setup_database(engine)
+    create_dataset(engine, args.projects, args.commits)
+    project_id = (args.projects + 1) // 2
+    run(engine, "with indexes", project_id)
+    with engine.begin() as connection:
+        for table in INDEXED_TABLES:
+            for index in table.indexes:
+                index.drop(connection)
+    run(engine, "without indexes", project_id)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Benchmark of the model store (utils.modelstore)
+
+A random forest is stored as a compressed and as an uncompressed artifact, then the latency of
+loading it and predicting one version is timed: cold (artifact read, memory-mapped when not
+compressed), warm (estimator cached in memory) and from a model pickled in the database as before
+the artifacts:
+
+    python -m benchmarks.modelstore [--trees 200] [--repeat 20]
+"""
+import argparse
+import pickle
+import tempfile
+import time
+from types import SimpleNamespace
+
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from models.database import setup_database
+from models.model import Model
+from models.project import Project
+from utils.modelstore import load_model, models_cache, save_model
+import models.author
+
+def time_load_and_predict(session, name: str, X, repeat: int, cold: bool) -> float:
+    """Median latency of loading the model and predicting, in milliseconds"""
+    latencies = []
+    for _ in range(repeat):
+        if cold:
+            models_cache.clear()
+        started_at = time.perf_counter()
+        load_model(session, 1, name).predict(X)
+        latencies.append(time.perf_counter() - started_at)
+    return np.median(latencies) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--trees", type=int, default=200, help="Number of trees of the forest")
+    parser.add_argument("--repeat", type=int, default=20, help="Number of loads timed")
+    args = parser.parse_args()
+
+    X = np.random.default_rng(0).random((500, 3))
+    estimator = RandomForestRegressor(n_estimators=args.trees, random_state=0).fit(X, X.sum(axis=1))
+    engine = create_engine("sqlite://")
+    setup_database(engine)
+    session = sessionmaker(bind=engine)()
+    session.add(Project(name="P"))
+    session.add(Model(project_id=1, name="pickled", version=1, data=pickle.dumps(estimator)))
+    session.commit()
+
+    with tempfile.TemporaryDirectory() as directory:
+        for name, compress in [("compressed", 3), ("uncompressed", 0)]:
+            config = SimpleNamespace(model_store_path=directory, model_store_compress=compress)
+            save_model(session, config, 1, name, estimator, 0.0)
+        for name in ["compressed", "uncompressed", "pickled"]:
+            cold = time_load_and_predict(session, name, X[:1], args.repeat, cold=True)
+            warm = time_load_and_predict(session, name, X[:1], args.repeat, cold=False)
+            print(f"{name:13} cold load and predict: {cold:.1f} ms, warm: {warm:.1f} ms")
+
+if __name__ == "__main__":
+    main()
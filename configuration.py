@@ -6,6 +6,10 @@ from typing import List
 from exceptions.configurationvalidation import ConfigurationValidationException
 
 AVAILABLE_SCM = ["github", "gitlab"]
+AVAILABLE_COMMIT_MINERS = ["pydriller", "gitlog"]
+AVAILABLE_DATABASE_PROFILES = ["performance", "none"]
+AVAILABLE_TRAINING_MODES = ["exact", "fast", "search"]
+AVAILABLE_KMEANS_ALGORITHMS = ["kmeans", "minibatch"]
 
 class Configuration:
     
@@ -23,6 +27,8 @@ class Configuration:
         self.java_path = self.__get_executable("OTTM_JAVA_PATH")
         
         self.target_database = self.__get_required_value("OTTM_TARGET_DATABASE")
+        self.database_profile = self.__get_database_profile("OTTM_DATABASE_PROFILE")
+        self.database_pool_size = self.__get_database_pool_size("OTTM_DATABASE_POOL_SIZE")
 
         self.source_repo_scm = self.__get_repo_scm("OTTM_SOURCE_REPO_SCM")
         self.source_project  = self.__get_required_value("OTTM_SOURCE_PROJECT")
@@ -57,10 +63,26 @@ class Configuration:
 
         self.insignificant_commits_message = self.__get_str_list("OTTM_COMMIT_BAD_MSG")
 
+        self.commit_miner = self.__get_commit_miner("OTTM_COMMIT_MINER")
+        self.commit_miner_workers = self.__get_commit_miner_workers("OTTM_COMMIT_MINER_WORKERS")
+
         self.retry_delay = self.__get_retry_delay("OTTM_RETRY_DELAY")
+        self.api_workers = self.__get_api_workers("OTTM_API_WORKERS")
+        self.api_host_concurrency = self.__get_api_host_concurrency("OTTM_API_HOST_CONCURRENCY")
+        self.api_max_retries = self.__get_api_max_retries("OTTM_API_MAX_RETRIES")
+        self.gitlab_page_size = self.__get_gitlab_page_size("OTTM_GITLAB_PAGE_SIZE")
+        self.http_cache_path = os.getenv("OTTM_HTTP_CACHE_PATH", "data/http_cache.sqlite")
+        self.http_cache_size = self.__get_http_cache_size("OTTM_HTTP_CACHE_SIZE")
         
         self.legacy_percent = self.__get_legacy_percent("OTTM_LEGACY_PERCENT")
 
+        self.model_store_path = os.getenv("OTTM_MODEL_STORE_PATH", "data/models")
+        self.model_store_compress = self.__get_model_store_compress("OTTM_MODEL_STORE_COMPRESS")
+        self.training_mode = self.__get_training_mode("OTTM_TRAINING_MODE")
+        self.training_jobs = self.__get_training_jobs("OTTM_TRAINING_JOBS")
+        self.kmeans_algorithm = self.__get_kmeans_algorithm("OTTM_KMEANS_ALGORITHM")
+        self.drift_tolerance = self.__get_drift_tolerance("OTTM_DRIFT_TOLERANCE")
+
 
     @staticmethod
     def __get_log_level(env_var):
@@ -116,6 +138,123 @@ class Configuration:
             )
         return repo_scm
 
+    @staticmethod
+    def __get_commit_miner(env_var) -> str:
+        commit_miner = os.getenv(env_var, "pydriller").lower()
+        if commit_miner not in AVAILABLE_COMMIT_MINERS:
+            raise ConfigurationValidationException(
+                f"The following commit miner is not handled by OTTM : {commit_miner}." +\
+                f" Availables commit miners are : {AVAILABLE_COMMIT_MINERS}"
+            )
+        return commit_miner
+
+    @staticmethod
+    def __get_commit_miner_workers(env_var):
+        workers_str = os.getenv(env_var, "1")
+        try:
+            workers = int(workers_str)
+        except ValueError:
+            raise ConfigurationValidationException(
+                f"Incorrect value : {workers_str}, OTTM_COMMIT_MINER_WORKERS should be an integer number of processes"
+            )
+        if workers < 1:
+            raise ConfigurationValidationException(
+                f"Incorrect value : {workers_str}, OTTM_COMMIT_MINER_WORKERS should be at least 1"
+            )
+        return workers
+
+    @staticmethod
+    def __get_api_workers(env_var):
+        workers_str = os.getenv(env_var, "4")
+        try:
+            workers = int(workers_str)
+        except ValueError:
+            raise ConfigurationValidationException(
+                f"Incorrect value : {workers_str}, OTTM_API_WORKERS should be an integer number of concurrent requests"
+            )
+        if workers < 1:
+            raise ConfigurationValidationException(
+                f"Incorrect value : {workers_str}, OTTM_API_WORKERS should be at least 1"
+            )
+        return workers
+
+    @staticmethod
+    def __get_api_host_concurrency(env_var):
+        concurrency_str = os.getenv(env_var, "8")
+        try:
+            concurrency = int(concurrency_str)
+        except ValueError:
+            raise ConfigurationValidationException(
+                f"Incorrect value : {concurrency_str}, OTTM_API_HOST_CONCURRENCY should be an integer number of concurrent requests"
+            )
+        if concurrency < 1:
+            raise ConfigurationValidationException(
+                f"Incorrect value : {concurrency_str}, OTTM_API_HOST_CONCURRENCY should be at least 1"
+            )
+        return concurrency
+
+    @staticmethod
+    def __get_api_max_retries(env_var):
+        retries_str = os.getenv(env_var, "5")
+        try:
+            retries = int(retries_str)
+        except ValueError:
+            raise ConfigurationValidationException(
+                f"Incorrect value : {retries_str}, OTTM_API_MAX_RETRIES should be an integer number of retries"
+            )
+        if retries < 0:
+            raise ConfigurationValidationException(
+                f"Incorrect value : {retries_str}, OTTM_API_MAX_RETRIES should be positive or zero"
+            )
+        return retries
+
+    @staticmethod
+    def __get_gitlab_page_size(env_var):
+        page_size_str = os.getenv(env_var, "100")
+        try:
+            page_size = int(page_size_str)
+        except ValueError:
+            raise ConfigurationValidationException(
+                f"Incorrect value : {page_size_str}, OTTM_GITLAB_PAGE_SIZE should be an integer number of items"
+            )
+        if not 1 <= page_size <= 100:
+            raise ConfigurationValidationException(
+                f"Incorrect value : {page_size_str}, OTTM_GITLAB_PAGE_SIZE should be between 1 and 100"
+            )
+        return page_size
+
+    @staticmethod
+    def __get_http_cache_size(env_var):
+        cache_size_str = os.getenv(env_var, "256")
+        try:
+            cache_size = int(cache_size_str)
+        except ValueError:
+            raise ConfigurationValidationException(
+                f"Incorrect value : {cache_size_str}, OTTM_HTTP_CACHE_SIZE should be an integer number of megabytes"
+            )
+        return cache_size
+
+    @staticmethod
+    def __get_database_profile(env_var) -> str:
+        database_profile = os.getenv(env_var, "performance").lower()
+        if database_profile not in AVAILABLE_DATABASE_PROFILES:
+            raise ConfigurationValidationException(
+                f"The following database profile is not handled by OTTM : {database_profile}." +\
+                f" Availables database profiles are : {AVAILABLE_DATABASE_PROFILES}"
+            )
+        return database_profile
+
+    @staticmethod
+    def __get_database_pool_size(env_var):
+        pool_size_str = os.getenv(env_var, "5")
+        try:
+            pool_size = int(pool_size_str)
+        except ValueError:
+            raise ConfigurationValidationException(
+                f"Incorrect value : {pool_size_str}, OTTM_DATABASE_POOL_SIZE should be an integer number of connections"
+            )
+        return pool_size
+
     @staticmethod
     def __get_path_list(env_var) -> List[str]:
         path_list = []
@@ -141,6 +280,71 @@ class Configuration:
             )
         return legacy_percent
 
+    @staticmethod
+    def __get_training_mode(env_var) -> str:
+        training_mode = os.getenv(env_var, "exact").lower()
+        if training_mode not in AVAILABLE_TRAINING_MODES:
+            raise ConfigurationValidationException(
+                f"The following training mode is not handled by OTTM : {training_mode}." +\
+                f" Availables training modes are : {AVAILABLE_TRAINING_MODES}"
+            )
+        return training_mode
+
+    @staticmethod
+    def __get_drift_tolerance(env_var):
+        tolerance_str = os.getenv(env_var, "2")
+        try:
+            tolerance = float(tolerance_str)
+        except ValueError:
+            raise ConfigurationValidationException(
+                f"Incorrect value : {tolerance_str}, OTTM_DRIFT_TOLERANCE should be a float number"
+            )
+        if tolerance <= 0:
+            raise ConfigurationValidationException(
+                f"Incorrect value : {tolerance_str}, OTTM_DRIFT_TOLERANCE should be positive"
+            )
+        return tolerance
+
+    @staticmethod
+    def __get_kmeans_algorithm(env_var) -> str:
+        kmeans_algorithm = os.getenv(env_var, "kmeans").lower()
+        if kmeans_algorithm not in AVAILABLE_KMEANS_ALGORITHMS:
+            raise ConfigurationValidationException(
+                f"The following KMeans algorithm is not handled by OTTM : {kmeans_algorithm}." +\
+                f" Availables KMeans algorithms are : {AVAILABLE_KMEANS_ALGORITHMS}"
+            )
+        return kmeans_algorithm
+
+    @staticmethod
+    def __get_training_jobs(env_var):
+        jobs_str = os.getenv(env_var, "-1")
+        try:
+            jobs = int(jobs_str)
+        except ValueError:
+            raise ConfigurationValidationException(
+                f"Incorrect value : {jobs_str}, OTTM_TRAINING_JOBS should be an integer number of threads"
+            )
+        if jobs == 0 or jobs < -1:
+            raise ConfigurationValidationException(
+                f"Incorrect value : {jobs_str}, OTTM_TRAINING_JOBS should be at least 1, or -1 for all the CPUs"
+            )
+        return jobs
+
+    @staticmethod
+    def __get_model_store_compress(env_var):
+        compress_str = os.getenv(env_var, "3")
+        try:
+            compress = int(compress_str)
+        except ValueError:
+            raise ConfigurationValidationException(
+                f"Incorrect value : {compress_str}, OTTM_MODEL_STORE_COMPRESS should be an integer compression level"
+            )
+        if not 0 <= compress <= 9:
+            raise ConfigurationValidationException(
+                f"Incorrect value : {compress_str}, OTTM_MODEL_STORE_COMPRESS should be between 0 and 9"
+            )
+        return compress
+
     @staticmethod
     def __get_retry_delay(env_var):
         retry_delay_str = os.getenv(env_var, "3600")
@@ -3,9 +3,11 @@ import glob
 import logging
 import pathlib
 import math
+import os
 from typing import Iterator, Tuple
 
 import lizard
+import pandas as pd
 from lizard_ext.keywords import IGNORED_WORDS
 
 from utils.math import Math
@@ -48,6 +50,9 @@ class FileAnalyzer:
         self.__nb_blank_lines_values = []
         self.__nb_comments_values = []
 
+        # Values of each file, see get_file_values
+        self.__file_values = []
+
     def analyze_source_code(self):
         """
         Analyze the repository by using CK analysis tool
@@ -158,6 +163,26 @@ class FileAnalyzer:
             nb_comments = nb_lines - nb_loc - nb_blank_lines
             self.__nb_comments_values.append(nb_comments)
 
+            self.__file_values.append((pathlib.Path(os.path.relpath(filename, self.directory)).as_posix(),
+                                       nb_loc, nb_token, nb_functions, total_complexity, average_complexity,
+                                       nb_operand, nb_operators, nb_lines, nb_blank_lines, nb_comments))
+
+    def get_file_values(self) -> pd.DataFrame:
+        """
+        Get the lizard values of each file, relative to the analyzed folder, with the columns
+        path, nloc, token_count, functions, total_complexity, avg_complexity, operands, operators,
+        lines, blank_lines and comments
+        The files are analyzed unless analyze_source_code just did it
+        """
+        if not self.__file_values:
+            self.__get_metrics_values_from_source_code()
+        df = pd.DataFrame(self.__file_values,
+                          columns=["path", "nloc", "token_count", "functions", "total_complexity",
+                                   "avg_complexity", "operands", "operators", "lines", "blank_lines",
+                                   "comments"])
+        # The recursive glob can list a file twice
+        return df.drop_duplicates("path").reset_index(drop=True)
+
     def __get_supported_language_files(self) -> Iterator[str]:
         # TODO: we should take into account the inclusion/exclusion env var
         for filename in glob.iglob(self.directory + '/**/**', recursive=True):
@@ -2,17 +2,49 @@ from abc import ABC, abstractmethod
 import logging
 import datetime
 import json
+import math
+from typing import Iterable, Iterator, List, Optional, Set, Tuple
 
-from pydriller import Repository
+from pydriller import Git
+from sqlalchemy import desc
 
 from models.issue import Issue
 from models.version import Version
 from models.commit import Commit
 from models.metric import Metric
+from models.filemetric import FileMetric
 from models.author import Author
 from models.alias import Alias
+from models.dmmbacklog import DmmBacklog
+from models.branch import Branch
 from utils.timeit import timeit
+from utils.issuewriter import IssueWriter
+import utils.gitpool as gitpool
+from connectors.gitlog import GitLogConnector
 from metrics.versions import compute_version_metrics
+from metrics.dmm import compute_dmm_metrics
+from metrics.fixes import label_fix_inducing_commits
+from metrics.rollups import update_daily_commit_stats
+
+COMMITS_BATCH_SIZE = 1000
+HASHES_QUERY_SIZE = 500
+
+def get_commit_values(git_commit) -> dict:
+    """Get the values of the Commit columns from a pydriller commit"""
+    return {
+        "hash": git_commit.hash,
+        "committer": git_commit.committer.name,
+        "date": git_commit.committer_date,
+        "message": git_commit.msg,
+        "insertions": git_commit.insertions,
+        "deletions": git_commit.deletions,
+        "lines": git_commit.lines,
+        "files": git_commit.files,
+    }
+
+def mine_commits_chunk(hashes: List[str]) -> List[dict]:
+    """Mine a chunk of commits in a worker process of utils.gitpool"""
+    return [get_commit_values(gitpool.worker_git.get_commit(commit_hash)) for commit_hash in hashes]
 
 class GitConnector(ABC):
     """Connector to Github
@@ -67,39 +99,148 @@ class GitConnector(ABC):
         Commits are not linked to version
         """
         logging.info('create_commits_from_repo')
+        git_log = GitLogConnector(self.directory, self.configuration)
+        head = git_log.get_head()
+
+        # Check what was the last synced HEAD of the branch
+        branch = self.session.query(Branch).filter(Branch.project_id == self.project_id) \
+                                           .filter(Branch.name == self.current).first()
+        if branch is None:
+            branch = Branch(project_id=self.project_id, name=self.current)
+            self.session.add(branch)
 
-        # Check what was the las inserted commit
-        last_commit = self.session.query(Commit).filter(Commit.project_id == self.project_id).order_by(Commit.date.desc()).first()
-        if last_commit is not None:
-            last_synced = last_commit.date + datetime.timedelta(seconds=1)
-            logging.info('Update existing database by fetching new commits since ' + str(last_synced))
-            git_commits = Repository(self.directory, since=last_synced, only_no_merge=True).traverse_commits()
+        if branch.last_synced_head == head:
+            logging.info('Commits are up to date with ' + head)
+            return
+        elif branch.last_synced_head and git_log.is_ancestor(branch.last_synced_head, head):
+            logging.info('Update existing database by fetching new commits since ' + branch.last_synced_head)
+            revisions = f"{branch.last_synced_head}..{head}"
         else:
-            logging.info('Create a database with all commits')
-            git_commits = Repository(self.directory, only_no_merge=True).traverse_commits()
-
-        commits = []
-        for git_commit in git_commits:
-            if git_commit.committer.name not in self.configuration.exclude_authors:
-                commits.append(
-                    Commit(
-                        project_id=self.project_id,
-                        hash=git_commit.hash,
-                        committer=git_commit.committer.name,
-                        date=git_commit.committer_date,
-                        message=git_commit.msg,
-                        insertions=git_commit.insertions,
-                        deletions=git_commit.deletions,
-                        lines=git_commit.lines,
-                        files=git_commit.files,
-                        dmm_unit_size=git_commit.dmm_unit_size,
-                        dmm_unit_complexity=git_commit.dmm_unit_complexity,
-                        dmm_unit_interfacing=git_commit.dmm_unit_interfacing
-                    )
-                )
-            
+            # First sync, or the history was rewritten: existing commits are skipped below
+            logging.info('Fetching all commits reachable from ' + head)
+            revisions = head
+
+        hashes = git_log.get_commit_hashes(revisions)
+        if branch.last_synced_head and revisions == head:
+            # Rewritten history: the commits replaced by the rewritten ones are dropped
+            self._delete_unreachable_commits(hashes)
+        existing_hashes = self._get_existing_hashes(hashes)
+        new_hashes = [commit_hash for commit_hash in hashes if commit_hash not in existing_hashes]
+        logging.info(f"{len(new_hashes)} new commit(s), {len(existing_hashes)} already in the database")
+
+        git_commits = self._get_commits(revisions, new_hashes)
+        self._save_commits(commit for commit in git_commits
+                           if commit.committer not in self.configuration.exclude_authors)
+
+        branch.last_synced_head = head
+        branch.synced_at = datetime.datetime.now()
+        self.session.commit()
+
+    def _delete_unreachable_commits(self, hashes: List[str]):
+        """
+        Delete the commits no longer reachable from the branch (e.g. rebased or force-pushed),
+        with their DMM backlog and daily rollups, as their rewritten versions are synced again
+        """
+        reachable_hashes = set(hashes)
+        unreachable_commits = [(commit_hash, commit_date) for commit_hash, commit_date
+                               in self.session.query(Commit.hash, Commit.date).filter(Commit.project_id == self.project_id)
+                               if commit_hash not in reachable_hashes]
+        if not unreachable_commits:
+            return
+        logging.info(f"Deleting {len(unreachable_commits)} commit(s) no longer reachable from {self.current}")
+        unreachable_hashes = [commit_hash for commit_hash, _ in unreachable_commits]
+        for i in range(0, len(unreachable_hashes), HASHES_QUERY_SIZE):
+            chunk = unreachable_hashes[i:i + HASHES_QUERY_SIZE]
+            self.session.query(Commit).filter(Commit.project_id == self.project_id) \
+                .filter(Commit.hash.in_(chunk)).delete(synchronize_session=False)
+            self.session.query(DmmBacklog).filter(DmmBacklog.project_id == self.project_id) \
+                .filter(DmmBacklog.hash.in_(chunk)).delete(synchronize_session=False)
+        update_daily_commit_stats(self.session, self.project_id, [commit_date for _, commit_date in unreachable_commits])
+
+    def _get_existing_hashes(self, hashes: List[str]) -> Set[str]:
+        """
+        Get the hashes already stored in the database, by chunks to stay under the SQL variables limit
+        """
+        existing_hashes = set()
+        for i in range(0, len(hashes), HASHES_QUERY_SIZE):
+            existing_hashes.update(
+                commit_hash for commit_hash, in self.session.query(Commit.hash) \
+                    .filter(Commit.project_id == self.project_id) \
+                    .filter(Commit.hash.in_(hashes[i:i + HASHES_QUERY_SIZE])).all()
+            )
+        return existing_hashes
+
+    def _save_commits(self, commits: Iterable[Commit]):
+        """
+        Write the commits into the database by batches of COMMITS_BATCH_SIZE
+        """
+        batch = []
+        for commit in commits:
+            batch.append(commit)
+            if len(batch) >= COMMITS_BATCH_SIZE:
+                self._save_commits_batch(batch)
+                batch = []
+        self._save_commits_batch(batch)
+
+    def _save_commits_batch(self, commits: List[Commit]):
         self.session.add_all(commits)
+        # DMM metrics are computed later, see compute_dmm_metrics
+        self.session.add_all([DmmBacklog(project_id=self.project_id, hash=commit.hash) for commit in commits])
+        update_daily_commit_stats(self.session, self.project_id, [commit.date for commit in commits])
         self.session.commit()
+        logging.info(f"Saved {len(commits)} commit(s)")
+
+    def _get_commits(self, revisions: str, hashes: List[str]) -> Iterator[Commit]:
+        """
+        Mine the commits of the repository with the configured backend
+
+        Parameters:
+        -----------
+         - revisions    Revision range listing the commits (e.g. "<last synced head>..<head>")
+         - hashes       Commits of the range to be mined, oldest first
+        """
+        if not hashes:
+            return
+
+        if self.configuration.commit_miner == "gitlog":
+            logging.info('Mining commits with git log')
+            wanted_hashes = set(hashes)
+            for git_commit in GitLogConnector(self.directory, self.configuration).get_commits(revisions):
+                if git_commit["hash"] in wanted_hashes:
+                    yield Commit(project_id=self.project_id, **git_commit)
+        elif self.configuration.commit_miner_workers > 1:
+            yield from self._get_commits_in_parallel(hashes)
+        else:
+            logging.info('Mining commits with pydriller')
+            git = Git(self.directory)
+            for commit_hash in hashes:
+                yield Commit(project_id=self.project_id, **get_commit_values(git.get_commit(commit_hash)))
+            git.clear()
+
+    def _get_commits_in_parallel(self, hashes: List[str]) -> Iterator[Commit]:
+        """
+        Mine the commits with pydriller in several processes
+        The list of commits is split into contiguous chunks, and the chunks are
+        yielded back in their original order, so that commits stay sorted by date
+        """
+        workers = self.configuration.commit_miner_workers
+        chunk_size = max(1, min(COMMITS_BATCH_SIZE, math.ceil(len(hashes) / workers)))
+        chunks = [hashes[i:i + chunk_size] for i in range(0, len(hashes), chunk_size)]
+        logging.info(f"Mining {len(hashes)} commit(s) with pydriller in {workers} processes")
+
+        with gitpool.git_process_pool(self.directory, workers) as executor:
+            for values in executor.map(mine_commits_chunk, chunks):
+                for commit_values in values:
+                    yield Commit(project_id=self.project_id, **commit_values)
+
+    def compute_dmm_metrics(self, workers=None, chunk_size=100):
+        """Compute the DMM metrics of the commits waiting in the backlog"""
+        compute_dmm_metrics(self.session, self.directory, self.project_id, workers, chunk_size)
+
+    def label_fix_inducing_commits(self):
+        """Label the bug fix commits and the commits that induced them, for the commitrisk model"""
+        label_fix_inducing_commits(self.session, self.directory, self.project_id,
+                                   self.configuration.commit_miner_workers)
 
     def compute_version_metrics(self):
         """Compute version related metics:
@@ -120,6 +261,7 @@ class GitConnector(ABC):
             logging.info("No Metrics to clean up")
         else:
             self.session.query(Metric).filter(Metric.version_id == next_release.version_id).delete()
+            self.session.query(FileMetric).filter(FileMetric.version_id == next_release.version_id).delete()
             self.session.commit()
             logging.info("Deleted Metrics associated with version " + next_release.name)
 
@@ -129,10 +271,14 @@ class GitConnector(ABC):
             logging.info("Skipping version populate")
         else:
             self.create_versions()
-        
+        self.populate_commits()
+
+    def populate_commits(self):
+        """Populate the commits of the local repository and compute the version metrics"""
         # Preserve the sequence below
         self.clean_next_release_metrics()
         self.create_commits_from_repo()
+        self.label_fix_inducing_commits()
         self.compute_version_metrics()
 
     def _clean_project_existing_versions(self):
@@ -141,9 +287,7 @@ class GitConnector(ABC):
         self.session.commit()
 
     def _get_first_commit_date(self):
-        commits_iterator = Repository(self.directory).traverse_commits()
-        first_commit = next(commits_iterator)
-        return first_commit.committer_date
+        return GitLogConnector(self.directory, self.configuration).get_first_commit_date()
 
     def _get_existing_issue_id(self, issue_number) -> int:
         
@@ -160,12 +304,50 @@ class GitConnector(ABC):
 
         return existing_issue_id
 
-    @abstractmethod
+    def get_last_issue_date(self) -> Optional[datetime.datetime]:
+        """Get the date after which the issues must be synced, None to sync all the issues"""
+        last_issue = self.session.query(Issue) \
+                         .filter(Issue.project_id == self.project_id) \
+                         .filter(Issue.source == 'git') \
+                         .order_by(desc(Issue.updated_at)).first()
+        if last_issue is None:
+            return None
+        return last_issue.updated_at + datetime.timedelta(seconds=1)
+
+    @timeit
     def create_issues(self):
+        """
+        Create issues into the database from the issues of the SCM
+        """
+        logging.info(f'{type(self).__name__}: create_issues')
+        with IssueWriter(self.session, self.project_id, "git") as writer:
+            for issue in self.fetch_issues(self.get_last_issue_date()):
+                writer.write(*issue)
+
+    @timeit
+    def create_versions(self):
+        """
+        Create versions into the database from the releases of the SCM
+        """
+        logging.info(f'{type(self).__name__}: create_versions')
+        self.save_versions(self.fetch_releases())
+
+    @abstractmethod
+    def fetch_issues(self, since) -> Iterator[Tuple]:
+        """
+        List the issues of the SCM updated at or after `since` (all if None) as
+        (number, title, created_at, updated_at), without accessing the database
+        """
         raise NotImplementedError
 
     @abstractmethod
-    def create_versions(self):
+    def fetch_releases(self) -> list:
+        """List the releases of the SCM, without accessing the database"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def save_versions(self, releases: list):
+        """Replace the versions of the project by the ones of the releases"""
         raise NotImplementedError
 
     @abstractmethod
@@ -174,4 +356,4 @@ class GitConnector(ABC):
 
     @abstractmethod
     def _get_releases(self, all, order_by, sort):
-        raise NotImplementedError
\ No newline at end of file
+        raise NotImplementedError
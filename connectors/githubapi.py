@@ -0,0 +1,142 @@
+import logging
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Iterator, List
+
+import requests
+
+from utils.transport import create_http_session
+
+GITHUB_API_URL = "https://api.github.com"
+# Largest page size accepted by the GitHub REST API
+MAX_PAGE_SIZE = 100
+
+LAST_PAGE_REGEX = re.compile(r'<[^>]*[?&]page=(\d+)[^>]*>;\s*rel="last"')
+
+
+def get_last_page(response: requests.Response) -> int:
+    """Get the number of the last page from the Link header of a paginated response"""
+    match = LAST_PAGE_REGEX.search(response.headers.get("Link", ""))
+    return int(match.group(1)) if match else 1
+
+
+def parse_github_date(date_str: str) -> datetime:
+    """Parse a GitHub date (e.g. 2022-01-02T10:00:00Z) into a naive UTC datetime, as PyGithub does"""
+    if date_str is None:
+        return None
+    return datetime.strptime(date_str, "%Y-%m-%dT%H:%M:%SZ")
+
+
+class RateLimiter:
+    """
+    Pace the requests of several threads from the X-RateLimit-Remaining and
+    X-RateLimit-Reset headers of the responses: once the remaining requests are
+    used up, all the threads wait until the reset of the window
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.remaining = None
+        self.reset = 0
+
+    def wait(self) -> None:
+        """Wait, if needed, before sending a request"""
+        with self.lock:
+            if self.remaining is None:
+                return
+            if self.remaining <= 0:
+                delay = self.reset - time.time() + 1
+                if delay > 0:
+                    logging.info(f"API rate limit reached, waiting {int(delay)}s until the reset")
+                    time.sleep(delay)
+                self.remaining = None
+            else:
+                # Reserve a request of the window for this thread
+                self.remaining -= 1
+
+    def update(self, response: requests.Response) -> None:
+        """Record the rate limit headers of a response"""
+        if "X-RateLimit-Remaining" not in response.headers:
+            return
+        remaining = int(response.headers["X-RateLimit-Remaining"])
+        reset = int(response.headers.get("X-RateLimit-Reset", 0))
+        with self.lock:
+            # Responses of the same window may come back out of order
+            if reset == self.reset and self.remaining is not None:
+                remaining = min(remaining, self.remaining)
+            self.remaining = remaining
+            self.reset = reset
+
+
+class GitHubApiClient:
+    """
+    Client of the GitHub REST API, listing issues and releases by pages of
+    MAX_PAGE_SIZE items requested concurrently
+
+    Attributes:
+    -----------
+        - token     Token for the GitHub API
+        - repo      Repository (e.g. "dbeaver/dbeaver")
+        - config    Configuration (API base URL, number of workers)
+    """
+
+    def __init__(self, token, repo, config):
+        self.repo = repo
+        self.configuration = config
+        self.api_url = (config.scm_base_url or GITHUB_API_URL).rstrip("/")
+        self.rate_limiter = RateLimiter()
+        self.http = create_http_session("github", config)
+        self.http.headers["Accept"] = "application/vnd.github+json"
+        if token:
+            self.http.headers["Authorization"] = f"token {token}"
+
+    def _get_page(self, path: str, params: dict, page: int) -> requests.Response:
+        """Get a page of a list, waiting for the rate limit reset when needed"""
+        self.rate_limiter.wait()
+        # Secondary rate limits (Retry-After) and transient errors are retried by the transport
+        response = self.http.get(f"{self.api_url}/repos/{self.repo}/{path}",
+                                 params={**params, "per_page": MAX_PAGE_SIZE, "page": page})
+        self.rate_limiter.update(response)
+        response.raise_for_status()
+        return response
+
+    def get_issues(self, since: datetime = None, labels: List[str] = None) -> Iterator[dict]:
+        """
+        List the issues of the repository, pull requests excluded, oldest first
+
+        Parameters:
+        -----------
+         - since    Only issues updated at or after this date (naive UTC datetime)
+         - labels   Only issues with all these labels
+        """
+        # Sorted by creation date so that new issues don't shift the pages being fetched
+        params = {"state": "all", "sort": "created", "direction": "asc"}
+        if since:
+            params["since"] = since.strftime("%Y-%m-%dT%H:%M:%SZ")
+        if labels:
+            params["labels"] = ",".join(labels)
+
+        return (issue for issue in self._get_list("issues", params) if "pull_request" not in issue)
+
+    def get_releases(self) -> Iterator[dict]:
+        """
+        List the releases of the repository, newest first
+        """
+        return self._get_list("releases", {})
+
+    def _get_list(self, path: str, params: dict) -> Iterator[dict]:
+        """
+        List the items of all the pages of a list, the first page gives the number of pages
+        """
+        first_page = self._get_page(path, params, 1)
+        last_page = get_last_page(first_page)
+        logging.info(f"Fetching {last_page} page(s) of {path} from GitHub")
+
+        with ThreadPoolExecutor(max_workers=self.configuration.api_workers) as executor:
+            pages = executor.map(lambda page: self._get_page(path, params, page).json(), range(2, last_page + 1))
+            yield from first_page.json()
+            for items in pages:
+                yield from items
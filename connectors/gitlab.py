@@ -1,16 +1,43 @@
 import logging
-from time import sleep
-import gitlab
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterator
 
-from sqlalchemy import desc, update
-
-from models.issue import Issue
 from models.version import Version
 from utils.date import date_iso_8601_to_datetime
-from utils.timeit import timeit
+from utils.transport import create_http_session
 from connectors.git import GitConnector
 from gitlab import Gitlab
-from datetime import datetime, timedelta
+from datetime import datetime
+
+def iterate_pages(get_page: Callable[[int], list], page_size: int, workers: int) -> Iterator:
+    """
+    Iterate lazily the items of an offset-paginated list, with up to `workers` pages
+    requested ahead: memory is bounded by workers * page_size items whatever the
+    length of the list. The list ends at the first page shorter than page_size.
+    """
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending_pages = deque(executor.submit(get_page, page) for page in range(1, workers + 1))
+        next_page = workers + 1
+        while pending_pages:
+            items = pending_pages.popleft().result()
+            yield from items
+            if len(items) < page_size:
+                for pending_page in pending_pages:
+                    pending_page.cancel()
+                return
+            pending_pages.append(executor.submit(get_page, next_page))
+            next_page += 1
+
+class GitlabClient(Gitlab):
+    """
+    python-gitlab client leaving the retries of the rate limits (429) and of the
+    transient errors (5xx) to the transport of its session (see utils.transport)
+    """
+    def http_request(self, *args, **kwargs):
+        kwargs["obey_rate_limit"] = False
+        kwargs["retry_transient_errors"] = False
+        return super().http_request(*args, **kwargs)
 
 class GitLabConnector(GitConnector):
     """
@@ -22,15 +49,16 @@ class GitLabConnector(GitConnector):
     """
     def __init__(self, project_id, directory, base_url, token, repo, current, session, config):
         GitConnector.__init__(self, project_id, directory, token, repo, current, session, config)
+        http = create_http_session("gitlab", config)
         if not base_url and not self.token:
             logging.info("anonymous read-only access for public resources (GitLab.com)")
-            self.api = Gitlab()
+            self.api = GitlabClient(session=http)
         if base_url and self.token:
             logging.info("private token or personal token authentication (self-hosted GitLab instance)")
-            self.api = Gitlab(url=base_url, private_token=self.token)
+            self.api = GitlabClient(url=base_url, private_token=self.token, session=http)
         if not base_url and self.token:
             logging.info("private token or personal token authentication (GitLab.com)")
-            self.api = Gitlab(private_token=self.token)
+            self.api = GitlabClient(private_token=self.token, session=http)
         
         # Check the authentification. Doesn't work for public read only access
         if base_url or self.token:
@@ -39,98 +67,44 @@ class GitLabConnector(GitConnector):
         self.remote = self.api.projects.get(self.repo)
 
     def _get_issues(self, since=None, labels=None):
-        if not since:
-            since = None
-        if not labels:
-            labels = None
+        filters = {"state": "all", "order_by": "created_at", "sort": "asc"}
+        if since:
+            filters["updated_after"] = since.isoformat()
+        if labels:
+            filters["labels"] = ",".join(labels)
 
-        try:
-            return self.remote.issues.list(state="all", since=since, with_labels_details=labels, get_all=True)
-        except gitlab.GitlabJobRetryError:
-            sleep(self.configuration.retry_delay)
-            self._get_issues(since, labels)
+        # Rate limits (429) and transient errors are retried by the transport of the session, see GitlabClient
+        return iterate_pages(lambda page: self.remote.issues.list(page=page, per_page=self.configuration.gitlab_page_size,
+                                                                  **filters),
+                             self.configuration.gitlab_page_size, self.configuration.api_workers)
     
     def _get_releases(self, all, order_by, sort):
-        if not all:
-            all = None
-        if not order_by:
-            order_by = None
-        if not sort:
-            sort = None
-            
-        try:
-            return self.remote.releases.list(all=all, order_by=order_by,sort=sort)
-        except gitlab.GitlabJobRetryError:
-            sleep(self.configuration.retry_delay)
-            self._get_releases(all, order_by, sort)
-        
-    @timeit
-    def create_issues(self):
-        """
-        Create issues into the database from GitLab Issues
-        """
-        logging.info('GitLabConnector: create_issues')
+        filters = {}
+        if order_by:
+            filters["order_by"] = order_by
+        if sort:
+            filters["sort"] = sort
 
-        # Check if a database already exist
-        last_issue = self.session.query(Issue) \
-                         .filter(Issue.project_id == self.project_id) \
-                         .filter(Issue.source == 'git') \
-                         .order_by(desc(Issue.updated_at)).first()
-        if last_issue is not None:
-            # Update existing database by fetching new issues
-            if not self.configuration.issue_tags:
-                git_issues = self._get_issues(since=last_issue.updated_at + timedelta(seconds=1), labels=None)
-            else:
-                git_issues = self._get_issues(since=last_issue.updated_at + timedelta(seconds=1),
-                                                    labels=self.configuration.issue_tags)  # e.g. Filter by labels=['bug']
-        else:
-            # Create a database with all issues
-            if not self.configuration.issue_tags:
-                git_issues = self._get_issues(since=None, labels=None)
-            else:
-                git_issues = self._get_issues(labels=self.configuration.issue_tags)    # e.g. Filter by labels=['bug']
+        return iterate_pages(lambda page: self.remote.releases.list(page=page, per_page=self.configuration.gitlab_page_size,
+                                                                    **filters),
+                             self.configuration.gitlab_page_size, self.configuration.api_workers)
         
-        # versions = self.session.query(Version).all
-        logging.info('Syncing ' + str(len(git_issues)) + ' issue(s) from GitLab')
-
-        new_bugs = []
-        # for version in versions:
-        for issue in git_issues:
-            # Check if the issue is linked to a selected version (included or not +IN?.§ .?NBVCXd)
+    def fetch_issues(self, since=None):
+        # e.g. Filter by labels=['bug']
+        for issue in self._get_issues(since=since, labels=self.configuration.issue_tags or None):
+            # Check if the issue is linked to a selected version (included or not excluded)
             # if version.end_date > issue.created_at > version.start_date:
             if issue.author['username'] not in self.configuration.exclude_issuers:
-                
-                updated_issue_date = date_iso_8601_to_datetime(issue.updated_at)
-                existing_issue_id = self._get_existing_issue_id(issue.iid)
+                yield (issue.iid, issue.title,
+                       date_iso_8601_to_datetime(issue.created_at), date_iso_8601_to_datetime(issue.updated_at))
 
-                if existing_issue_id:
-                    logging.info("Issue %s already exists, updating it", existing_issue_id)
-                    self.session.execute(
-                        update(Issue).where(Issue.issue_id == existing_issue_id) \
-                                     .values(title=issue.title, updated_at=updated_issue_date)
-                    )
-                else:
-                    new_bugs.append(
-                        Issue(
-                            project_id=self.project_id,
-                            title=issue.title,
-                            number=issue.iid,
-                            source="git",
-                            created_at=date_iso_8601_to_datetime(issue.created_at),
-                            updated_at=updated_issue_date,
-                        )
-                    )
+    def fetch_releases(self):
+        return list(self._get_releases(all=True, order_by="released_at", sort="asc"))
 
-        self.session.add_all(new_bugs)
-        self.session.commit()
-    
-    @timeit
-    def create_versions(self):
+    def save_versions(self, releases):
         """
         Create versions into the database from GitLab releases
         """
-        logging.info('GitLabConnector: create_versions')
-        releases = self._get_releases(all=True, order_by="released_at", sort="asc")
         self._clean_project_existing_versions()
 
         versions = []
@@ -0,0 +1,160 @@
+import logging
+import re
+import subprocess
+from datetime import datetime
+from typing import Iterator, List, Tuple
+
+# One record per commit: hash, committer, committer date (strict ISO 8601) and raw message,
+# each field terminated by a NUL byte. The --shortstat line follows the last NUL.
+GIT_LOG_FORMAT = "%H%x00%cn%x00%cI%x00%B%x00"
+
+# One record per commit: hash and committer, followed by a --numstat line per modified file
+GIT_NUMSTAT_FORMAT = "%x00%H%x00%cn"
+
+SHORTSTAT_REGEX = re.compile(
+    rb"(\d+) files? changed(?:, (\d+) insertions?\(\+\))?(?:, (\d+) deletions?\(-\))?"
+)
+
+
+def parse_git_log(output: bytes) -> Iterator[dict]:
+    """
+    Parse the output of git log --shortstat --format=GIT_LOG_FORMAT
+
+    The output is split on NUL bytes, which gives one hash followed by groups of
+    four chunks: committer, date, message and a tail holding the shortstat of the
+    commit and the hash of the next one.
+
+    Yield a dictionary of values per commit:
+        hash, committer, date, message, insertions, deletions, lines, files
+    """
+    chunks = output.split(b"\x00")
+    if len(chunks) < 5:
+        return
+
+    commit_hash = chunks[0].strip()
+    last_group = len(chunks) - 4
+    for i in range(1, len(chunks) - 3, 4):
+        committer, date, message, tail = chunks[i:i + 4]
+
+        if i == last_group:
+            stat, next_hash = tail, b""
+        else:
+            stat, _, next_hash = tail.rpartition(b"\n")
+
+        files = insertions = deletions = 0
+        match = SHORTSTAT_REGEX.search(stat)
+        if match:
+            files = int(match.group(1))
+            insertions = int(match.group(2) or 0)
+            deletions = int(match.group(3) or 0)
+
+        yield {
+            "hash": commit_hash.decode("ascii"),
+            "committer": committer.decode("utf-8", errors="replace"),
+            "date": datetime.fromisoformat(date.decode("ascii")),
+            "message": message.decode("utf-8", errors="replace").strip(),
+            "insertions": insertions,
+            "deletions": deletions,
+            "lines": insertions + deletions,
+            "files": files,
+        }
+        commit_hash = next_hash.strip()
+
+def parse_git_numstat(output: bytes) -> Iterator[Tuple[str, str, str, int, int]]:
+    """
+    Parse the output of git log --numstat --format=GIT_NUMSTAT_FORMAT
+
+    Yield a tuple (hash, committer, path, added lines, deleted lines) per modified file,
+    binary files having no added or deleted lines
+    """
+    chunks = output.split(b"\x00")
+    for i in range(1, len(chunks) - 1, 2):
+        commit_hash = chunks[i].decode("ascii")
+        committer, _, numstat = chunks[i + 1].partition(b"\n")
+        committer = committer.decode("utf-8", errors="replace")
+        for line in numstat.splitlines():
+            if not line:
+                continue
+            added, deleted, path = line.split(b"\t", 2)
+            yield (commit_hash, committer, path.decode("utf-8", errors="replace"),
+                   int(added) if added.isdigit() else 0, int(deleted) if deleted.isdigit() else 0)
+
+class GitLogConnector:
+    """
+    Connector to the git plumbing commands, a faster alternative to
+    pydriller when only the commit statistics are needed
+
+    Attributes:
+    -----------
+        - directory   Full path to a cloned GIT repository
+        - config      Configuration (path to the git executable)
+    """
+
+    def __init__(self, directory, config):
+        self.directory = directory
+        self.configuration = config
+
+    def get_commits(self, revisions: str = "HEAD") -> Iterator[dict]:
+        """
+        List the non-merge commits of a revision range, oldest first, in a single git log call
+        """
+        process = subprocess.run([self.configuration.scm_path, "--no-pager", "log", "--no-merges",
+                                  "--reverse", "--shortstat", f"--format={GIT_LOG_FORMAT}", revisions],
+                                 cwd=self.directory, capture_output=True)
+        process.check_returncode()
+        logging.info('Executed command line: ' + ' '.join(process.args))
+        return parse_git_log(process.stdout)
+
+    def get_file_changes(self, since: datetime, until: datetime, revisions: str = "HEAD") -> Iterator[Tuple]:
+        """
+        List the files modified by the non-merge commits of a period, in a single git log call
+
+        Yield a tuple (hash, committer, path, added lines, deleted lines) per modified file
+        """
+        process = subprocess.run([self.configuration.scm_path, "--no-pager", "log", "--no-merges", "--no-renames",
+                                  "--numstat", f"--format={GIT_NUMSTAT_FORMAT}",
+                                  f"--since={since.isoformat()}", f"--until={until.isoformat()}", revisions],
+                                 cwd=self.directory, capture_output=True)
+        process.check_returncode()
+        logging.info('Executed command line: ' + ' '.join(process.args))
+        return parse_git_numstat(process.stdout)
+
+    def get_commit_hashes(self, revisions: str = "HEAD") -> List[str]:
+        """
+        List the hashes of the non-merge commits of a revision range, oldest first
+        """
+        process = subprocess.run([self.configuration.scm_path, "rev-list", "--no-merges", "--reverse", revisions],
+                                 cwd=self.directory, capture_output=True)
+        process.check_returncode()
+        logging.info('Executed command line: ' + ' '.join(process.args))
+        return process.stdout.decode("ascii").split()
+
+    def get_head(self) -> str:
+        """
+        Get the hash of the commit checked out in the repository
+        """
+        process = subprocess.run([self.configuration.scm_path, "rev-parse", "HEAD"],
+                                 cwd=self.directory, capture_output=True)
+        process.check_returncode()
+        return process.stdout.decode("ascii").strip()
+
+    def is_ancestor(self, ancestor: str, descendant: str = "HEAD") -> bool:
+        """
+        Check that a commit exists and is reachable from another one (i.e. history was not rewritten)
+        """
+        process = subprocess.run([self.configuration.scm_path, "merge-base", "--is-ancestor", ancestor, descendant],
+                                 cwd=self.directory, capture_output=True)
+        return process.returncode == 0
+
+    def get_first_commit_date(self) -> datetime:
+        """
+        Get the committer date of the oldest root commit reachable from HEAD
+        """
+        process = subprocess.run([self.configuration.scm_path, "rev-list", "--max-parents=0",
+                                  "--format=%cI", "HEAD"],
+                                 cwd=self.directory, capture_output=True)
+        process.check_returncode()
+        dates: List[datetime] = [datetime.fromisoformat(line)
+                                 for line in process.stdout.decode("ascii").splitlines()
+                                 if line and not line.startswith("commit ")]
+        return min(dates)
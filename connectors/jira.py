@@ -1,17 +1,24 @@
 import logging
 import requests
-from typing import List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, Tuple
 from datetime import timedelta, datetime
 
 from jira import JIRA
-from sqlalchemy import desc, update
+from sqlalchemy import desc
 
 from models.issue import Issue
 from utils.date import date_iso_8601_to_datetime, datetime_to_date_hours_minuts
+from utils.transport import install_transport
+from utils.issuewriter import IssueWriter
 from utils.timeit import timeit
 
 requests.packages.urllib3.disable_warnings(requests.packages.urllib3.exceptions.InsecureRequestWarning)
 
+# Largest page size accepted by the search API of Jira Cloud
+JIRA_PAGE_SIZE = 100
+JIRA_FIELDS = "summary,created,updated,reporter"
+
 class JiraConnector:
     
     def __init__(self, project_id, session, config) -> None:
@@ -20,7 +27,10 @@ class JiraConnector:
         self.project_id = project_id
         self.__client = JIRA(
                                 server=self.config.jira_base_url,
-                                basic_auth=(self.config.jira_email, self.config.jira_token))
+                                basic_auth=(self.config.jira_email, self.config.jira_token),
+                                # Retried by the transport
+                                max_retries=0)
+        install_transport(self.__client._session, "jira", self.config)
 
     @timeit
     def create_issues(self):
@@ -28,21 +38,18 @@ class JiraConnector:
         Create issues into the database from Jira Issues
         """
         logging.info('JiraConnector: create_issues')
+        with IssueWriter(self.session, self.project_id, "jira") as writer:
+            for issue in self.fetch_issues(self.get_last_issue_date()):
+                writer.write(*issue)
 
-        last_issue_date = self.__get_last_sinced_date()
-
-        jira_issues = self._get_issues(updated_after=last_issue_date)
-        
-        logging.info('Syncing ' + str(len(jira_issues)) + ' issue(s) from Jira')
-
-        self.__save_issues(jira_issues)
-
-    def __get_last_sinced_date(self) -> datetime:
+    def get_last_issue_date(self) -> datetime:
+        """Get the date after which the issues must be synced, None to sync all the issues"""
 
         last_issue_date = None
 
         last_issue = self.session.query(Issue) \
-                         .filter(Issue.project_id == self.project_id and Issue.source == 'jira') \
+                         .filter(Issue.project_id == self.project_id) \
+                         .filter(Issue.source == 'jira') \
                          .order_by(desc(Issue.updated_at)).first()
 
         if last_issue:
@@ -52,13 +59,32 @@ class JiraConnector:
 
         return last_issue_date
 
-    def _get_issues(self, updated_after: datetime = None):
-
-        jql_query = self.__get_builded_jql_query(updated_after)
+    def _get_issues(self, updated_after: datetime = None) -> Iterator[dict]:
+        """
+        List the issues matching the JQL query, by pages of JIRA_PAGE_SIZE issues with only
+        the JIRA_FIELDS fields. The first page gives the total, the next ones are fetched concurrently.
+        """
+        # Sorted by creation date so that new issues don't shift the pages being fetched
+        jql_query = self.__get_builded_jql_query(updated_after) + " ORDER BY created ASC"
 
         logging.info("Performing JQL query to get Jira issues : %s", jql_query)
 
-        return self.__client.search_issues(jql_query)
+        first_page = self.__search_issues(jql_query, 0, JIRA_PAGE_SIZE)
+        total = first_page["total"]
+        # The server may cap the page size below the requested one
+        page_size = first_page["maxResults"]
+        logging.info('Syncing ' + str(total) + ' issue(s) from Jira')
+
+        with ThreadPoolExecutor(max_workers=self.config.api_workers) as executor:
+            pages = executor.map(lambda start_at: self.__search_issues(jql_query, start_at, page_size),
+                                 range(page_size, total, page_size))
+            yield from first_page["issues"]
+            for page in pages:
+                yield from page["issues"]
+
+    def __search_issues(self, jql_query: str, start_at: int, max_results: int) -> dict:
+        return self.__client.search_issues(jql_query, startAt=start_at, maxResults=max_results,
+                                           fields=JIRA_FIELDS, json_result=True)
     
     def __get_builded_jql_query(self, updated_after: datetime) -> str:
 
@@ -78,52 +104,21 @@ class JiraConnector:
 
         return jql_query
 
-    def __save_issues(self, jira_issues) -> None:
-        new_ottm_issues = []
+    def fetch_issues(self, updated_after: datetime = None) -> Iterator[Tuple]:
+        """
+        List the issues updated after a date (all if None) as (number, title, created_at, updated_at),
+        without accessing the database
+        """
+        for issue in self._get_issues(updated_after=updated_after):
+            fields = issue["fields"]
+            reporter = fields.get("reporter") or {}
+            reporter_ids = {reporter.get(key) for key in ("name", "displayName", "emailAddress", "accountId")}
 
-        for issue in jira_issues:
+            if reporter_ids.isdisjoint(self.config.exclude_issuers):
 
-            if issue.fields.reporter not in self.config.exclude_issuers:
-                
                 updated_issue_date = None
-                if hasattr(issue.fields, "updated"):
-                        updated_issue_date = date_iso_8601_to_datetime(issue.fields.updated)
-                
-                existing_issue_id = self.__get_existing_issue_id(issue.key)
-                
-                if existing_issue_id:
-                    logging.info("Issue %s already exists, updating it", existing_issue_id)
-                    self.session.execute(
-                        update(Issue).where(Issue.issue_id == existing_issue_id) \
-                                     .values(title=issue.fields.summary, updated_at=updated_issue_date)
-                    )
-                else:
-                    ottm_issue = Issue(
-                        project_id=self.project_id,
-                        number=issue.key,
-                        title=issue.fields.summary,
-                        source="jira",
-                        created_at=date_iso_8601_to_datetime(issue.fields.created),
-                        updated_at=updated_issue_date,
-                    )
-                    new_ottm_issues.append(
-                        ottm_issue
-                    )
-
-        self.session.add_all(new_ottm_issues)
-        self.session.commit()
-
-    def __get_existing_issue_id(self, issue_number) -> int:
-        
-        existing_issue_id = None
-        
-        existing_issue = self.session.query(Issue) \
-                    .filter(Issue.project_id == self.project_id) \
-                    .filter(Issue.number == issue_number) \
-                    .filter(Issue.source == "jira") \
-                    .first() 
-        
-        if existing_issue: 
-            existing_issue_id = existing_issue.issue_id
+                if fields.get("updated"):
+                    updated_issue_date = date_iso_8601_to_datetime(fields["updated"])
 
-        return existing_issue_id
+                yield (issue["key"], fields["summary"],
+                       date_iso_8601_to_datetime(fields["created"]), updated_issue_date)
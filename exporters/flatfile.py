@@ -3,9 +3,7 @@ import logging
 import os
 import pandas as pd
 
-from models.metric import Metric
-from models.version import Version
-from utils.database import get_included_and_current_versions_filter
+from utils.featurestore import load_version_metrics, VERSION_COLUMNS, METRIC_COLUMNS
 from utils.timeit import timeit
 
 class FlatFileExporter:
@@ -31,6 +29,12 @@ class FlatFileExporter:
         self.project_id = project_id
         self.configuration = config
 
+    def __load_version_metrics(self) -> pd.DataFrame:
+        """Versions with their metrics, all columns"""
+        columns = VERSION_COLUMNS + METRIC_COLUMNS
+        df = load_version_metrics(self.session, self.configuration, self.project_id, columns)
+        return df[df['has_metric']][columns].reset_index(drop=True)
+
     @timeit
     def export_to_csv(self, filename):
         """
@@ -43,16 +47,7 @@ class FlatFileExporter:
         """
         logging.info('export_to_csv')
 
-        excluded_versions = self.configuration.exclude_versions
-        included_and_current_versions = get_included_and_current_versions_filter(self.session, self.configuration)
-
-        metrics_statement = self.session.query(Version, Metric) \
-            .filter(Version.project_id == self.project_id) \
-            .filter(Version.include_filter(included_and_current_versions)) \
-            .filter(Version.exclude_filter(excluded_versions)) \
-            .join(Metric, Metric.version_id == Version.version_id).statement
-        logging.debug(metrics_statement)
-        df = pd.read_sql(metrics_statement, self.session.get_bind())
+        df = self.__load_version_metrics()
         df.to_csv(os.path.join(self.directory, filename))
         
     @timeit
@@ -67,15 +62,6 @@ class FlatFileExporter:
         """
         logging.info('export_to_parquet')
 
-        excluded_versions = self.configuration.exclude_versions
-        included_and_current_versions = get_included_and_current_versions_filter(self.session, self.configuration)
-
-        metrics_statement = self.session.query(Version, Metric) \
-            .filter(Version.project_id == self.project_id) \
-            .filter(Version.include_filter(included_and_current_versions)) \
-            .filter(Version.exclude_filter(excluded_versions)) \
-            .join(Metric, Metric.version_id == Version.version_id).statement
-        logging.debug(metrics_statement)
-        df = pd.read_sql(metrics_statement, self.session.get_bind())
+        df = self.__load_version_metrics()
         df.to_csv(os.path.join(self.directory, filename))
  
\ No newline at end of file
@@ -14,11 +14,20 @@ from models.metric import Metric
 from models.legacy import Legacy
 from models.file import File
 from models.version import Version
-from utils.database import get_included_and_current_versions_filter
+from utils.featurestore import load_version_metrics
 from utils.timeit import timeit
 from metrics.commits import compute_commit_msg_quality
 from metrics.versions import assess_next_release_risk
 from metrics.versions import compute_bugvelocity_last_30_days
+from ml.commitrisk import CommitRisk
+from ml.filerisk import FileRisk
+from utils.modelstore import get_current_model
+
+# Riskiest commits and files of the next release listed in the release report
+RISKY_COMMITS_COUNT = 10
+RISKY_FILES_COUNT = 10
+# Features of the largest contributions to the prediction shown in the release report
+CONTRIBUTIONS_COUNT = 10
 
 class HtmlExporter:
     """
@@ -70,21 +79,15 @@ class HtmlExporter:
         filename = os.path.join(self.directory, filename)
         template_path = os.path.join(os.path.dirname(os.path.realpath(__file__)), "templates/")
 
-        excluded_versions = self.configuration.exclude_versions
-        included_versions = self.configuration.include_versions
+        releases = load_version_metrics(self.session, self.configuration, project.project_id,
+                                        ['bugs', 'changes', 'avg_team_xp', 'code_churn_avg', 'lizard_avg_complexity'])
+        releases = releases[releases['has_metric'] & (releases['name'] != self.configuration.next_version_name)] \
+                .sort_values('end_date', ascending=False)
 
-        releases = self.session.query(Version, Metric) \
-                .join(Metric, Version.version_id == Metric.version_id) \
-                .order_by(Version.end_date.desc()) \
-                .filter(Version.project_id == project.project_id) \
-                .filter(Version.name != self.configuration.next_version_name) \
-                .filter(Version.include_filter(included_versions)) \
-                .filter(Version.exclude_filter(excluded_versions)).all()
-
-        tags = [row.Version.tag for row in releases[0:3]]
-        bugs = [row.Version.bugs for row in releases[0:3]]
-        changes = [row.Version.changes for row in releases[0:3]]
-        avg_team_xp = [row.Version.avg_team_xp for row in releases[0:3]]
+        tags = releases['tag'][0:3].tolist()
+        bugs = releases['bugs'][0:3].tolist()
+        changes = releases['changes'][0:3].tolist()
+        avg_team_xp = releases['avg_team_xp'][0:3].tolist()
 
         # # Append the graphs about the last three releases
         fig = px.bar(x=tags, y=bugs)
@@ -107,17 +110,46 @@ class HtmlExporter:
                 .filter(Legacy.version_id == current_release.Version.version_id) \
                 .all()
 
-        bugs_median = np.median([row.Version.bugs for row in releases])
-        changes_median = np.median([row.Version.changes for row in releases])
-        xp_devs_median = np.median([row.Version.avg_team_xp for row in releases])
-        lizard_avg_complexity_median = np.median([row.Metric.lizard_avg_complexity for row in releases])
-        code_churn_avg_median = np.median([row.Version.code_churn_avg for row in releases])
+        bugs_median = np.median(releases['bugs'])
+        changes_median = np.median(releases['changes'])
+        xp_devs_median = np.median(releases['avg_team_xp'])
+        lizard_avg_complexity_median = np.median(releases['lizard_avg_complexity'])
+        code_churn_avg_median = np.median(releases['code_churn_avg'])
 
         predicted_bugs = -1
         predicted_bugs = self.__model.predict()
 
+        # Contributions of the features to the prediction of the next release
+        fig_contributions_html = None
+        explanations = self.__model.explain()
+        if explanations is not None:
+            next_release = explanations[explanations['name'] == self.configuration.next_version_name]
+            if not next_release.empty:
+                explanation = next_release.iloc[0]
+                contributions = explanation[self.__model.features].astype(float)
+                contributions = contributions[contributions.abs().sort_values().index[-CONTRIBUTIONS_COUNT:]]
+                fig = go.Figure(go.Bar(
+                    x = contributions.to_numpy(),
+                    y = contributions.index,
+                    orientation = 'h',
+                    marker_color = np.where(contributions > 0, 'indianred', 'seagreen')
+                ))
+                fig.update_layout(title = f"Prediction {explanation['prediction']:.1f} = "
+                                          f"base value {explanation['bias']:.1f} + contributions")
+                fig_contributions_html = fig.to_html(full_html=False, include_plotlyjs=False)
+
         risk = assess_next_release_risk(self.session, self.configuration, project.project_id)
 
+        risky_commits = None
+        if get_current_model(self.session, project.project_id, "commitrisk") is not None:
+            risky_commits = CommitRisk(project.project_id, self.session, self.configuration) \
+                .score_commits().head(RISKY_COMMITS_COUNT).to_dict('records')
+
+        risky_files = None
+        if get_current_model(self.session, project.project_id, "filerisk") is not None:
+            risky_files = FileRisk(project.project_id, self.session, self.configuration) \
+                .score_files().head(RISKY_FILES_COUNT).to_dict('records')
+
         fig = go.Figure(go.Indicator(
             mode = "gauge+number+delta",
             value = risk['score'],
@@ -139,10 +171,13 @@ class HtmlExporter:
             "lizard_avg_complexity_median" : lizard_avg_complexity_median,
             "predicted_bugs" : predicted_bugs,
             "legacy_files": legacy_files,
+            "risky_commits": risky_commits,
+            "risky_files": risky_files,
             "graph_bugs": fig1_html,
             "graph_changes": fig2_html,
             "graph_xp": fig3_html,
-            "graph_risk": fig_risk_html
+            "graph_risk": fig_risk_html,
+            "graph_contributions": fig_contributions_html
         }
 
         # Render the template and save the output
@@ -169,16 +204,9 @@ class HtmlExporter:
         filename = os.path.join(self.directory, filename)
         template_path = os.path.join(os.path.dirname(os.path.realpath(__file__)), "templates/")
 
-        excluded_versions = self.configuration.exclude_versions
-        included_and_current_versions = get_included_and_current_versions_filter(self.session, self.configuration)
-
-        code_churn_statement = self.session.query(Version.start_date, Version.code_churn_count, Version.code_churn_max, Version.code_churn_avg) \
-                .order_by(Version.end_date.desc()) \
-                .filter(Version.project_id == project.project_id) \
-                .filter(Version.include_filter(included_and_current_versions)) \
-                .filter(Version.exclude_filter(excluded_versions)) \
-                .statement
-        df = pd.read_sql(code_churn_statement, self.session.get_bind())
+        columns = ['start_date', 'code_churn_count', 'code_churn_max', 'code_churn_avg']
+        df = load_version_metrics(self.session, self.configuration, project.project_id, columns)
+        df = df.sort_values('end_date', ascending=False)[columns].reset_index(drop=True)
 
         # # Append the graphs about the last three releases
         fig = px.line(df, x="start_date", y=df.columns,
@@ -236,16 +264,9 @@ class HtmlExporter:
         fig2_html = fig.to_html(full_html=False, include_plotlyjs=False)
 
         # Generate a graph about Bug velocity during the project lifespan
-        excluded_versions = self.configuration.exclude_versions
-        included_and_current_versions = get_included_and_current_versions_filter(self.session, self.configuration)
-
-        bugvelocity_statement = self.session.query(Version.start_date, Version.bug_velocity) \
-                .order_by(Version.end_date.desc()) \
-                .filter(Version.project_id == project.project_id) \
-                .filter(Version.include_filter(included_and_current_versions)) \
-                .filter(Version.exclude_filter(excluded_versions)) \
-                .statement
-        df = pd.read_sql(bugvelocity_statement, self.session.get_bind())
+        columns = ['start_date', 'bug_velocity']
+        df = load_version_metrics(self.session, self.configuration, project.project_id, columns)
+        df = df.sort_values('end_date', ascending=False)[columns].reset_index(drop=True)
 
         fig = px.line(df, x="start_date", y=df.columns,
                     hover_data={"start_date": "|%B %d, %Y"},
@@ -2,12 +2,6 @@ from distutils.version import Version
 import logging
 import os
 import pandas as pd
-from kneed import KneeLocator
-from sklearn.datasets import make_blobs
-from sklearn.cluster import KMeans
-from sklearn.metrics import silhouette_score
-from sklearn.preprocessing import StandardScaler
-from kneed import KneeLocator
 import plotly.express as px
 import plotly.graph_objects as go
 import jinja2
@@ -18,7 +12,8 @@ from models.project import Project
 from models.metric import Metric
 from models.model import Model
 from models.version import Version
-from utils.database import get_included_and_current_versions_filter
+from ml.kmeans import cluster_releases
+from utils.featurestore import load_version_metrics
 from utils.timeit import timeit
 
 class MlHtmlExporter:
@@ -68,65 +63,17 @@ class MlHtmlExporter:
         filename = os.path.join(self.directory, filename)
         template_path = os.path.join(os.path.dirname(os.path.realpath(__file__)), "templates/")
 
-        excluded_versions = self.configuration.exclude_versions
-        included_and_current_versions = get_included_and_current_versions_filter(self.session, self.configuration)
-
-        releases_statement = self.session.query(
-                Version.tag,
-                Version.name,
-                Version.bugs,
-                Version.avg_team_xp,
-                Version.changes,
-                Version.bug_velocity,
-                Version.code_churn_avg,
-                Metric.lizard_avg_complexity) \
-                .order_by(Version.end_date.desc()) \
-                .join(Metric, Version.version_id == Metric.version_id) \
-                .filter(Version.project_id == project.project_id) \
-                .filter(Version.include_filter(included_and_current_versions)) \
-                .filter(Version.exclude_filter(excluded_versions)) \
-                .statement
-        logging.debug(releases_statement)
-        df = pd.read_sql(releases_statement, self.session.get_bind())
+        columns = ['tag', 'name', 'bugs', 'avg_team_xp', 'changes', 'bug_velocity', 'code_churn_avg', 'lizard_avg_complexity']
+        df = load_version_metrics(self.session, self.configuration, project.project_id, columns)
+        df = df[df['has_metric']].sort_values('end_date', ascending=False)
+        df = df[columns].reset_index(drop=True)
         df['bug_velocity'].round(decimals = 2)
         df_tr = df[['avg_team_xp', 'changes', 'bug_velocity', 'code_churn_avg', 'lizard_avg_complexity']]
 
-        scaler = StandardScaler()
-        scaled_features = scaler.fit_transform(df_tr.values)
-
-        # Try to determine the number of clusters
-        kmeans_kwargs = {
-            "init": "random",
-            "n_init": 10,
-            "max_iter": 300,
-            "random_state": 42,
-        }
-        sse = []
-        for k in range(1, 11):
-            kmeans = KMeans(n_clusters=k, **kmeans_kwargs)
-            kmeans.fit(scaled_features)
-            sse.append(kmeans.inertia_)
-        kl = KneeLocator(
-            range(1, 11), sse, curve="convex", direction="decreasing"
-        )
-        clusters = kl.elbow
-        logging.info('The number of clusters: ' + str(clusters))
-
-        # Find the clusters
-        kmeans = KMeans(
-            init="random",
-            n_clusters=clusters,
-            n_init=10,
-            max_iter=300,
-            random_state=42
-        )
-        kmeans.fit(scaled_features)
-        logging.info('The lowest SSE value: ' + str(kmeans.inertia_))
-        logging.info('Final locations of the centroid: ' + str(kmeans.cluster_centers_))
-        logging.info('The number of iterations required to converge: ' + str(kmeans.n_iter_))
+        clustering = cluster_releases(df_tr, self.configuration, project.project_id)
 
         # Glue back to originaal data
-        df['cluster'] = kmeans.labels_
+        df['cluster'] = clustering['labels']
 
         # Locate the next release as we will mark it in the graphs
         next_release_trace = df.loc[df['name'] == self.configuration.next_version_name]
@@ -6,6 +6,7 @@ from os.path import exists
 import pandas as pd
 import click
 
+from metrics.rollups import rebuild_daily_rollups, update_daily_issue_counts
 from metrics.versions import compute_version_metrics
 from models.version import Version
 from models.issue import Issue
@@ -76,7 +77,9 @@ class FlatFileImporter:
                 # Import Issue
                 if str(self.target_table).capitalize() == "Issue":
                     # Overwrite option
+                    overwritten_projects = []
                     if self.overwrite:
+                        overwritten_projects = [project_id for project_id, in self.session.query(Issue.project_id).distinct()]
                         self.session.query(Issue).delete()
                         click.echo('Overwrite Issue table')
 
@@ -98,6 +101,18 @@ class FlatFileImporter:
                             logging.error("CSV file no contain minimal mandatory fields")
                             sys.exit('CSV file no contain minimal mandatory fields')  
 
+                    # Update the daily issue counts, from scratch for the projects whose issues were overwritten
+                    self.session.flush()
+                    imported_dates = {}
+                    for issue in csv_data:
+                        imported_dates.setdefault(issue['project_id'], []) \
+                            .append(datetime.strptime(issue["created_at"], '%Y-%m-%d %H:%M:%S.%f'))
+                    for project_id in set(overwritten_projects) | set(imported_dates):
+                        if project_id in overwritten_projects:
+                            rebuild_daily_rollups(self.session, project_id)
+                        else:
+                            update_daily_issue_counts(self.session, project_id, imported_dates[project_id])
+
                 self.session.commit()
             else:
                 logging.error('File not found')
@@ -9,7 +9,6 @@ import tempfile
 from xmlrpc.client import boolean
 
 import click
-import sqlalchemy as db
 from sqlalchemy.exc import ArgumentError
 from dependency_injector.wiring import Provide, inject
 from dotenv import load_dotenv
@@ -26,10 +25,18 @@ from models.metric import Metric
 from models.model import Model
 from models.database import setup_database
 from connectors.git import GitConnector
+from ml.backtest import backtest as backtest_model, get_backtest_summary
+from ml.ml import UP_TO_DATE, VersionModel
 from utils.mlfactory import MlFactory
-from utils.database import get_included_and_current_versions_filter
+from utils.database import get_included_and_current_versions_filter, create_database_engine
 from utils.dirs import TmpDirCopyFilteredWithEnv
 from utils.gitfactory import GitConnectorFactory
+from utils.featurestore import load_version_metrics
+from metrics.files import has_file_metrics, save_file_metrics
+from utils.httpcache import get_http_cache
+from utils.ingestion import ingest
+from utils.service import PredictionService, create_server
+from utils.transport import get_transport_summary
 
 def lint_aliases(raw_aliases) -> boolean:
     try:
@@ -177,7 +184,21 @@ def train(ctx, model_name, ml_factory_provider = Provide[Container.ml_factory_pr
     MlFactory.create_training_ml_model(model_name)
     model = ml_factory_provider(project.project_id)
     model.train()
-    click.echo("Model was trained")
+    click.echo(f"Model was trained: MSE {model.mse}, training time {model.training_time:.2f}s")
+
+@cli.command()
+@click.option('--model-name', default='bugvelocity', help='Name of the model')
+@click.pass_context
+@inject
+def update(ctx, model_name, ml_factory_provider = Provide[Container.ml_factory_provider.provider]):
+    """Update a trained model with the versions released since its training"""
+    MlFactory.create_training_ml_model(model_name)
+    model = ml_factory_provider(project.project_id)
+    outcome = model.update()
+    if outcome == UP_TO_DATE:
+        click.echo("Model is up to date")
+    else:
+        click.echo(f"Model was {outcome}: MSE {model.mse}, training time {model.training_time:.2f}s")
 
 @cli.command()
 @click.option('--model-name', default='bugvelocity', help='Name of the model')
@@ -190,6 +211,56 @@ def predict(ctx, model_name, ml_factory_provider = Provide[Container.ml_factory_
     value = model.predict()
     click.echo("Predicted value : " + str(value))
 
+@cli.command()
+@click.option('--model-name', default='bugvelocity', help='Name of the model')
+@click.option('--output', default='.', help='Destination folder', envvar="OTTM_OUTPUT_FOLDER")
+@click.option('--min-versions', default=5, type=int, help='Number of versions the first prediction is trained on')
+@click.pass_context
+@inject
+def backtest(ctx, model_name, output, min_versions,
+             configuration = Provide[Container.configuration],
+             session = Provide[Container.session],
+             ml_factory_provider = Provide[Container.ml_factory_provider.provider]):
+    """Predict each past version with a model trained on the versions before it"""
+    MlFactory.create_training_ml_model(model_name)
+    model = ml_factory_provider(project.project_id)
+    if not isinstance(model, VersionModel):
+        raise click.BadParameter(f"The model {model_name} doesn't predict versions, it can't be backtested",
+                                 param_hint="--model-name")
+    df = load_version_metrics(session, configuration, project.project_id, model.columns)
+    result = backtest_model(model, df, min_versions, configuration.training_jobs)
+    os.makedirs(output, exist_ok=True)
+    path = os.path.join(output, f"backtest_{model_name}.csv")
+    result.to_csv(path, index=False)
+    click.echo(get_backtest_summary(result))
+    logging.info(f"Created backtest {path}")
+
+@cli.command()
+@click.option('--host', default='127.0.0.1', help='Address the service listens on')
+@click.option('--port', default=8000, type=int, help='Port the service listens on')
+@click.option('--socket', 'socket_path', default=None, help='Unix socket the service listens on, instead of host:port')
+@click.option('--output', default='.', help='Folder where the reports are rendered', envvar="OTTM_OUTPUT_FOLDER")
+@click.pass_context
+@inject
+def serve(ctx, host, port, socket_path, output,
+          configuration = Provide[Container.configuration],
+          session = Provide[Container.session],
+          ml_factory_provider = Provide[Container.ml_factory_provider.provider],
+          html_exporter_provider = Provide[Container.html_exporter_provider.provider],
+          ml_html_exporter_provider = Provide[Container.ml_html_exporter_provider.provider]):
+    """Serve predictions, risk score and reports from warm models and metrics"""
+    os.makedirs(output, exist_ok=True)
+    service = PredictionService(session, configuration, project, ml_factory_provider,
+                                html_exporter_provider, ml_html_exporter_provider, output)
+    server = create_server(service, host, port, socket_path)
+    click.echo(f"Serving on {socket_path or f'http://{host}:{port}'}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
 @cli.command()
 @click.pass_context
 @inject
@@ -209,7 +280,7 @@ def info(ctx, configuration = Provide[Container.configuration], session = Provid
     total_versions_count = session.query(Version).filter(Version.project_id == project.project_id).count()
     issues_count = session.query(Issue).filter(Issue.project_id == project.project_id).count()
     metrics_count = session.query(Metric).join(Version).filter(Version.project_id == project.project_id).count()
-    trained_models = session.query(Model.name).filter(Model.project_id == project.project_id).all()
+    trained_models = session.query(Model.name).filter(Model.project_id == project.project_id).distinct().all()
     trained_models = [r for r, in trained_models]
 
     out = """ -- OTTM Bug Predictor --
@@ -276,16 +347,21 @@ def populate(ctx, skip_versions,
 
     git = instanciate_git_connector(configuration, git_factory_provider, tmp_dir, repo_dir)
 
+    issue_connectors = {}
     for source_bugs in configuration.source_bugs:
         if source_bugs.strip() == 'jira':
             # Populate issue table in database with Jira issues
             jira: JiraConnector = jira_connector_provider(project.project_id)
-            jira.create_issues()
+            issue_connectors['jira'] = jira
         elif source_bugs.strip() == 'git':
-            git.create_issues()
+            issue_connectors['git'] = git
             # if we use code maat git.setup_aliases(configuration.author_alias)
-    
-    git.populate_db(skip_versions)
+
+    if skip_versions:
+        logging.info("Skipping version populate")
+    # Fetch the issues of all the sources and the releases concurrently
+    ingest(session, project.project_id, issue_connectors, None if skip_versions else git)
+    git.populate_commits()
 
     # List the versions and checkout each one of them
     versions = session.query(Version).filter(Version.project_id == project.project_id).all()
@@ -312,13 +388,38 @@ def populate(ctx, skip_versions,
             # Get statistics with lizard
             lizard = file_analyzer_provider(directory=tmp_work_dir, version=version)
             lizard.analyze_source_code()
+            if not has_file_metrics(session, version.version_id):
+                save_file_metrics(session, configuration, repo_dir, project.project_id, version,
+                                  lizard.get_file_values())
 
             # Get metrics with JPeek
             # jp = jpeek_connector_provider(directory=tmp_work_dir, version=version)
             # jp.analyze_source_code()
 
+    for source_summary in get_transport_summary():
+        click.echo(source_summary)
+    http_cache = get_http_cache(configuration)
+    if http_cache is not None:
+        click.echo(http_cache.get_summary())
+
     
 
+@cli.command()
+@click.option('--workers', default=None, type=int, help='Number of processes (default: number of CPUs)')
+@click.option('--chunk-size', default=100, help='Number of commits sent to a process at once')
+@click.pass_context
+@inject
+def dmm(ctx, workers, chunk_size,
+        configuration = Provide[Container.configuration],
+        git_factory_provider = Provide[Container.git_factory_provider.provider]):
+    """Compute the DMM metrics of the commits synced by populate"""
+    tmp_dir = tempfile.mkdtemp()
+    logging.info('created temporary directory: ' + tmp_dir)
+    repo_dir = os.path.join(tmp_dir, configuration.source_project)
+
+    git = instanciate_git_connector(configuration, git_factory_provider, tmp_dir, repo_dir)
+    git.compute_dmm_metrics(workers, chunk_size)
+
 @click.command()
 @inject
 def main():
@@ -331,7 +432,7 @@ def configure_logging(config = Provide[Container.configuration]) -> None:
 @inject
 def configure_session(container: Container, config = Provide[Container.configuration]) -> None:
     try:
-        engine = db.create_engine(config.target_database)
+        engine = create_database_engine(config)
     except ArgumentError as e:
         raise ConfigurationValidationException(f"Error from sqlalchemy : {str(e)}")
     
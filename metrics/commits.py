@@ -1,10 +1,99 @@
+import re
+from typing import Dict, List, Optional
+
+import numpy as np
 import pandas as pd
 
 from models.version import Version
 from models.commit import Commit
 from utils.timeit import timeit
 
+# Categories of commit messages, a message gets the first matching one
+EMPTY, INSIGNIFICANT, ONE_WORD, VALID = range(4)
+
+def get_insignificant_words_regex(words: List[str]) -> Optional[re.Pattern]:
+    """Compile the insignificant words into a single alternation, None if there are no words"""
+    if not words:
+        return None
+    return re.compile("|".join(re.escape(word) for word in dict.fromkeys(word.lower() for word in words)))
+
+def classify_commit_messages(messages: pd.Series, words: List[str]) -> np.ndarray:
+    """
+    Classify commit messages as EMPTY, INSIGNIFICANT (containing an insignificant word),
+    ONE_WORD or VALID with vectorized string operations
+    """
+    messages = messages.fillna("")
+    words_count = messages.str.count(r"\S+").to_numpy()
+    insignificant_regex = get_insignificant_words_regex(words)
+    if insignificant_regex is None:
+        insignificant = np.zeros(len(messages), dtype=bool)
+    else:
+        insignificant = messages.str.lower().str.contains(insignificant_regex).to_numpy(dtype=bool)
+
+    return np.select([words_count == 0, insignificant, words_count == 1],
+                     [EMPTY, INSIGNIFICANT, ONE_WORD], default=VALID)
+
+def get_frequent_messages(messages: pd.Series) -> pd.DataFrame:
+    df = messages.value_counts().reset_index()
+    df.columns = ['Message', 'Frequency']
+    return df[df['Frequency'] > 1]
+
 @timeit
+def compute_commits_msg_quality(session, config, project_id: int, versions: List[Version]) -> Dict[int, dict]:
+    """
+    Compute the message quality of several versions of a project
+
+    The commit messages of all the versions are loaded in a single query and classified once,
+    the commits of each version are then a slice of the commits sorted by date.
+
+    Parameters:
+    -----------
+    - session : Session
+        SQLAlchemy session
+    - config : Configuration
+        Insignificant commit messages (OTTM_COMMIT_BAD_MSG)
+    - project_id : int
+        Project Identifier
+    - versions : List[Version]
+        Versions of the project
+
+    Return a dictionary of values (see compute_commit_msg_quality) per version_id
+    """
+    if not versions:
+        return {}
+
+    commits = session.query(Commit.date, Commit.message) \
+        .filter(Commit.project_id == project_id) \
+        .filter(Commit.date.between(min(version.start_date for version in versions),
+                                    max(version.end_date for version in versions))) \
+        .order_by(Commit.date).all()
+    df = pd.DataFrame(commits, columns=['date', 'message'])
+    dates = pd.to_datetime(df['date']).to_numpy()
+
+    categories = classify_commit_messages(df['message'], config.insignificant_commits_message)
+    # Number of commits of each category before each commit
+    cumulated = np.zeros((len(df) + 1, 4), dtype=int)
+    cumulated[1:] = np.cumsum(np.eye(4, dtype=int)[categories], axis=0)
+
+    values = dict()
+    for version in versions:
+        first = np.searchsorted(dates, np.datetime64(version.start_date), side='left')
+        last = np.searchsorted(dates, np.datetime64(version.end_date), side='right')
+        nb_commits = max(last - first, 0)
+        counts = cumulated[last] - cumulated[first] if nb_commits > 0 else np.zeros(4, dtype=int)
+
+        value = dict()
+        value["nb_commits"] = int(nb_commits)
+        value["valid_commits"] = int(counts[VALID])
+        value["valid_commits_ratio"] = counts[VALID] / nb_commits if nb_commits > 0 else 0
+        value["empty_commits_ratio"] = counts[EMPTY] / nb_commits if nb_commits > 0 else 0
+        value["one_word_commits_ratio"] = counts[ONE_WORD] / nb_commits if nb_commits > 0 else 0
+        value["insignificant_commits_ratio"] = counts[INSIGNIFICANT] / nb_commits if nb_commits > 0 else 0
+        value["frequent_messages"] = get_frequent_messages(df['message'][first:last]) if nb_commits > 0 else 0
+        values[version.version_id] = value
+
+    return values
+
 def compute_commit_msg_quality(version:Version, session, config):
     """
     Compute the message quality for a given version
@@ -21,48 +110,4 @@ def compute_commit_msg_quality(version:Version, session, config):
             0      br          3
             1    link          2
     """
-    configuration = config
-    project_id = version.project_id
-    commits = session.query(Commit.message).filter(Commit.date.between(version.start_date, version.end_date)) \
-        .filter(Commit.project_id == project_id).all()
-
-    # Get statistics on malformed commit messages
-    empty_commits_nb = 0
-    one_word_commits_nb = 0
-    insignificant_commits_nb = 0
-    valid_commits_nb = 0
-    # Prepare a list of bad commit messages to be removed
-    words = [word.lower() for word in configuration.insignificant_commits_messages]
-
-    for commit in commits:
-        message = commit.message.lower()
-        if commit.message is None or len(commit.message.split()) == 0:
-            empty_commits_nb += 1
-        elif message is not None and any(elem in message for elem in words):
-            insignificant_commits_nb += 1
-        elif len(commit.message.split()) == 1:
-            one_word_commits_nb += 1
-        else:
-            valid_commits_nb += 1
-
-    # Get most frequent messages
-    commits_statement =  session.query(Commit.message).filter(Commit.date.between(version.start_date, version.end_date)) \
-        .filter(Commit.project_id == project_id).statement
-    df = pd.read_sql(commits_statement, session.get_bind())
-    df = df.value_counts() \
-            .reset_index() \
-            .sort_index() \
-            .reset_index(drop=True)
-    df.columns = ['Message', 'Frequency']
-    df = df[df['Frequency'] > 1]
-
-    value = dict()
-    value["nb_commits"] = len(commits)
-    value["valid_commits"] = valid_commits_nb if len(commits) > 0 else 0
-    value["valid_commits_ratio"] = valid_commits_nb / len(commits)if len(commits) > 0 else 0
-    value["empty_commits_ratio"] = empty_commits_nb / len(commits)if len(commits) > 0 else 0
-    value["one_word_commits_ratio"] = one_word_commits_nb / len(commits)if len(commits) > 0 else 0
-    value["insignificant_commits_ratio"] = insignificant_commits_nb / len(commits)if len(commits) > 0 else 0
-    value["frequent_messages"] = df if len(commits) > 0 else 0
-
-    return value
+    return compute_commits_msg_quality(session, config, version.project_id, [version])[version.version_id]
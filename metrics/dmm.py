@@ -0,0 +1,89 @@
+import logging
+from concurrent.futures import as_completed
+from typing import List, Tuple
+
+from git import BadName, GitError
+from sqlalchemy import bindparam, delete, update
+
+from models.commit import Commit
+from models.dmmbacklog import DmmBacklog
+from utils.timeit import timeit
+import utils.gitpool as gitpool
+
+
+def compute_dmm_chunk(hashes: List[str]) -> Tuple[List[Tuple[str, float, float, float]], List[str]]:
+    """
+    Compute the DMM metrics of a chunk of commits, in a worker process
+
+    Return the metrics of the commits, and the hashes not found in the repository
+    (e.g. commits lost by a force-push)
+    """
+    values = []
+    missing_hashes = []
+    for commit_hash in hashes:
+        try:
+            git_commit = gitpool.worker_git.get_commit(commit_hash)
+            values.append((commit_hash,
+                           git_commit.dmm_unit_size,
+                           git_commit.dmm_unit_complexity,
+                           git_commit.dmm_unit_interfacing))
+        except (ValueError, BadName, GitError):
+            missing_hashes.append(commit_hash)
+    return values, missing_hashes
+
+@timeit
+def compute_dmm_metrics(session, repo_dir:str, project_id:int, workers:int=None, chunk_size:int=100):
+    """
+    Compute the DMM metrics of the commits waiting in the backlog
+
+    The backlog is split into chunks of commit hashes that are processed by a pool
+    of processes. Each chunk is saved and removed from the backlog as soon as it is done,
+    so that an interrupted computation resumes where it stopped. The commits missing from
+    the repository are removed from the backlog without metrics.
+
+    Parameters:
+    -----------
+    - session : Session
+        SQLAlchemy session
+    - repo_dir : str
+        Local folder where the repository was clones
+    - project_id : int
+        Project Identifier
+    - workers : int
+        Number of processes (defaults to the number of CPUs)
+    - chunk_size : int
+        Number of commits sent to a process at once
+    """
+    logging.info("compute_dmm_metrics")
+
+    hashes = [commit_hash for commit_hash, in session.query(DmmBacklog.hash) \
+        .filter(DmmBacklog.project_id == project_id) \
+        .order_by(DmmBacklog.dmm_backlog_id.asc()).all()]
+    logging.info(f"{len(hashes)} commit(s) waiting for DMM metrics")
+
+    chunks = [hashes[i:i + chunk_size] for i in range(0, len(hashes), chunk_size)]
+    update_statement = update(Commit) \
+        .where(Commit.project_id == project_id) \
+        .where(Commit.hash == bindparam("b_hash")) \
+        .values(dmm_unit_size=bindparam("b_size"),
+                dmm_unit_complexity=bindparam("b_complexity"),
+                dmm_unit_interfacing=bindparam("b_interfacing"))
+
+    with gitpool.git_process_pool(repo_dir, workers) as executor:
+        futures = [executor.submit(compute_dmm_chunk, chunk) for chunk in chunks]
+        for done, future in enumerate(as_completed(futures), start=1):
+            values, missing_hashes = future.result()
+            if missing_hashes:
+                logging.warning(f"Commit(s) not found in the repository, no DMM metrics: {', '.join(missing_hashes)}")
+            if values:
+                session.execute(update_statement, [
+                    {"b_hash": commit_hash, "b_size": size, "b_complexity": complexity, "b_interfacing": interfacing}
+                    for commit_hash, size, complexity, interfacing in values
+                ])
+            session.execute(
+                delete(DmmBacklog) \
+                    .where(DmmBacklog.project_id == project_id) \
+                    .where(DmmBacklog.hash.in_([commit_hash for commit_hash, *_ in values] + missing_hashes))
+            )
+            session.commit()
+            logging.info(f"DMM metrics computed for chunk {done}/{len(chunks)}")
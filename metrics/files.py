@@ -0,0 +1,82 @@
+import logging
+
+import pandas as pd
+from sqlalchemy import insert
+
+from connectors.gitlog import GitLogConnector
+from models.commit import Commit
+from models.filemetric import FileMetric
+from models.legacy import Legacy
+from models.version import Version
+from utils.database import save_files_if_not_found
+from utils.timeit import timeit
+
+FILE_CHANGES_COLUMNS = ["hash", "committer", "path", "added", "deleted"]
+FILE_METRICS_BATCH_SIZE = 5000
+
+def has_file_metrics(session, version_id: int) -> bool:
+    return session.query(FileMetric.file_metric_id).filter(FileMetric.version_id == version_id).first() is not None
+
+def aggregate_file_changes(changes: pd.DataFrame, fix_hashes) -> pd.DataFrame:
+    """
+    Aggregate the changes of the files (one row per commit and file) into their churn, commits,
+    authors, ownership (share of the commits made by the main committer) and number of bug fixes
+    """
+    if changes.empty:
+        return pd.DataFrame(columns=["path", "added", "deleted", "commits", "authors", "ownership", "fixes"])
+    per_file = changes.groupby("path")
+    df = per_file.agg(added=("added", "sum"), deleted=("deleted", "sum"),
+                      commits=("hash", "nunique"), authors=("committer", "nunique"))
+    main_committer_commits = changes.groupby(["path", "committer"])["hash"].nunique().groupby(level=0).max()
+    df["ownership"] = main_committer_commits / df["commits"]
+    df["fixes"] = changes[changes["hash"].isin(set(fix_hashes))].groupby("path")["hash"].nunique()
+    df["fixes"] = df["fixes"].fillna(0).astype(int)
+    return df.reset_index()
+
+@timeit
+def save_file_metrics(session, configuration, repo_dir: str, project_id: int, version: Version,
+                      lizard_files: pd.DataFrame) -> None:
+    """
+    Save the metrics of each file of a version: its lizard values, its churn, commits, authors,
+    ownership and bug fixes during the version, and whether it is a legacy file
+
+    Parameters:
+    -----------
+    - session : Session
+        SQLAlchemy session
+    - configuration : Configuration
+        Path to the git executable
+    - repo_dir : str
+        Local folder where the repository was cloned, with the version checked out
+    - project_id : int
+        Project Identifier
+    - version : Version
+        Version of the files
+    - lizard_files : DataFrame
+        Lizard values per file (see FileAnalyzer.get_file_values)
+    """
+    logging.info(f"Saving the metrics of {len(lizard_files)} file(s) of version {version.name}")
+
+    changes = pd.DataFrame(GitLogConnector(repo_dir, configuration).get_file_changes(version.start_date,
+                                                                                     version.end_date),
+                           columns=FILE_CHANGES_COLUMNS)
+    fix_hashes = [commit_hash for commit_hash, in session.query(Commit.hash) \
+                      .filter(Commit.project_id == project_id) \
+                      .filter(Commit.date.between(version.start_date, version.end_date)) \
+                      .filter(Commit.fix.is_(True))]
+    df = lizard_files.merge(aggregate_file_changes(changes, fix_hashes), on="path", how="left")
+    df[["added", "deleted", "commits", "authors", "fixes"]] = \
+        df[["added", "deleted", "commits", "authors", "fixes"]].fillna(0).astype(int)
+
+    file_ids = save_files_if_not_found(session, df["path"].tolist())
+    df["file_id"] = df["path"].map(file_ids)
+    legacy_file_ids = {file_id for file_id, in session.query(Legacy.file_id).filter(Legacy.version_id == version.version_id)}
+    df["legacy"] = df["file_id"].isin(legacy_file_ids)
+    df["version_id"] = version.version_id
+
+    session.query(FileMetric).filter(FileMetric.version_id == version.version_id).delete()
+    df = df.drop(columns="path").astype(object)
+    rows = df.where(df.notna(), None).to_dict("records")
+    for i in range(0, len(rows), FILE_METRICS_BATCH_SIZE):
+        session.execute(insert(FileMetric), rows[i:i + FILE_METRICS_BATCH_SIZE])
+    session.commit()
@@ -0,0 +1,116 @@
+import logging
+from typing import Iterable, List, Set
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import bindparam, update
+
+from models.commit import Commit
+from models.issue import Issue
+from utils.timeit import timeit
+import utils.gitpool as gitpool
+
+# References to an issue in a commit message: "#123" (GitHub, GitLab) or "PROJ-123" (Jira)
+ISSUE_REFERENCE_REGEX = r"#(?P<number>\d+)\b|\b(?P<key>[A-Z][A-Z0-9]+-\d+)\b"
+LABELS_QUERY_SIZE = 500
+
+def find_fix_commits(messages: pd.Series, issue_numbers: Iterable[str]) -> np.ndarray:
+    """
+    Find the commits fixing a bug, i.e. whose message references one of the bug issues,
+    with vectorized string operations
+
+    Return a boolean array, True for the fix commits
+    """
+    references = messages.fillna("").reset_index(drop=True).str.extractall(ISSUE_REFERENCE_REGEX)
+    if references.empty:
+        return np.zeros(len(messages), dtype=bool)
+    references = references["number"].fillna(references["key"])
+    fixes = references[references.isin(set(str(number) for number in issue_numbers))]
+    is_fix = np.zeros(len(messages), dtype=bool)
+    is_fix[fixes.index.get_level_values(0).unique()] = True
+    return is_fix
+
+def blame_fix_commits_chunk(hashes: List[str]) -> Set[str]:
+    """
+    Find the commits that last changed the lines modified by a chunk of fix commits (SZZ),
+    in a worker process
+    """
+    fix_inducing_hashes = set()
+    for commit_hash in hashes:
+        git_commit = gitpool.worker_git.get_commit(commit_hash)
+        for blamed_hashes in gitpool.worker_git.get_commits_last_modified_lines(git_commit).values():
+            fix_inducing_hashes.update(blamed_hashes)
+    return fix_inducing_hashes
+
+@timeit
+def label_fix_inducing_commits(session, repo_dir: str, project_id: int, workers: int = None,
+                               chunk_size: int = 20) -> None:
+    """
+    Label the commits that were not labeled yet: a commit is a fix when its message references
+    a bug issue of the project, and the commits that last changed the lines modified by a fix
+    are labeled as fix-inducing (SZZ algorithm)
+
+    The commits labeled as not fixing are checked again, as the issues they reference may
+    have been synced since (e.g. an issue created or tagged as a bug after the commit)
+
+    Parameters:
+    -----------
+    - session : Session
+        SQLAlchemy session
+    - repo_dir : str
+        Local folder where the repository was clones
+    - project_id : int
+        Project Identifier
+    - workers : int
+        Number of processes blaming the fix commits (defaults to the number of CPUs)
+    - chunk_size : int
+        Number of fix commits sent to a process at once
+    """
+    logging.info("label_fix_inducing_commits")
+
+    df = pd.DataFrame(session.query(Commit.commit_id, Commit.hash, Commit.message, Commit.fix) \
+                          .filter(Commit.project_id == project_id) \
+                          .filter(Commit.fix.isnot(True)) \
+                          .order_by(Commit.date).all(),
+                      columns=["commit_id", "hash", "message", "labeled_fix"])
+    unlabeled = df["labeled_fix"].isna().to_numpy(dtype=bool)
+    issue_numbers = [number for number, in session.query(Issue.number).filter(Issue.project_id == project_id)]
+    df["fix"] = find_fix_commits(df["message"], issue_numbers)
+    # Commits labeled before their issue was synced
+    relabeled = df["fix"].to_numpy(dtype=bool) & ~unlabeled
+    if not unlabeled.any() and not relabeled.any():
+        logging.info("All the commits are labeled")
+        return
+    fix_hashes = df.loc[df["fix"], "hash"].tolist()
+    logging.info(f"{len(fix_hashes)} fix commit(s) among {unlabeled.sum()} new commit(s) "
+                 f"and {len(df) - unlabeled.sum()} commit(s) not fixing so far")
+
+    fix_inducing_hashes = set()
+    if fix_hashes:
+        chunks = [fix_hashes[i:i + chunk_size] for i in range(0, len(fix_hashes), chunk_size)]
+        with gitpool.git_process_pool(repo_dir, workers) as executor:
+            for hashes in executor.map(blame_fix_commits_chunk, chunks):
+                fix_inducing_hashes.update(hashes)
+
+    if unlabeled.any():
+        session.execute(update(Commit) \
+                            .where(Commit.commit_id == bindparam("b_commit_id")) \
+                            .values(fix=bindparam("b_fix"), fix_inducing=bindparam("b_fix_inducing")),
+                        [{"b_commit_id": commit_id, "b_fix": fix, "b_fix_inducing": False}
+                         for commit_id, fix in zip(df.loc[unlabeled, "commit_id"].tolist(),
+                                                   df.loc[unlabeled, "fix"].tolist())])
+    if relabeled.any():
+        # Their fix-inducing label is kept
+        session.execute(update(Commit) \
+                            .where(Commit.commit_id == bindparam("b_commit_id")) \
+                            .values(fix=True),
+                        [{"b_commit_id": commit_id} for commit_id in df.loc[relabeled, "commit_id"].tolist()])
+    # Fix-inducing commits can be older commits, labeled by a previous populate
+    fix_inducing_hashes = sorted(fix_inducing_hashes)
+    for i in range(0, len(fix_inducing_hashes), LABELS_QUERY_SIZE):
+        session.execute(update(Commit) \
+                            .where(Commit.project_id == project_id) \
+                            .where(Commit.hash.in_(fix_inducing_hashes[i:i + LABELS_QUERY_SIZE])) \
+                            .values(fix_inducing=True))
+    session.commit()
+    logging.info(f"{len(fix_inducing_hashes)} fix-inducing commit(s)")
@@ -0,0 +1,176 @@
+"""
+Daily rollups of the issues and commits
+
+The daily_issue_counts and daily_commit_stats tables are maintained when issues and commits
+are ingested, so that version metrics and reports read a few rows per day instead of
+scanning the raw rows. Periods that don't start or end at midnight are read from the
+rollups for their whole days and from the raw rows for the partial days at both ends,
+so results are the same as with the raw rows only.
+"""
+import logging
+from collections import Counter, defaultdict
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from sqlalchemy import and_, delete, func, insert, or_, select
+
+from models.commit import Commit
+from models.dailycommitstat import DailyCommitStat
+from models.dailyissuecount import DailyIssueCount
+from models.issue import Issue
+
+def get_whole_days(start: datetime, end: datetime) -> Optional[Tuple[date, date]]:
+    """Get the first and last days fully included in [start, end], None if there is none"""
+    first_day = start.date() if start.time() == time.min else start.date() + timedelta(days=1)
+    last_day = end.date() - timedelta(days=1)
+    if first_day > last_day:
+        return None
+    return first_day, last_day
+
+def get_partial_days_filter(column, start: datetime, end: datetime):
+    """Filter the raw rows of [start, end] that are not covered by the whole days"""
+    whole_days = get_whole_days(start, end)
+    if whole_days is None:
+        return column.between(start, end)
+    first_day, last_day = whole_days
+    return or_(and_(column >= start, column < datetime.combine(first_day, time.min)),
+               and_(column >= datetime.combine(last_day + timedelta(days=1), time.min), column <= end))
+
+def get_days_range(dates: Iterable[datetime]) -> Optional[Tuple[datetime, datetime]]:
+    """Get the range [first midnight, last midnight + 1 day) covering the days of the dates"""
+    days = [value.date() for value in dates if value is not None]
+    if not days:
+        return None
+    return datetime.combine(min(days), time.min), datetime.combine(max(days) + timedelta(days=1), time.min)
+
+def update_daily_issue_counts(connection, project_id: int, dates: Iterable[datetime]) -> None:
+    """
+    Recompute the daily issue counts of the days spanned by the dates (e.g. the creation dates of new issues)
+
+    Parameters:
+    -----------
+    - connection : Session or Connection
+        SQLAlchemy session or connection, the caller commits
+    - project_id : int
+        Project Identifier
+    - dates : Iterable[datetime]
+        Dates of the ingested issues
+    """
+    days_range = get_days_range(dates)
+    if days_range is None:
+        return
+    start, end = days_range
+
+    counts = Counter(created_at.date() for created_at, in connection.execute(
+        select(Issue.created_at)
+            .where(Issue.project_id == project_id)
+            .where(Issue.created_at >= start)
+            .where(Issue.created_at < end)))
+
+    connection.execute(delete(DailyIssueCount.__table__)
+                           .where(DailyIssueCount.project_id == project_id)
+                           .where(DailyIssueCount.day.between(start.date(), end.date() - timedelta(days=1))))
+    if counts:
+        connection.execute(insert(DailyIssueCount.__table__),
+                           [{"project_id": project_id, "day": day, "count": count} for day, count in counts.items()])
+    logging.info(f"Updated daily issue counts from {start.date()} to {end.date()}")
+
+def update_daily_commit_stats(connection, project_id: int, dates: Iterable[datetime]) -> None:
+    """
+    Recompute the daily commit statistics of the days spanned by the dates (e.g. the dates of new commits)
+
+    Parameters:
+    -----------
+    - connection : Session or Connection
+        SQLAlchemy session or connection, the caller commits
+    - project_id : int
+        Project Identifier
+    - dates : Iterable[datetime]
+        Dates of the ingested commits
+    """
+    days_range = get_days_range(dates)
+    if days_range is None:
+        return
+    start, end = days_range
+
+    stats = defaultdict(lambda: {"commits": 0, "insertions": 0, "deletions": 0, "lines": 0, "first_date": None})
+    for committer, commit_date, insertions, deletions, lines in connection.execute(
+            select(Commit.committer, Commit.date, Commit.insertions, Commit.deletions, Commit.lines)
+                .where(Commit.project_id == project_id)
+                .where(Commit.date >= start)
+                .where(Commit.date < end)):
+        stat = stats[(commit_date.date(), committer)]
+        stat["commits"] += 1
+        stat["insertions"] += insertions or 0
+        stat["deletions"] += deletions or 0
+        stat["lines"] += lines or 0
+        if stat["first_date"] is None or commit_date < stat["first_date"]:
+            stat["first_date"] = commit_date
+
+    connection.execute(delete(DailyCommitStat.__table__)
+                           .where(DailyCommitStat.project_id == project_id)
+                           .where(DailyCommitStat.day.between(start.date(), end.date() - timedelta(days=1))))
+    if stats:
+        connection.execute(insert(DailyCommitStat.__table__),
+                           [{"project_id": project_id, "day": day, "committer": committer, **stat}
+                            for (day, committer), stat in stats.items()])
+    logging.info(f"Updated daily commit stats from {start.date()} to {end.date()}")
+
+def rebuild_daily_rollups(connection, project_id: int) -> None:
+    """Recompute all the daily rollups of a project from its issues and commits"""
+    # Days without issues or commits anymore (e.g. deleted rows) are dropped as well
+    connection.execute(delete(DailyIssueCount.__table__).where(DailyIssueCount.project_id == project_id))
+    connection.execute(delete(DailyCommitStat.__table__).where(DailyCommitStat.project_id == project_id))
+    issue_dates = connection.execute(select(func.min(Issue.created_at), func.max(Issue.created_at))
+                                         .where(Issue.project_id == project_id)).one()
+    update_daily_issue_counts(connection, project_id, issue_dates)
+    commit_dates = connection.execute(select(func.min(Commit.date), func.max(Commit.date))
+                                          .where(Commit.project_id == project_id)).one()
+    update_daily_commit_stats(connection, project_id, commit_dates)
+
+def count_issues(session, project_id: int, start: datetime, end: datetime) -> int:
+    """Count the issues created between two dates (included)"""
+    whole_days = get_whole_days(start, end)
+    count = session.query(func.count(Issue.issue_id)) \
+        .filter(Issue.project_id == project_id) \
+        .filter(get_partial_days_filter(Issue.created_at, start, end)).scalar()
+    if whole_days:
+        count += session.query(func.coalesce(func.sum(DailyIssueCount.count), 0)) \
+            .filter(DailyIssueCount.project_id == project_id) \
+            .filter(DailyIssueCount.day.between(*whole_days)).scalar()
+    return count
+
+def sum_commit_lines(session, project_id: int, start: datetime, end: datetime) -> int:
+    """Sum the changed lines of the commits between two dates (included)"""
+    whole_days = get_whole_days(start, end)
+    lines = session.query(func.coalesce(func.sum(Commit.lines), 0)) \
+        .filter(Commit.project_id == project_id) \
+        .filter(get_partial_days_filter(Commit.date, start, end)).scalar()
+    if whole_days:
+        lines += session.query(func.coalesce(func.sum(DailyCommitStat.lines), 0)) \
+            .filter(DailyCommitStat.project_id == project_id) \
+            .filter(DailyCommitStat.day.between(*whole_days)).scalar()
+    return lines
+
+def get_committers(session, project_id: int, start: datetime, end: datetime) -> Set[str]:
+    """Get the committers of the commits between two dates (included)"""
+    whole_days = get_whole_days(start, end)
+    committers = {committer for committer, in session.query(Commit.committer).distinct() \
+        .filter(Commit.project_id == project_id) \
+        .filter(get_partial_days_filter(Commit.date, start, end))}
+    if whole_days:
+        committers.update(committer for committer, in session.query(DailyCommitStat.committer).distinct() \
+            .filter(DailyCommitStat.project_id == project_id) \
+            .filter(DailyCommitStat.day.between(*whole_days)))
+    return committers
+
+def get_first_commit_dates(session) -> Dict[str, datetime]:
+    """Get the date of the first commit of each committer, all projects included"""
+    return dict(session.query(DailyCommitStat.committer, func.min(DailyCommitStat.first_date)) \
+        .group_by(DailyCommitStat.committer).all())
+
+def get_daily_issue_counts(session, project_id: int, start: date, end: date) -> Dict[date, int]:
+    """Get the number of issues created per day between two days (included), days without issues are omitted"""
+    return dict(session.query(DailyIssueCount.day, DailyIssueCount.count) \
+        .filter(DailyIssueCount.project_id == project_id) \
+        .filter(DailyIssueCount.day.between(start, end)).all())
@@ -19,7 +19,8 @@ from models.version import Version
 from models.metric import Metric
 from models.commit import Commit
 from models.issue import Issue
-from utils.database import get_included_and_current_versions_filter
+from metrics.rollups import count_issues, sum_commit_lines, get_committers, get_first_commit_dates, get_daily_issue_counts
+from utils.featurestore import load_version_metrics
 from utils.timeit import timeit
 import utils.math as mt
 
@@ -52,10 +53,11 @@ def compute_version_metrics(session, repo_dir:str, project_id:int):
         .filter(Commit.project_id == project_id) \
             .order_by(Commit.date.asc()).first()[0]
 
+    first_commit_dates = get_first_commit_dates(session)
+
     for version in versions:
         # Count the number of issues that occurred between the start and end dates
-        bugs_count = session.query(Issue).filter(
-            Issue.created_at.between(version.start_date, version.end_date)).filter(Issue.project_id == project_id).count()
+        bugs_count = count_issues(session, project_id, version.start_date, version.end_date)
 
         # Compute the bug velocity of the release
         delta = version.end_date - version.start_date
@@ -66,20 +68,17 @@ def compute_version_metrics(session, repo_dir:str, project_id:int):
             bug_velo_release = bugs_count
 
         # Compute a rough estimate of the total changes
-        rough_changes = session.query(
-            func.sum(Commit.lines).label("total_changes")
-        ).filter(Commit.date.between(version.start_date, version.end_date)).filter(Commit.project_id == project_id).scalar()
-        if rough_changes is None: rough_changes = 0
+        rough_changes = sum_commit_lines(session, project_id, version.start_date, version.end_date)
 
         # Compute the average seniorship of the team
-        team_members = session.query(Commit.committer).filter(
-            Commit.date.between(version.start_date, version.end_date)
-        ).filter(Commit.project_id == project_id).group_by(Commit.committer).all()
+        team_members = get_committers(session, project_id, version.start_date, version.end_date)
         seniority_total = 0
         for member in team_members:
-            first_commit = session.query(
-                func.min(Commit.date).label("date")
-            ).filter(Commit.committer == member[0]).scalar()
+            if member not in first_commit_dates:
+                # Rollups lagging behind the commits (e.g. commits inserted without updating them)
+                first_commit_dates[member] = session.query(func.min(Commit.date)) \
+                    .filter(Commit.committer == member).scalar()
+            first_commit = first_commit_dates[member]
             delta = version.end_date - first_commit
             seniority = delta.days
             seniority_total += seniority
@@ -138,18 +137,10 @@ def assess_next_release_risk(session, configuration: Configuration, project_id:i
     """
     logging.info("assess_next_release_risk")
 
-    excluded_versions = configuration.exclude_versions
-    included_and_current_versions = get_included_and_current_versions_filter(session, configuration)
-
     # Get the version metrics and the average cyclomatic complexity
-    metrics_statement = session.query(Version, Metric) \
-        .filter(Version.project_id == project_id) \
-        .filter(Version.include_filter(included_and_current_versions)) \
-        .filter(Version.exclude_filter(excluded_versions)) \
-        .join(Metric, Metric.version_id == Version.version_id) \
-        .order_by(Version.start_date.asc()).statement
-    logging.debug(metrics_statement)
-    df = pd.read_sql(metrics_statement, session.get_bind())
+    df = load_version_metrics(session, configuration, project_id,
+                              ['bugs', 'bug_velocity', 'changes', 'avg_team_xp', 'lizard_avg_complexity', 'code_churn_avg'])
+    df = df[df['has_metric']].sort_values('start_date').reset_index(drop=True)
 
     # TODO : we should Remove outliers in the dataframe
     # while preserving the "Next Release" row
@@ -219,34 +210,11 @@ def compute_bugvelocity_last_30_days(session, project_id:int)->pd.DataFrame:
     """
     logging.info("compute_bugvelocity_last_30_days")
 
-    # Count the number of issues that occurred between the start and end dates
-    # Group by date
+    # Count the number of issues that occurred each day between the start and end dates
     end_date = datetime.now()
     start_date = end_date + timedelta(days=-30)
-    bugs_count_statement = session.query(Issue) \
-        .filter(Issue.created_at.between(start_date, end_date)) \
-        .filter(Issue.project_id == project_id) \
-        .order_by(Issue.created_at.desc()) \
-        .statement
-    df_bugs_count = pd.read_sql(bugs_count_statement, session.get_bind())
-
-    # Most of end users will use SQLite which doesn't support GROUP BY DAY (or it's ugly with strftime / SUBSTR)
-    # so let's do it with pandas as we are dealing with 30 rows
-    df = (pd.to_datetime(df_bugs_count['created_at'])
-       .value_counts()
-       .rename_axis('created_at')
-       .reset_index(name='count'))
-    df['created_at'] = df['created_at'].dt.date
-
-    # Create a dataframe with all 30 days between start and end dates
-    df_range = pd.DataFrame({'created_at': pd.date_range(start_date, end_date, freq='D'), 'count': 0})
-    df_range['created_at'] = df_range['created_at'].dt.date
-
-    # Melt the two dataframes to get a bug velocity for each day (and fill with zero the missing days)
-    df = df.merge(df_range, how='right', on='created_at')
-    df['count_x'] = df['count_x'].fillna(0)
-    df['count_x'] = df['count_x'].astype(int)
-    df = df.rename(columns={'count_x': 'count'})
-    df = df.drop('count_y', axis=1)
-
-    return df
+    days = pd.date_range(start_date, end_date, freq='D').date
+    counts = get_daily_issue_counts(session, project_id, days[0], days[-1])
+
+    # Fill with zero the days without issues
+    return pd.DataFrame({'created_at': days, 'count': [counts.get(day, 0) for day in days]})
@@ -0,0 +1,61 @@
+import logging
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.metrics import mean_absolute_error, mean_squared_error
+
+from utils.timeit import timeit
+
+# Columns of the backtest result, besides the ones identifying the version
+BACKTEST_COLUMNS = ["train_versions", "actual", "predicted", "error"]
+
+def predict_version(estimator, X_train, y_train, X_version) -> float:
+    estimator.fit(X_train, y_train)
+    return estimator.predict(X_version)[0]
+
+@timeit
+def backtest(model, df: pd.DataFrame, min_versions: int, jobs: int) -> pd.DataFrame:
+    """
+    Predict each past version of a project with the model trained on the versions before it
+
+    The feature matrix is built once from the frame of the feature store, each fold being
+    a slice of it, and the folds are trained in parallel by joblib.
+
+    Parameters:
+    -----------
+    - model : ml
+        Model to backtest (e.g. BugVelocity)
+    - df : pd.DataFrame
+        Frame of the feature store with the columns of the model
+    - min_versions : int
+        Number of versions the first fold is trained on
+    - jobs : int
+        Number of folds trained in parallel, -1 for all the CPUs
+
+    Return a prediction-vs-actual table, one row per predicted version
+    """
+    history = model.get_history(df)
+    X = model.get_features(history)
+    y = history['bugs'].to_numpy()
+    estimator = model.create_estimator()
+    folds = list(range(max(min_versions, 1), len(history)))
+    logging.info(f"Backtesting {model.name} on {len(folds)} version(s)")
+
+    predictions = Parallel(n_jobs=jobs)(
+        delayed(predict_version)(clone(estimator), X.iloc[:fold], y[:fold], X.iloc[[fold]]) for fold in folds)
+
+    result = history.loc[folds, ['version_id', 'name', 'tag', 'end_date']].reset_index(drop=True)
+    result['train_versions'] = folds
+    result['actual'] = y[folds]
+    result['predicted'] = np.round(predictions).astype(int) if folds else []
+    result['error'] = result['predicted'] - result['actual']
+    return result
+
+def get_backtest_summary(result: pd.DataFrame) -> str:
+    if result.empty:
+        return "No version to backtest"
+    return (f"{len(result)} version(s) predicted, "
+            f"MSE {mean_squared_error(result['actual'], result['predicted']):.2f}, "
+            f"MAE {mean_absolute_error(result['actual'], result['predicted']):.2f}")
@@ -1,52 +1,89 @@
+import copy
 import logging
+import time
+from sklearn.base import clone
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.metrics import mean_squared_error
 from sklearn.model_selection import train_test_split
-import pandas as pd
 
-from ml.ml import ml
-from models.metric import Metric
-from models.version import Version
-from utils.database import get_included_and_current_versions_filter
+from ml.ml import VersionModel
+from ml.training import is_fast_mode, search_hyperparameters, split_time_ordered
+from utils.featurestore import load_version_metrics
 from utils.timeit import timeit
 
+# Hyperparameters tried in the search training mode
+RANDOM_FOREST_GRID = {
+    "n_estimators": [50, 100, 200],
+    "max_depth": [None, 5, 10],
+    "min_samples_leaf": [1, 2, 4],
+}
+# Trees replaced per new version when the model is updated
+UPDATE_TREES_PER_VERSION = 20
 
-class BugVelocity(ml):
+class BugVelocity(VersionModel):
     """
     BugVelocity is a simple Machine Learning model (a bit naive) based on the history of
     bug velocity values. It demonstrate how you can integrate your own model into the tool.
     """
     
     def __init__(self, project_id, session, config):
-        ml.__init__(self, project_id, session, config)
+        VersionModel.__init__(self, project_id, session, config)
         self.name = "bugvelocity"
+        self.columns = ['bug_velocity', 'bugs']
+
+    def get_history(self, df):
+        return df[df['name'] != self.configuration.next_version_name] \
+            .sort_values('start_date') \
+            .reset_index(drop=True)
+
+    def get_features(self, history):
+        return history[['bug_velocity']]
+
+    def create_estimator(self):
+        return RandomForestRegressor(n_estimators=200, random_state=1043)
+
+    def can_update(self, estimator):
+        return isinstance(estimator, RandomForestRegressor)
+
+    def update_estimator(self, estimator, X_recent, y_recent, new_versions):
+        # The oldest trees are replaced by trees grown on the most recent versions
+        new_trees = min(UPDATE_TREES_PER_VERSION * new_versions, len(estimator.estimators_))
+        recent_forest = clone(estimator).set_params(n_estimators=new_trees) \
+            .fit(X_recent, y_recent)
+        updated = copy.copy(estimator)
+        updated.estimators_ = estimator.estimators_[new_trees:] + recent_forest.estimators_
+        return updated
 
     @timeit
     def train(self):
         """Train the model"""
         logging.info("BugVelocity:train")
 
-        included_versions = self.configuration.include_versions
-        excluded_versions = self.configuration.exclude_versions
-
-        releases_statement = self.session.query(Version). \
-            order_by(Version.start_date.asc()) \
-            .filter(Version.project_id == self.project_id) \
-            .filter(Version.include_filter(included_versions)) \
-            .filter(Version.exclude_filter(excluded_versions)) \
-            .filter(Version.name != self.configuration.next_version_name).statement
-        df = pd.read_sql(releases_statement, self.session.get_bind())
-        X=df[['bug_velocity']]
+        df = self.get_history(load_version_metrics(self.session, self.configuration, self.project_id, self.columns))
+        X=self.get_features(df)
         y=df[['bugs']].values.ravel()
 
-        # Model: RandomForestRegressor
-        self.model = RandomForestRegressor(n_estimators=200, random_state=1043)
-        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.1, random_state=5)
+        started_at = time.perf_counter()
+        if is_fast_mode(self.configuration):
+            # The most recent versions evaluate the model
+            X_train, X_test, y_train, y_test = split_time_ordered(X, y, test_size=0.1)
+            params = search_hyperparameters(RandomForestRegressor(n_estimators=200, random_state=1043),
+                                            RANDOM_FOREST_GRID, X_train, y_train, self.configuration)
+            self.model = RandomForestRegressor(**{"n_estimators": 200, **params},
+                                               n_jobs=self.configuration.training_jobs, random_state=1043)
+        else:
+            # Model: RandomForestRegressor
+            self.model = RandomForestRegressor(n_estimators=200, random_state=1043)
+            X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.1, random_state=5)
         self.model.fit(X_train, y_train)
+        self.training_time = time.perf_counter() - started_at
+        self.features = list(X.columns)
+        self.trained_until = df['end_date'].max()
         y_pred = self.model.predict(X_test)
         rdmForest_predictions = [round(value) for value in y_pred]
         self.mse = mean_squared_error(y_test, rdmForest_predictions)
-        logging.info("BugVelocity: Mean Square Error : " + str(self.mse))
+        logging.info("BugVelocity: Mean Square Error : " + str(self.mse) +
+                     ", training time : " + str(self.training_time) + " seconds")
         self.store()
 
 
@@ -54,12 +91,9 @@ class BugVelocity(ml):
     def predict(self)->int:
         """Predict the next value"""
         logging.info("BugVelocity::predict")
-        self.restore()  # unpickle the model
-        bug_velocity = self.session.query(Version.bug_velocity). \
-            filter(Version.project_id == self.project_id). \
-            filter(Version.name == self.configuration.next_version_name).scalar()
-        d = {'bug_velocity': [bug_velocity]}
-        X_test = pd.DataFrame(data=d)
+        self.restore()  # cached in memory once loaded
+        df = load_version_metrics(self.session, self.configuration, self.project_id, ['bug_velocity'])
+        X_test = df.loc[df['name'] == self.configuration.next_version_name, ['bug_velocity']]
         prediction_df = self.model.predict(X_test)
         value = round(prediction_df[0])
         return value
@@ -1,113 +1,168 @@
 import logging
+import time
 
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.metrics import mean_squared_error
 from sklearn.model_selection import train_test_split
-import pandas as pd
+from sklearn.pipeline import Pipeline, make_pipeline
 from sklearn.preprocessing import StandardScaler
-from sqlalchemy.orm import defer
 
-from ml.ml import ml
-from models.metric import Metric
-from models.version import Version
+from ml.ml import VersionModel
+from ml.training import is_fast_mode, search_hyperparameters, split_time_ordered
+from utils.featurestore import load_version_metrics
 from utils.timeit import timeit
 from xgboost import XGBRegressor
 
+# Version and Metric columns used by the model, bugs being the target
+CODEMETRICS_COLUMNS = ['avg_team_xp', 'bug_velocity', 'bugs',
+    'lizard_total_nloc', 'lizard_avg_nloc', 'lizard_avg_token',
+    'lizard_fun_count', 'lizard_fun_rt', 'lizard_nloc_rt',
+    'lizard_total_complexity', 'lizard_avg_complexity',
+    'lizard_total_operands_count', 'lizard_unique_operands_count',
+    'lizard_total_operators_count', 'lizard_unique_operators_count',
+    'comments_rt', 'total_lines', 'total_blank_lines',
+    'total_comments', 'ck_cbo', 'ck_cbo_modified', 'ck_fan_in',
+    'ck_fan_out', 'ck_dit', 'ck_noc', 'ck_nom', 'ck_nopm',
+    'ck_noprm', 'ck_num_fields', 'ck_num_methods',
+    'ck_num_visible_methods', 'ck_nosi', 'ck_rfc', 'ck_wmc',
+    'ck_loc', 'ck_lcom', 'ck_qty_loops', 'ck_qty_comparisons',
+    'ck_qty_returns', 'ck_qty_try_catch', 'ck_qty_parenth_exps',
+    'ck_qty_str_literals', 'ck_qty_numbers', 'ck_qty_math_operations',
+    'ck_qty_math_variables', 'ck_qty_nested_blocks',
+    'ck_qty_ano_inner_cls_and_lambda', 'ck_qty_unique_words', 'ck_numb_log_stmts',
+    'ck_has_javadoc', 'ck_modifiers', 'ck_usage_vars',
+    'ck_usage_fields', 'ck_method_invok', 'halstead_length',
+    'halstead_vocabulary', 'halstead_volume', 'halstead_difficulty',
+    'halstead_effort', 'halstead_time', 'halstead_bugs']
 
-class CodeMetrics(ml):
+# XGBoost in the fast training modes, the number of trees being bounded by early stopping
+FAST_XGBOOST_PARAMS = {
+    "objective": "reg:squarederror",
+    "n_estimators": 1000,
+    "learning_rate": 0.1,
+    "tree_method": "hist",
+    "random_state": 1043,
+}
+EARLY_STOPPING_ROUNDS = 20
+# Hyperparameters tried in the search training mode
+XGBOOST_GRID = {
+    "max_depth": [3, 6],
+    "learning_rate": [0.05, 0.1, 0.3],
+    "subsample": [0.8, 1.0],
+}
+# Boosting rounds added per new version when the model is updated
+UPDATE_ROUNDS_PER_VERSION = 10
+
+class CodeMetrics(VersionModel):
     def __init__(self, project_id, session, config):
-        ml.__init__(self, project_id, session, config)
+        VersionModel.__init__(self, project_id, session, config)
         self.name = "codemetrics"
+        self.columns = CODEMETRICS_COLUMNS
+
+    def get_history(self, df):
+        return df[df['has_metric'] & (df['name'] != self.configuration.next_version_name)] \
+            .sort_values('end_date') \
+            .reset_index(drop=True)
+
+    def get_features(self, history):
+        dataframe = history[CODEMETRICS_COLUMNS].dropna(axis=1, how='any')
+        return dataframe.drop('bugs', axis=1)
+
+    def create_estimator(self):
+        tree_method = 'hist' if is_fast_mode(self.configuration) else 'exact'
+        return make_pipeline(StandardScaler(),
+                             XGBRegressor(objective='reg:squarederror',
+                                          n_estimators=200,
+                                          learning_rate=0.1,
+                                          tree_method=tree_method,
+                                          random_state=1043,
+                                          n_jobs=1))
+
+    def can_update(self, estimator):
+        # Models trained before they were stored with their scaler are trained again
+        return isinstance(estimator, Pipeline)
+
+    def update_estimator(self, estimator, X_recent, y_recent, new_versions):
+        # Boosting continues from the trees of the stored model
+        scaler = estimator.named_steps['standardscaler']
+        regressor = estimator.named_steps['xgbregressor']
+        booster = regressor.get_booster()
+        best_iteration = getattr(regressor, 'best_iteration', None)
+        if best_iteration is not None:
+            # The predictions of an early stopped model stop at its best iteration: boosting
+            # continues from there, without the best iteration capping the new rounds
+            booster = booster[:best_iteration + 1]
+            booster.set_attr(best_iteration=None, best_score=None)
+        continued = XGBRegressor(**{**regressor.get_params(),
+                                    'n_estimators': UPDATE_ROUNDS_PER_VERSION * new_versions,
+                                    'early_stopping_rounds': None})
+        continued.fit(scaler.transform(X_recent), y_recent, xgb_model=booster)
+        return Pipeline([('standardscaler', scaler), ('xgbregressor', continued)])
 
     @timeit
     def train(self):
         """Train the model"""
 
-        included_versions = self.configuration.include_versions
-        excluded_versions = self.configuration.exclude_versions
-
-        versions_metrics_statement = self.session.query(Version.avg_team_xp, Version.bug_velocity, Version.bugs,
-                                   Metric.lizard_total_nloc, Metric.lizard_avg_nloc, Metric.lizard_avg_token,
-                                   Metric.lizard_fun_count, Metric.lizard_fun_rt, Metric.lizard_nloc_rt,
-                                   Metric.lizard_total_complexity, Metric.lizard_avg_complexity,
-                                   Metric.lizard_total_operands_count, Metric.lizard_unique_operands_count,
-                                   Metric.lizard_total_operators_count, Metric.lizard_unique_operators_count,
-                                   Metric.comments_rt, Metric.total_lines, Metric.total_blank_lines,
-                                   Metric.total_comments, Metric.ck_cbo, Metric.ck_cbo_modified, Metric.ck_fan_in,
-                                   Metric.ck_fan_out, Metric.ck_dit, Metric.ck_noc, Metric.ck_nom, Metric.ck_nopm,
-                                   Metric.ck_noprm, Metric.ck_num_fields, Metric.ck_num_methods,
-                                   Metric.ck_num_visible_methods, Metric.ck_nosi, Metric.ck_rfc, Metric.ck_wmc,
-                                   Metric.ck_loc, Metric.ck_lcom, Metric.ck_qty_loops, Metric.ck_qty_comparisons,
-                                   Metric.ck_qty_returns, Metric.ck_qty_try_catch, Metric.ck_qty_parenth_exps,
-                                   Metric.ck_qty_str_literals, Metric.ck_qty_numbers, Metric.ck_qty_math_operations,
-                                   Metric.ck_qty_math_variables, Metric.ck_qty_nested_blocks,
-                                   Metric.ck_qty_ano_inner_cls_and_lambda, Metric.ck_qty_unique_words, Metric.ck_numb_log_stmts,
-                                   Metric.ck_has_javadoc, Metric.ck_modifiers, Metric.ck_usage_vars,
-                                   Metric.ck_usage_fields, Metric.ck_method_invok, Metric.halstead_length,
-                                   Metric.halstead_vocabulary, Metric.halstead_volume, Metric.halstead_difficulty,
-                                   Metric.halstead_effort, Metric.halstead_time, Metric.halstead_bugs). \
-            order_by(Version.end_date.desc()). \
-            filter(Version.project_id == self.project_id). \
-            filter(Version.include_filter(included_versions)). \
-            filter(Version.exclude_filter(excluded_versions)). \
-            filter(Metric.version_id == Version.version_id). \
-            filter(Version.name != self.configuration.next_version_name).statement
-
-        dataframe = pd.read_sql(versions_metrics_statement, self.session.get_bind())
-        dataframe = dataframe.dropna(axis=1, how='any', thresh=None, subset=None)
+        df = load_version_metrics(self.session, self.configuration, self.project_id, CODEMETRICS_COLUMNS)
+        fast_mode = is_fast_mode(self.configuration)
+        # Oldest versions first in the fast modes, for the time-ordered splits
+        df = df[df['has_metric'] & (df['name'] != self.configuration.next_version_name)] \
+            .sort_values('end_date', ascending=fast_mode)
+        dataframe = df[CODEMETRICS_COLUMNS].reset_index(drop=True)
+        dataframe = dataframe.dropna(axis=1, how='any')
         X = dataframe.drop('bugs', axis=1)
         y = dataframe[['bugs']].values.ravel()
-        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.3, random_state=42)
+        if fast_mode:
+            # The most recent versions evaluate the model
+            X_train, X_test, y_train, y_test = split_time_ordered(X, y, test_size=0.3)
+        else:
+            X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.3, random_state=42)
 
         stand = StandardScaler()
 
         X_train = stand.fit_transform(X_train)
         X_test = stand.transform(X_test)
 
-        # Model: XGBRegressor
-        self.model = XGBRegressor(objective='reg:squarederror',
-                                  n_estimators=200,
-                                  learning_rate=0.1,
-                                  tree_method='exact',
-                                  random_state=1043)
-        self.model.fit(X_train, y_train)
+        started_at = time.perf_counter()
+        if fast_mode:
+            params = search_hyperparameters(XGBRegressor(**{**FAST_XGBOOST_PARAMS, "n_estimators": 200}, n_jobs=1),
+                                            XGBOOST_GRID, X_train, y_train, self.configuration)
+            # Stop adding trees once the next versions of the training set are no longer better predicted
+            X_fit, X_valid, y_fit, y_valid = split_time_ordered(X_train, y_train, test_size=0.2)
+            self.model = XGBRegressor(**{**FAST_XGBOOST_PARAMS, **params},
+                                      early_stopping_rounds=EARLY_STOPPING_ROUNDS,
+                                      n_jobs=self.configuration.training_jobs)
+            self.model.fit(X_fit, y_fit, eval_set=[(X_valid, y_valid)], verbose=False)
+        else:
+            # Model: XGBRegressor
+            self.model = XGBRegressor(objective='reg:squarederror',
+                                      n_estimators=200,
+                                      learning_rate=0.1,
+                                      tree_method='exact',
+                                      random_state=1043)
+            self.model.fit(X_train, y_train)
+        self.training_time = time.perf_counter() - started_at
+        self.features = list(X.columns)
+        self.trained_until = df['end_date'].max()
         y_pred = self.model.predict(X_test)
         xgbRegressor_predictions = [round(value) for value in y_pred]
         self.mse = mean_squared_error(y_test, xgbRegressor_predictions)
-        logging.info("BugVelocity: Mean Square Error : " + str(self.mse))
+        # Stored with its scaler, to predict and be updated from the metrics as they are
+        self.model = Pipeline([('standardscaler', stand), ('xgbregressor', self.model)])
+        logging.info("CodeMetrics: Mean Square Error : " + str(self.mse) +
+                     ", training time : " + str(self.training_time) + " seconds")
         self.store()
 
     @timeit
     def predict(self) -> int:
         """Predict the next value"""
         logging.info("CodeMetrics::predict")
-        self.restore()  # unpickle the model
-        versions_metrics_statement = self.session.query(Version.avg_team_xp, Version.bug_velocity, Version.bugs,
-                                   Metric.lizard_total_nloc, Metric.lizard_avg_nloc, Metric.lizard_avg_token,
-                                   Metric.lizard_fun_count, Metric.lizard_fun_rt, Metric.lizard_nloc_rt,
-                                   Metric.lizard_total_complexity, Metric.lizard_avg_complexity,
-                                   Metric.lizard_total_operands_count, Metric.lizard_unique_operands_count,
-                                   Metric.lizard_total_operators_count, Metric.lizard_unique_operators_count,
-                                   Metric.comments_rt, Metric.total_lines, Metric.total_blank_lines,
-                                   Metric.total_comments, Metric.ck_cbo, Metric.ck_cbo_modified, Metric.ck_fan_in,
-                                   Metric.ck_fan_out, Metric.ck_dit, Metric.ck_noc, Metric.ck_nom, Metric.ck_nopm,
-                                   Metric.ck_noprm, Metric.ck_num_fields, Metric.ck_num_methods,
-                                   Metric.ck_num_visible_methods, Metric.ck_nosi, Metric.ck_rfc, Metric.ck_wmc,
-                                   Metric.ck_loc, Metric.ck_lcom, Metric.ck_qty_loops, Metric.ck_qty_comparisons,
-                                   Metric.ck_qty_returns, Metric.ck_qty_try_catch, Metric.ck_qty_parenth_exps,
-                                   Metric.ck_qty_str_literals, Metric.ck_qty_numbers, Metric.ck_qty_math_operations,
-                                   Metric.ck_qty_math_variables, Metric.ck_qty_nested_blocks,
-                                   Metric.ck_qty_ano_inner_cls_and_lambda, Metric.ck_qty_unique_words, Metric.ck_numb_log_stmts,
-                                   Metric.ck_has_javadoc, Metric.ck_modifiers, Metric.ck_usage_vars,
-                                   Metric.ck_usage_fields, Metric.ck_method_invok, Metric.halstead_length,
-                                   Metric.halstead_vocabulary, Metric.halstead_volume, Metric.halstead_difficulty,
-                                   Metric.halstead_effort, Metric.halstead_time, Metric.halstead_bugs) \
-            .filter(Version.project_id == self.project_id) \
-            .filter(Metric.version_id == Version.version_id) \
-            .order_by(Version.end_date.asc()) \
-            .filter(Version.name == self.configuration.next_version_name).statement
-        dataframe = pd.read_sql(versions_metrics_statement, self.session.get_bind())
-        dataframe = dataframe.iloc[0]
+        self.restore()  # cached in memory once loaded
+        df = load_version_metrics(self.session, self.configuration, self.project_id, CODEMETRICS_COLUMNS)
+        df = df[df['has_metric'] & (df['name'] == self.configuration.next_version_name)]
+        # The features the model was trained on
+        features = self.features or [column for column in CODEMETRICS_COLUMNS if column != 'bugs']
+        dataframe = df[features].reset_index(drop=True)
 
         prediction_dataframe = self.model.predict(dataframe)
         value = round(prediction_dataframe[0])
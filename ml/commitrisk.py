@@ -0,0 +1,112 @@
+import logging
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.feature_extraction.text import HashingVectorizer
+
+from ml.ml import ml
+from ml.training import train_risk_classifier
+from models.commit import Commit
+from models.version import Version
+from utils.timeit import timeit
+
+# Features computed from the columns of the commit table
+NUMERIC_FEATURES = ['insertions', 'deletions', 'lines', 'files',
+                    'dmm_unit_size', 'dmm_unit_complexity', 'dmm_unit_interfacing',
+                    'committer_experience', 'message_words', 'hour', 'weekday']
+# Tokens of the commit messages are hashed into a fixed number of features
+MESSAGE_FEATURES = 2 ** 10
+MESSAGE_VECTORIZER = HashingVectorizer(n_features=MESSAGE_FEATURES, alternate_sign=False, norm=None,
+                                       binary=True, token_pattern=r"(?u)\b[a-zA-Z]{2,}\b")
+
+def load_commits(session, project_id: int) -> pd.DataFrame:
+    """Load the commits of the project, oldest first, with their committer experience"""
+    columns = [Commit.hash, Commit.committer, Commit.date, Commit.message, Commit.insertions, Commit.deletions,
+               Commit.lines, Commit.files, Commit.dmm_unit_size, Commit.dmm_unit_complexity,
+               Commit.dmm_unit_interfacing, Commit.fix, Commit.fix_inducing]
+    df = pd.DataFrame(session.query(*columns) \
+                          .filter(Commit.project_id == project_id) \
+                          .order_by(Commit.date, Commit.commit_id).all(),
+                      columns=[column.key for column in columns])
+    df['date'] = pd.to_datetime(df['date'])
+    # Number of previous commits of the committer
+    df['committer_experience'] = df.groupby('committer').cumcount()
+    return df
+
+def get_commit_features(commits: pd.DataFrame) -> sparse.csr_matrix:
+    """
+    Get the features of commits in a single pass over the frame: the numeric features
+    (NaN when unknown, e.g. DMM metrics not computed yet) followed by the hashed message tokens
+    """
+    messages = commits['message'].fillna("")
+    numeric = commits[['insertions', 'deletions', 'lines', 'files',
+                       'dmm_unit_size', 'dmm_unit_complexity', 'dmm_unit_interfacing',
+                       'committer_experience']].astype(float)
+    numeric = numeric.assign(message_words=messages.str.count(r"\S+"),
+                             hour=commits['date'].dt.hour,
+                             weekday=commits['date'].dt.weekday)
+    return sparse.hstack([sparse.csr_matrix(numeric[NUMERIC_FEATURES].to_numpy(dtype=float)),
+                          MESSAGE_VECTORIZER.transform(messages)], format='csr')
+
+class CommitRisk(ml):
+    """
+    CommitRisk is a just-in-time model: it scores the risk of each commit of inducing a bug,
+    learnt from the commits labeled by the bug fixes (see metrics.fixes)
+    """
+
+    def __init__(self, project_id, session, config):
+        ml.__init__(self, project_id, session, config)
+        self.name = "commitrisk"
+
+    def get_next_release(self):
+        return self.session.query(Version) \
+            .filter(Version.project_id == self.project_id) \
+            .filter(Version.name == self.configuration.next_version_name).first()
+
+    @timeit
+    def train(self):
+        """Train the model on the labeled commits released before the next release"""
+        logging.info("CommitRisk:train")
+
+        df = load_commits(self.session, self.project_id)
+        next_release = self.get_next_release()
+        if next_release is not None:
+            # Bugs of the commits of the next release may not be found yet
+            df = df[df['date'] < next_release.start_date]
+        df = df[df['fix'].notna()].reset_index(drop=True)
+        y = df['fix_inducing'].fillna(False).astype(int).to_numpy()
+        self.model, self.mse, self.training_time = train_risk_classifier(
+            get_commit_features(df), y, self.configuration, self.name, "fix-inducing and clean commits")
+        self.features = NUMERIC_FEATURES + [f"message_tokens_{MESSAGE_FEATURES}"]
+        self.trained_until = df['date'].max()
+        self.store()
+
+    @timeit
+    def score_commits(self) -> pd.DataFrame:
+        """
+        Score all the commits of the next release in a single batch
+
+        Return a frame with the hash, committer, date, first line of the message, lines, files
+        and risk (probability of inducing a bug) of each commit, the riskiest first
+        """
+        logging.info("CommitRisk::score_commits")
+        self.restore()  # cached in memory once loaded
+        df = load_commits(self.session, self.project_id)
+        next_release = self.get_next_release()
+        if next_release is not None:
+            df = df[df['date'].between(next_release.start_date, next_release.end_date)]
+        elif self.trained_until is not None:
+            df = df[df['date'] > self.trained_until]
+        df = df.reset_index(drop=True)
+
+        scores = df[['hash', 'committer', 'date', 'lines', 'files']] \
+            .assign(message=df['message'].fillna("").str.split("\n").str[0])
+        scores['risk'] = self.model.predict_proba(get_commit_features(df))[:, 1] if len(df) else []
+        return scores.sort_values('risk', ascending=False).reset_index(drop=True)
+
+    @timeit
+    def predict(self) -> int:
+        """Predict the number of commits of the next release inducing a bug"""
+        logging.info("CommitRisk::predict")
+        return round(self.score_commits()['risk'].sum())
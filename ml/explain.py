@@ -0,0 +1,130 @@
+"""
+Explanations of the predictions of the tree models, feature by feature
+
+A prediction is decomposed into the bias of the model (its expected value) plus one contribution
+per feature, computed natively from the trees: XGBoost computes the contributions of its boosters
+(pred_contribs), and the predictions of a random forest are decomposed along their decision paths.
+All the rows are explained in a single batch, without sampling nor refitting the model.
+"""
+import logging
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.pipeline import Pipeline
+from sqlalchemy import insert, select
+from xgboost import DMatrix, XGBModel
+
+from models.prediction import Prediction, PredictionContribution
+from utils.timeit import timeit
+
+def get_forest_contributions(forest: RandomForestRegressor, X) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Decompose the predictions of a random forest along the decision paths: each split moves the
+    prediction of a tree from the value of a node to the value of its child, and the move is
+    credited to the feature of the split. The paths of all the rows in all the trees are walked
+    at once, as the product of the node indicator matrix of the forest with the moves of its nodes.
+
+    Return the contributions (one column per feature) and the bias of each row
+    """
+    indicator, _ = forest.decision_path(X)
+    moves, root_values = [], []
+    for estimator in forest.estimators_:
+        tree = estimator.tree_
+        values = tree.value[:, 0, 0]
+        splits = np.flatnonzero(tree.children_left >= 0)
+        parents = np.zeros(tree.node_count, dtype=np.intp)
+        parents[tree.children_left[splits]] = splits
+        parents[tree.children_right[splits]] = splits
+        # Every node but the root (node 0) is reached by the split of its parent
+        children = np.arange(1, tree.node_count)
+        moves.append(sparse.csr_matrix((values[children] - values[parents[children]],
+                                        (children, tree.feature[parents[children]])),
+                                       shape=(tree.node_count, forest.n_features_in_)))
+        root_values.append(values[0])
+    contributions = (indicator @ sparse.vstack(moves, format='csr')).toarray() / len(forest.estimators_)
+    return contributions, np.full(indicator.shape[0], np.mean(root_values))
+
+def get_boosting_contributions(regressor: XGBModel, X) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Get the contributions computed by XGBoost (TreeSHAP) for the trees used by the predictions,
+    up to the best iteration of an early stopped training
+
+    Return the contributions (one column per feature) and the bias of each row
+    """
+    best_iteration = getattr(regressor, 'best_iteration', None)
+    iteration_range = (0, best_iteration + 1) if best_iteration is not None else (0, 0)
+    contributions = regressor.get_booster().predict(DMatrix(X), pred_contribs=True,
+                                                    iteration_range=iteration_range)
+    # The last column is the bias
+    return contributions[:, :-1], contributions[:, -1]
+
+def explain_predictions(estimator, X: pd.DataFrame) -> pd.DataFrame:
+    """
+    Explain the predictions of an estimator: a random forest or an XGBoost model,
+    alone or at the end of a pipeline
+
+    Parameters:
+    -----------
+    - estimator : object
+        Trained estimator
+    - X : DataFrame
+        Features of the rows to explain
+
+    Return a frame with the bias and the contribution of each feature (one column per feature)
+    to the prediction of each row, their sum being the prediction
+    """
+    transformed = X
+    if isinstance(estimator, Pipeline):
+        for _, step in estimator.steps[:-1]:
+            transformed = step.transform(transformed)
+        estimator = estimator.steps[-1][1]
+
+    if isinstance(estimator, XGBModel):
+        contributions, bias = get_boosting_contributions(estimator, transformed)
+    elif isinstance(estimator, RandomForestRegressor):
+        contributions, bias = get_forest_contributions(estimator, transformed)
+    else:
+        raise ValueError(f"The predictions of {type(estimator).__name__} can't be explained")
+    df = pd.DataFrame(contributions, columns=X.columns, index=X.index)
+    df.insert(0, 'bias', bias)
+    return df
+
+@timeit
+def save_explanations(session, model_id: int, explanations: pd.DataFrame, features) -> None:
+    """
+    Store the explained predictions of a version of a model, replacing the previous ones
+
+    Parameters:
+    -----------
+    - session : Session
+        SQLAlchemy session
+    - model_id : int
+        Version of the model (see utils.modelstore)
+    - explanations : DataFrame
+        version_id, prediction, bias and the contribution of each feature, one row per version
+    - features : List[str]
+        Features of the model
+    """
+    logging.info(f"Saving the explanations of {len(explanations)} prediction(s) of model {model_id}")
+    session.query(PredictionContribution) \
+        .filter(PredictionContribution.prediction_id.in_(select(Prediction.prediction_id) \
+                                                             .where(Prediction.model_id == model_id))) \
+        .delete(synchronize_session=False)
+    session.query(Prediction).filter(Prediction.model_id == model_id).delete(synchronize_session=False)
+
+    predictions = [Prediction(model_id=model_id, version_id=version_id, value=value, bias=bias)
+                   for version_id, value, bias in zip(explanations['version_id'].tolist(),
+                                                      explanations['prediction'].tolist(),
+                                                      explanations['bias'].tolist())]
+    session.add_all(predictions)
+    session.flush()
+    contributions = explanations[features].to_numpy(dtype=float)
+    rows = [{"prediction_id": prediction.prediction_id, "feature": feature, "contribution": contribution}
+            for prediction, values in zip(predictions, contributions.tolist())
+            for feature, contribution in zip(features, values)]
+    if rows:
+        session.execute(insert(PredictionContribution), rows)
+    session.commit()
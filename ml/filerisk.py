@@ -0,0 +1,97 @@
+import logging
+
+import numpy as np
+import pandas as pd
+
+from ml.ml import ml
+from ml.training import train_risk_classifier
+from models.file import File
+from models.filemetric import FileMetric
+from models.version import Version
+from utils.timeit import timeit
+
+# Columns of the file_metric table used as features
+FILERISK_FEATURES = ['nloc', 'token_count', 'functions', 'total_complexity', 'avg_complexity',
+                     'operands', 'operators', 'lines', 'blank_lines', 'comments',
+                     'added', 'deleted', 'commits', 'authors', 'ownership', 'legacy', 'fixes']
+
+def load_file_metrics(session, project_id: int, version_name: str = None) -> pd.DataFrame:
+    """
+    Load the file metrics of the versions of the project (of a single version if version_name is set),
+    oldest version first, with the version_id, start_date and path of each file
+    """
+    columns = [Version.version_id, Version.start_date, File.path] + \
+              [getattr(FileMetric, name) for name in FILERISK_FEATURES]
+    query = session.query(*columns) \
+        .join(Version, Version.version_id == FileMetric.version_id) \
+        .join(File, File.file_id == FileMetric.file_id) \
+        .filter(Version.project_id == project_id)
+    if version_name is not None:
+        query = query.filter(Version.name == version_name)
+    df = pd.DataFrame(query.order_by(Version.start_date).all(), columns=[column.key for column in columns])
+    df['legacy'] = df['legacy'].astype(float)
+    return df
+
+def get_file_features(files: pd.DataFrame) -> np.ndarray:
+    """Get the features of files as a single float matrix, NaN for the unknown values"""
+    return files[FILERISK_FEATURES].to_numpy(dtype=float, na_value=np.nan)
+
+def get_fixed_in_next_version(files: pd.DataFrame) -> pd.Series:
+    """Whether each file was modified by a bug fix during the next version, NaN for the last version"""
+    versions = files[['version_id', 'start_date']].drop_duplicates().sort_values('start_date')
+    next_version_ids = pd.Series(versions['version_id'].shift(-1).to_numpy(), index=versions['version_id'])
+    fixed = files.loc[files['fixes'] > 0, ['version_id', 'path']] \
+        .rename(columns={'version_id': 'next_version_id'}) \
+        .assign(fixed=1.0)
+    labels = files[['path']].assign(next_version_id=files['version_id'].map(next_version_ids)) \
+        .merge(fixed, on=['next_version_id', 'path'], how='left')
+    labels.loc[labels['next_version_id'].notna(), 'fixed'] = labels['fixed'].fillna(0.0)
+    return pd.Series(labels['fixed'].to_numpy(), index=files.index)
+
+class FileRisk(ml):
+    """
+    FileRisk scores the risk of each source file of being fixed in the next version,
+    learnt from the files of the past versions (see metrics.files)
+    """
+
+    def __init__(self, project_id, session, config):
+        ml.__init__(self, project_id, session, config)
+        self.name = "filerisk"
+
+    @timeit
+    def train(self):
+        """Train the model on the files of the past versions"""
+        logging.info("FileRisk:train")
+
+        df = load_file_metrics(self.session, self.project_id)
+        # The files of a version are labeled by the bug fixes of the next version
+        df['fixed'] = get_fixed_in_next_version(df)
+        df = df[df['fixed'].notna()].reset_index(drop=True)
+        y = df['fixed'].astype(int).to_numpy()
+        self.model, self.mse, self.training_time = train_risk_classifier(
+            get_file_features(df), y, self.configuration, self.name, "fixed and clean files")
+        self.features = FILERISK_FEATURES
+        self.trained_until = df['start_date'].max()
+        self.store()
+
+    @timeit
+    def score_files(self) -> pd.DataFrame:
+        """
+        Score all the files of the next release in a single batch
+
+        Return a frame with the path, lines, churn (added and deleted lines), commits, legacy flag
+        and risk (probability of being fixed in the next version) of each file, the riskiest first
+        """
+        logging.info("FileRisk::score_files")
+        self.restore()  # cached in memory once loaded
+        df = load_file_metrics(self.session, self.project_id, self.configuration.next_version_name)
+        scores = df[['path', 'lines', 'commits']].assign(churn=df['added'] + df['deleted'],
+                                                          legacy=df['legacy'].astype(bool))
+        scores['risk'] = self.model.predict_proba(get_file_features(df))[:, 1] if len(df) else []
+        return scores.sort_values('risk', ascending=False).reset_index(drop=True)
+
+    @timeit
+    def predict(self) -> int:
+        """Predict the number of files of the next release that will be fixed"""
+        logging.info("FileRisk::predict")
+        return round(self.score_files()['risk'].sum())
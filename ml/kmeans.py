@@ -0,0 +1,100 @@
+"""
+Clustering of the releases for the KMeans report
+
+The number of clusters is picked with the elbow method, the fits for each number of
+clusters running in parallel. The latest clusters of each project and algorithm are
+persisted under OTTM_MODEL_STORE_PATH with a fingerprint of the clustered frame, so that
+the next reports of unchanged releases don't cluster them again.
+"""
+import hashlib
+import logging
+import os
+
+import joblib
+import pandas as pd
+from joblib import Parallel, delayed
+from kneed import KneeLocator
+from sklearn.cluster import KMeans, MiniBatchKMeans
+from sklearn.preprocessing import StandardScaler
+
+from utils.timeit import timeit
+
+KMEANS, MINIBATCH = "kmeans", "minibatch"
+MAX_CLUSTERS = 10
+
+KMEANS_PARAMS = {
+    "init": "random",
+    "n_init": 10,
+    "max_iter": 300,
+    "random_state": 42,
+}
+# Fitted on batches of releases, for the datasets too large for KMeans
+MINIBATCH_PARAMS = {
+    "init": "random",
+    "n_init": 3,
+    "batch_size": 1024,
+    "random_state": 42,
+}
+
+def fit_kmeans(algorithm: str, clusters: int, features):
+    if algorithm == MINIBATCH:
+        return MiniBatchKMeans(n_clusters=clusters, **MINIBATCH_PARAMS).fit(features)
+    return KMeans(n_clusters=clusters, **KMEANS_PARAMS).fit(features)
+
+def get_fingerprint(df: pd.DataFrame, algorithm: str) -> str:
+    """Fingerprint of the values and columns of a frame, and of the clustering algorithm"""
+    digest = hashlib.sha256()
+    digest.update(repr((list(df.columns), algorithm, MAX_CLUSTERS, KMEANS_PARAMS, MINIBATCH_PARAMS)).encode("utf-8"))
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+def get_clusters_path(config, project_id: int) -> str:
+    return os.path.join(config.model_store_path, str(project_id), "kmeans", config.kmeans_algorithm + ".joblib")
+
+@timeit
+def cluster_releases(df: pd.DataFrame, config, project_id: int) -> dict:
+    """
+    Cluster the releases, or get the persisted clusters of the same frame
+
+    Parameters:
+    -----------
+    - df : pd.DataFrame
+        Features of the releases, one row per release
+    - config : Configuration
+        Algorithm (OTTM_KMEANS_ALGORITHM), jobs (OTTM_TRAINING_JOBS) and directory (OTTM_MODEL_STORE_PATH)
+    - project_id : int
+        Project Identifier
+
+    Return a dictionary with the number of clusters, the centroids (in the standardized
+    space of the features) and the cluster of each release
+    """
+    path = get_clusters_path(config, project_id)
+    fingerprint = get_fingerprint(df, config.kmeans_algorithm)
+    if os.path.exists(path):
+        persisted = joblib.load(path)
+        if persisted["fingerprint"] == fingerprint:
+            logging.info(f"Reusing the clusters of {path}")
+            return persisted["result"]
+
+    scaled_features = StandardScaler().fit_transform(df.values)
+
+    # Try to determine the number of clusters
+    candidates = range(1, min(MAX_CLUSTERS, len(scaled_features)) + 1)
+    fits = Parallel(n_jobs=config.training_jobs, prefer="threads")(
+        delayed(fit_kmeans)(config.kmeans_algorithm, k, scaled_features) for k in candidates)
+    kl = KneeLocator(candidates, [kmeans.inertia_ for kmeans in fits], curve="convex", direction="decreasing")
+    clusters = kl.elbow or 1
+    logging.info('The number of clusters: ' + str(clusters))
+
+    # The fit of the elbow is the clustering
+    kmeans = fits[clusters - 1]
+    logging.info('The lowest SSE value: ' + str(kmeans.inertia_))
+    logging.info('Final locations of the centroid: ' + str(kmeans.cluster_centers_))
+    logging.info('The number of iterations required to converge: ' + str(kmeans.n_iter_))
+
+    result = {"clusters": clusters, "centroids": kmeans.cluster_centers_, "labels": kmeans.labels_}
+    # Replaces the clusters of the previous releases
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    joblib.dump({"fingerprint": fingerprint, "result": result}, path + ".tmp")
+    os.replace(path + ".tmp", path)
+    return result
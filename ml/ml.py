@@ -1,12 +1,19 @@
 import logging
-import pickle
+import time
 from abc import abstractmethod, ABC
-from datetime import datetime
 
-from sqlalchemy import and_
+import numpy as np
+import pandas as pd
+from sklearn.metrics import mean_squared_error
 
-from utils.timeit import timeit
-from models.model import Model
+from ml.explain import explain_predictions, save_explanations
+from utils.featurestore import load_version_metrics
+from utils.modelstore import get_current_model, load_model, save_model
+
+# Outcomes of an update
+UP_TO_DATE, UPDATED, RETRAINED = "up to date", "updated", "retrained"
+# Number of most recent versions an update learns from
+UPDATE_WINDOW = 20
 
 
 class ml(ABC):
@@ -20,49 +27,51 @@ class ml(ABC):
      - configuration    Configuration
      - model            The current model
      - mse              Mean Square Error of the current model
+     - features         Features the current model was trained on
+     - training_time    Duration of the training of the current model, in seconds
+     - columns          Columns of the feature store used by the model, bugs being the target
+     - trained_until    End date of the last version the current model learnt from
     """
     
     def __init__(self, project_id, session, config):
         self.model = None
         self.name = None
+        self.columns = None
         self.mse = None
+        self.features = None
+        self.training_time = None
+        self.trained_until = None
         self.session = session
         self.project_id = project_id
         self.configuration = config
 
-    @timeit
     def store(self):
-        """Store a serialized trained model """
+        """Store the trained model as a new version"""
         logging.info('store model ' + self.name)
-        model_in_db = self.session.query(Model).filter(and_(Model.name == self.name, Model.project_id == self.project_id)).first()
-        if model_in_db is None:
-            logging.info('insert the new model')
-            model_in_db = Model(
-                project_id = self.project_id,
-                name = self.name,
-                updated_at = datetime.now(),
-                mean_squared_error = self.mse,
-                data = pickle.dumps(self.model)
-                )
-            self.session.add(model_in_db)
-            self.session.commit()
-        else:
-            logging.info('update the existing model')
-            model_in_db.updated_at = datetime.now()
-            model_in_db.mean_squared_error = self.mse
-            model_in_db.data = pickle.dumps(self.model)
-            self.session.commit()
-
-    @timeit
+        save_model(self.session, self.configuration, self.project_id, self.name, self.model, self.mse,
+                   self.features, self.training_time, self.trained_until)
+
     def restore(self):
-        """Restore a pickled model"""
+        """Restore the current version of the model"""
         logging.info('restore model ' + self.name)
-        model_in_db = self.session.query(Model).filter(and_(Model.name == self.name, Model.project_id == self.project_id)).first()
-        if model_in_db is None:
+        current_model = get_current_model(self.session, self.project_id, self.name)
+        self.model = load_model(self.session, self.project_id, self.name)
+        if self.model is None:
             logging.error('Cannot find model ' + self.name)
-            self.model = None
-        else:
-            self.model = pickle.loads(model_in_db.data)
+            return
+        self.mse = current_model.mean_squared_error
+        self.features = current_model.features.split(",") if current_model.features else None
+        self.trained_until = current_model.trained_until
+
+    def update(self) -> str:
+        """Train the model again, the models not learning from versions being trained from scratch"""
+        logging.info(f"The model {self.name} can't be updated, training it from scratch")
+        self.train()
+        return RETRAINED
+
+    def explain(self, save: bool = False) -> pd.DataFrame:
+        """Explain the predictions of the model by version, None as the model doesn't predict versions"""
+        return None
 
     @abstractmethod
     def train(self):
@@ -71,3 +80,121 @@ class ml(ABC):
     @abstractmethod
     def predict(self):
         raise NotImplementedError
+
+
+class VersionModel(ml):
+    """
+    Model predicting the bugs of a version from the columns of the feature store: it can be
+    updated with the versions completed since its training, backtested on the past versions,
+    and its predictions explained feature by feature
+    """
+
+    def update(self) -> str:
+        """
+        Update the current model with the versions completed since it was trained
+
+        The model first predicts the new versions: when its mean squared error on them exceeds
+        OTTM_DRIFT_TOLERANCE times the one of its training, the versions drifted and the model is
+        trained again from scratch. Otherwise it learns from the new versions and the most recent
+        ones (UPDATE_WINDOW versions), in a time that doesn't depend on the length of the history.
+
+        Return UP_TO_DATE, UPDATED or RETRAINED
+        """
+        self.restore()
+        if self.model is None or self.trained_until is None or not self.can_update(self.model):
+            logging.info(f"The model {self.name} can't be updated, training it from scratch")
+            self.train()
+            return RETRAINED
+
+        history = self.get_history(load_version_metrics(self.session, self.configuration, self.project_id,
+                                                        self.columns))
+        new_versions = (history['end_date'] > self.trained_until).to_numpy()
+        if not new_versions.any():
+            logging.info(f"The model {self.name} is up to date")
+            return UP_TO_DATE
+        X = self.get_features(history)
+        y = history['bugs'].to_numpy()
+        if list(X.columns) != self.features:
+            logging.info(f"The features of the model {self.name} changed, training it from scratch")
+            self.train()
+            return RETRAINED
+
+        started_at = time.perf_counter()
+        predictions = np.round(self.model.predict(X[new_versions]))
+        new_versions_mse = mean_squared_error(y[new_versions], predictions)
+        logging.info(f"Mean Square Error on {new_versions.sum()} new version(s) : {new_versions_mse}")
+        if new_versions_mse > self.configuration.drift_tolerance * max(self.mse or 0, 1):
+            logging.info(f"The new versions drifted from the model {self.name}, training it from scratch")
+            self.train()
+            return RETRAINED
+
+        window = slice(max(len(history) - max(UPDATE_WINDOW, new_versions.sum()), 0), None)
+        self.model = self.update_estimator(self.model, X.iloc[window], y[window], int(new_versions.sum()))
+        self.training_time = time.perf_counter() - started_at
+        # Measured on versions the model had not seen yet
+        self.mse = new_versions_mse
+        self.trained_until = history['end_date'].max()
+        logging.info(f"{self.name}: updated with {new_versions.sum()} version(s) in {self.training_time} seconds")
+        self.store()
+        return UPDATED
+
+    def store(self):
+        """Store the trained model as a new version, with the explanations of its predictions"""
+        ml.store(self)
+        self.explain(save=True)
+
+    def explain(self, save: bool = False) -> pd.DataFrame:
+        """
+        Explain the predictions of the current model for the past versions and the next release
+        in a single batch, feature by feature
+
+        Parameters:
+        -----------
+        - save : bool
+            Store the explanations with the contribution of each feature, done once per version
+            of the model when it is stored: the reports explain without writing to the database
+
+        Return a frame with the version_id, name, prediction, bias and the contribution of each feature
+        (one column per feature) of each version, oldest first, None if the model must be trained again
+        """
+        self.restore()
+        if self.model is None or not self.features:
+            logging.error(f"The model {self.name} must be trained again to explain its predictions")
+            return None
+
+        df = load_version_metrics(self.session, self.configuration, self.project_id, self.features)
+        df = df.dropna(subset=self.features).sort_values('start_date').reset_index(drop=True)
+        contributions = explain_predictions(self.model, df[self.features])
+        explanations = pd.concat([df[['version_id', 'name']],
+                                  contributions.sum(axis=1).rename('prediction'),
+                                  contributions], axis=1)
+        if save:
+            current_model = get_current_model(self.session, self.project_id, self.name)
+            save_explanations(self.session, current_model.model_id, explanations, self.features)
+        return explanations
+
+    def can_update(self, estimator) -> bool:
+        """Whether the stored estimator can be updated instead of trained from scratch"""
+        return False
+
+    def update_estimator(self, estimator, X_recent, y_recent, new_versions: int):
+        """
+        Get the estimator updated with the most recent versions, the last new_versions ones being new,
+        only called when can_update accepts the stored estimator
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_history(self, df):
+        """Get the past versions the model learns from, oldest first, from the frame of the feature store"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_features(self, history):
+        """Get the features of the past versions"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def create_estimator(self):
+        """Create the untrained, single-threaded estimator of the model, for the backtests"""
+        raise NotImplementedError
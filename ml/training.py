@@ -0,0 +1,100 @@
+"""
+Training modes of the models (OTTM_TRAINING_MODE)
+
+ - exact    The original training: a single random split, exact trees, one thread
+ - fast     Histogram-based trees and early stopping on all the CPUs (OTTM_TRAINING_JOBS),
+            the most recent versions being kept to evaluate the model
+ - search   fast, with the hyperparameters picked by a parallel grid search over
+            time-ordered cross-validation folds
+"""
+import logging
+import time
+from typing import Dict, List, Tuple
+
+import numpy as np
+from sklearn.metrics import brier_score_loss
+from sklearn.model_selection import GridSearchCV, TimeSeriesSplit, train_test_split
+from xgboost import XGBClassifier
+
+EXACT, FAST, SEARCH = "exact", "fast", "search"
+MAX_FOLDS = 5
+
+def is_fast_mode(config) -> bool:
+    return config.training_mode in (FAST, SEARCH)
+
+def split_time_ordered(X, y, test_size: float):
+    """Split rows sorted from the oldest to the newest version, the newest ones being the test set"""
+    return train_test_split(X, y, test_size=test_size, shuffle=False)
+
+def search_hyperparameters(estimator, grid: Dict[str, List], X, y, config) -> dict:
+    """
+    Pick the hyperparameters of an estimator in a grid, in the search training mode
+
+    Each combination is evaluated on time-ordered folds (trained on the oldest versions,
+    evaluated on the next ones), the folds being fitted in parallel by joblib.
+
+    Parameters:
+    -----------
+    - estimator : estimator
+        Estimator to tune, single-threaded as the folds are already fitted in parallel
+    - grid : Dict[str, List]
+        Values to try per hyperparameter
+    - X, y :
+        Training set, sorted from the oldest to the newest version
+    - config : Configuration
+        Training mode (OTTM_TRAINING_MODE) and jobs (OTTM_TRAINING_JOBS)
+
+    Return the best hyperparameters, an empty dictionary if no search was done
+    """
+    if config.training_mode != SEARCH:
+        return {}
+    n_splits = min(MAX_FOLDS, len(y) - 1)
+    if n_splits < 2:
+        logging.info("Not enough versions for a hyperparameter search")
+        return {}
+
+    search = GridSearchCV(estimator, grid, cv=TimeSeriesSplit(n_splits=n_splits),
+                          scoring="neg_mean_squared_error", n_jobs=config.training_jobs, refit=False)
+    search.fit(X, y)
+    logging.info(f"Best hyperparameters: {search.best_params_}, "
+                 f"cross-validated MSE: {-search.best_score_}")
+    return search.best_params_
+
+def train_risk_classifier(X, y: np.ndarray, config, name: str, classes: str) -> Tuple[XGBClassifier, float, float]:
+    """
+    Train the classifier of a risk model (e.g. commitrisk, filerisk), the most recent rows
+    evaluating it
+
+    Parameters:
+    -----------
+    - X, y :
+        Rows sorted from the oldest to the newest, y being 1 for the risky rows and 0 for the clean ones
+    - config : Configuration
+        Training jobs (OTTM_TRAINING_JOBS)
+    - name : str
+        Name of the model
+    - classes : str
+        Risky and clean rows, for the error raised when one of them is missing (e.g. "fixed and clean files")
+
+    Return the classifier, its Brier score (mean squared error of the predicted probabilities)
+    and its training time in seconds
+    """
+    if y.sum() == 0 or y.sum() == len(y):
+        raise ValueError(f"Both {classes} are needed to train the {name} model, run populate with bug issues first")
+
+    started_at = time.perf_counter()
+    X_train, X_test, y_train, y_test = split_time_ordered(X, y, test_size=0.1)
+    classifier = XGBClassifier(objective='binary:logistic',
+                               n_estimators=200,
+                               learning_rate=0.1,
+                               max_depth=6,
+                               tree_method='hist',
+                               # The risky rows are the minority
+                               scale_pos_weight=max((y_train == 0).sum(), 1) / max(y_train.sum(), 1),
+                               n_jobs=config.training_jobs,
+                               random_state=1043)
+    classifier.fit(X_train, y_train)
+    training_time = time.perf_counter() - started_at
+    mse = brier_score_loss(y_test, classifier.predict_proba(X_test)[:, 1])
+    logging.info(f"{name}: Mean Square Error : {mse}, training time : {training_time} seconds")
+    return classifier, mse, training_time
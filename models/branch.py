@@ -0,0 +1,29 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, UniqueConstraint
+from models.database import Base
+
+class Branch(Base):
+    """
+    Branch of the repository whose commits are synced into the database
+
+    Attributes
+    ----------
+    branch_id : int
+        Unique Idendtifier of the branch
+    project_id : int
+        Identifier of the project
+    name : str
+        name of the branch (e.g. "devel")
+    last_synced_head : str
+        hash of the HEAD of the branch when the commits were last synced
+    synced_at : datetime
+        date of the last sync
+    """
+    __tablename__ = "branch"
+    branch_id = Column(Integer, primary_key=True)
+    project_id = Column(Integer, ForeignKey("project.project_id"))
+    name = Column(String)
+    last_synced_head = Column(String)
+    synced_at = Column(DateTime)
+    __table_args__ = (
+        UniqueConstraint("project_id", "name"),
+    )
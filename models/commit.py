@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Float
+from sqlalchemy import Boolean, Column, Integer, String, ForeignKey, DateTime, Float, Index
 from sqlalchemy.orm import relationship, backref
 from models.database import Base
 
@@ -35,12 +35,16 @@ class Commit(Base):
         DMM metric value for the unit complexity property
     dmm_unit_interfacing : float
         DMM metric value for the unit interfacing property
+    fix : bool
+        whether the commit references a bug issue, None until the commit is labeled
+    fix_inducing : bool
+        whether lines later fixed by a bug fix commit were last changed by this commit
     """
     __tablename__ = "commit"
     commit_id = Column(Integer, primary_key=True)
     project_id = Column(Integer, ForeignKey("project.project_id"))
     hash = Column(String)
-    committer = Column(String)
+    committer = Column(String, index=True)
     date = Column(DateTime)
     message = Column(String)
     insertions = Column(Integer)
@@ -50,3 +54,9 @@ class Commit(Base):
     dmm_unit_size = Column(Float)
     dmm_unit_complexity = Column(Float)
     dmm_unit_interfacing = Column(Float)
+    fix = Column(Boolean)
+    fix_inducing = Column(Boolean)
+    __table_args__ = (
+        Index("ix_commit_project_id_hash", "project_id", "hash", unique=True),
+        Index("ix_commit_project_id_date", "project_id", "date"),
+    )
@@ -0,0 +1,41 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, Date, DateTime, UniqueConstraint
+from models.database import Base
+
+class DailyCommitStat(Base):
+    """
+    Commit statistics per day and per committer, rolled up from the commit table
+
+    Attributes
+    ----------
+    daily_commit_stat_id : int
+        Unique Idendtifier of the row
+    project_id : int
+        Identifier of the project
+    day : date
+        day of the commits
+    committer : str
+        commit committer
+    commits : int
+        number of commits of the committer that day
+    insertions : int
+        number of added lines
+    deletions : int
+        number of deleted lines
+    lines : int
+        total number of added + deleted lines
+    first_date : datetime
+        date of the first commit of the committer that day
+    """
+    __tablename__ = "daily_commit_stats"
+    daily_commit_stat_id = Column(Integer, primary_key=True)
+    project_id = Column(Integer, ForeignKey("project.project_id"))
+    day = Column(Date)
+    committer = Column(String, index=True)
+    commits = Column(Integer)
+    insertions = Column(Integer)
+    deletions = Column(Integer)
+    lines = Column(Integer)
+    first_date = Column(DateTime)
+    __table_args__ = (
+        UniqueConstraint("project_id", "day", "committer"),
+    )
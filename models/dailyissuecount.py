@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, ForeignKey, Date, UniqueConstraint
+from models.database import Base
+
+class DailyIssueCount(Base):
+    """
+    Number of issues created per day, rolled up from the issue table
+
+    Attributes
+    ----------
+    daily_issue_count_id : int
+        Unique Idendtifier of the row
+    project_id : int
+        Identifier of the project
+    day : date
+        day of creation of the issues
+    count : int
+        number of issues created that day
+    """
+    __tablename__ = "daily_issue_counts"
+    daily_issue_count_id = Column(Integer, primary_key=True)
+    project_id = Column(Integer, ForeignKey("project.project_id"))
+    day = Column(Date)
+    count = Column(Integer)
+    __table_args__ = (
+        UniqueConstraint("project_id", "day"),
+    )
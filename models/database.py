@@ -3,5 +3,8 @@ from sqlalchemy.ext.declarative import declarative_base
 Base = declarative_base()
 
 def setup_database(engine):
-    """Create the database schema from models"""
+    """Create the database schema from models and upgrade existing databases"""
+    # Imported here as the migrations depend on the models, which depend on Base
+    from models.migrations import migrate_database
     Base.metadata.create_all(bind=engine)
+    migrate_database(engine)
@@ -0,0 +1,12 @@
+from sqlalchemy import Column, Integer, String, ForeignKey
+from models.database import Base
+
+class DmmBacklog(Base):
+    """
+    Commit waiting for the computation of its DMM metrics
+    Rows are removed once the metrics are stored on the commit
+    """
+    __tablename__ = "dmm_backlog"
+    dmm_backlog_id = Column(Integer, primary_key=True)
+    project_id = Column(Integer, ForeignKey("project.project_id"))
+    hash = Column(String)
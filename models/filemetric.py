@@ -0,0 +1,50 @@
+from sqlalchemy import Boolean, Column, Integer, ForeignKey, Float, Index
+from models.database import Base
+
+class FileMetric(Base):
+    """
+    Metrics of a source file at the end of a version, one row per version and file
+
+    Attributes
+    ----------
+    nloc, token_count, functions, total_complexity, avg_complexity, operands, operators :
+        lizard values of the file
+    lines, blank_lines, comments :
+        number of lines of the file
+    added, deleted : int
+        lines added and deleted in the file during the version
+    commits : int
+        number of commits modifying the file during the version
+    authors : int
+        number of committers modifying the file during the version
+    ownership : float
+        share of the commits of the version modifying the file made by its main committer
+    legacy : bool
+        whether the file is a legacy file modified during the version
+    fixes : int
+        number of bug fix commits modifying the file during the version
+    """
+    __tablename__ = "file_metric"
+    file_metric_id = Column(Integer, primary_key=True)
+    version_id = Column(Integer, ForeignKey("version.version_id"))
+    file_id = Column(Integer, ForeignKey("file.file_id"))
+    nloc = Column(Integer)
+    token_count = Column(Integer)
+    functions = Column(Integer)
+    total_complexity = Column(Integer)
+    avg_complexity = Column(Float)
+    operands = Column(Integer)
+    operators = Column(Integer)
+    lines = Column(Integer)
+    blank_lines = Column(Integer)
+    comments = Column(Integer)
+    added = Column(Integer)
+    deleted = Column(Integer)
+    commits = Column(Integer)
+    authors = Column(Integer)
+    ownership = Column(Float)
+    legacy = Column(Boolean)
+    fixes = Column(Integer)
+    __table_args__ = (
+        Index("ix_file_metric_version_id", "version_id"),
+    )
@@ -7,6 +7,6 @@ class Legacy(Base):
     """
     __tablename__ = "legacy"
     legacy_id = Column(Integer, primary_key=True)
-    version_id = Column(Integer, ForeignKey("version.version_id"))
+    version_id = Column(Integer, ForeignKey("version.version_id"), index=True)
     file_id = Column(Integer, ForeignKey("file.file_id"))
     
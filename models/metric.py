@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, Float
+from sqlalchemy import Column, Integer, ForeignKey, Float, text
 from sqlalchemy.orm import relationship, backref
 from models.database import Base
 from models.version import Version
@@ -84,4 +84,7 @@ class Metric(Base):
     halstead_bugs = Column(Float)
 
     # legacy
-    nb_legacy_files = Column(Integer)
\ No newline at end of file
+    nb_legacy_files = Column(Integer)
+
+    # Incremented by each update of the row, so that the caches see the changes (see utils.featurestore)
+    revision = Column(Integer, default=0, onupdate=text("coalesce(revision, 0) + 1"))
@@ -0,0 +1,117 @@
+"""
+Lightweight schema migrations
+
+create_all creates the missing tables but never alters existing ones. Each migration
+upgrades an existing database in place and is recorded into the schema_version table,
+so that it is applied only once. Migrations must also be harmless on a database that
+was just created from the models, as create_all already did the job.
+Append new migrations at the end of MIGRATIONS with the next version number.
+"""
+import logging
+from datetime import datetime
+
+from sqlalchemy import delete, func, insert, inspect, select, text, update
+
+from metrics.rollups import rebuild_daily_rollups
+from models.commit import Commit
+from models.file import File
+from models.filemetric import FileMetric
+from models.issue import Issue
+from models.legacy import Legacy
+from models.metric import Metric
+from models.model import Model
+from models.ownership import Ownership
+from models.prediction import Prediction, PredictionContribution
+from models.project import Project
+from models.schemaversion import SchemaVersion
+from models.version import Version
+
+def create_missing_indexes(connection, *tables) -> None:
+    """Create the indexes declared on the models that don't exist yet in the database"""
+    inspector = inspect(connection)
+    for table in tables:
+        existing_indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing_indexes:
+                logging.info(f"Creating index {index.name}")
+                index.create(connection)
+
+def add_hot_predicates_indexes(connection) -> None:
+    # Commits were synced by date before the unique (project_id, hash) index existed
+    commit_table = Commit.__table__
+    first_commit_ids = select(func.min(commit_table.c.commit_id)) \
+        .group_by(commit_table.c.project_id, commit_table.c.hash)
+    connection.execute(delete(commit_table).where(commit_table.c.commit_id.not_in(first_commit_ids)))
+
+    create_missing_indexes(connection, commit_table, Issue.__table__, Version.__table__,
+                           Legacy.__table__, Ownership.__table__, File.__table__)
+
+def add_missing_columns(connection, table) -> None:
+    """Add the columns declared on a model that don't exist yet in the database"""
+    existing_columns = {column["name"] for column in inspect(connection).get_columns(table.name)}
+    for column in table.columns:
+        if column.name not in existing_columns:
+            logging.info(f"Adding column {table.name}.{column.name}")
+            column_type = column.type.compile(dialect=connection.dialect)
+            # Table names such as commit are reserved words
+            quote = connection.dialect.identifier_preparer.quote
+            connection.execute(text(f"ALTER TABLE {quote(table.name)} ADD COLUMN {quote(column.name)} {column_type}"))
+
+def add_model_versions(connection) -> None:
+    model_table = Model.__table__
+    add_missing_columns(connection, model_table)
+    create_missing_indexes(connection, model_table)
+    # Models were updated in place, the pickled ones are still loaded from the data column
+    connection.execute(update(model_table).where(model_table.c.version.is_(None)).values(version=1))
+
+def add_model_trained_until(connection) -> None:
+    # Models trained before are fully retrained by their first update
+    add_missing_columns(connection, Model.__table__)
+
+def add_commit_fix_labels(connection) -> None:
+    # Existing commits are labeled by the next populate
+    add_missing_columns(connection, Commit.__table__)
+
+def add_file_metrics(connection) -> None:
+    # The versions populated before get their file metrics on the next populate
+    FileMetric.__table__.create(connection, checkfirst=True)
+
+def add_predictions(connection) -> None:
+    # The predictions are explained and stored by the next reports
+    Prediction.__table__.create(connection, checkfirst=True)
+    PredictionContribution.__table__.create(connection, checkfirst=True)
+
+def add_revisions(connection) -> None:
+    # Unknown revisions count as 0, the next update of a row sets it to 1
+    add_missing_columns(connection, Version.__table__)
+    add_missing_columns(connection, Metric.__table__)
+
+def build_daily_rollups(connection) -> None:
+    for project_id, in connection.execute(select(Project.project_id)):
+        rebuild_daily_rollups(connection, project_id)
+
+MIGRATIONS = [
+    (1, "Add indexes on commits, issues, versions, legacy, ownership and files", add_hot_predicates_indexes),
+    (2, "Build the daily rollups of issues and commits", build_daily_rollups),
+    (3, "Add the versions, metadata and artifact files of the models", add_model_versions),
+    (4, "Add the end date of the last version the models learnt from", add_model_trained_until),
+    (5, "Add the bug fix and fix-inducing labels of the commits", add_commit_fix_labels),
+    (6, "Add the metrics of the files of each version", add_file_metrics),
+    (7, "Add the predictions of the models with the contributions of the features", add_predictions),
+    (8, "Add the revisions of the versions and metrics", add_revisions),
+]
+
+def migrate_database(engine) -> None:
+    """Apply the migrations that were not applied yet to the database"""
+    with engine.connect() as connection:
+        applied_versions = set(connection.execute(select(SchemaVersion.version)).scalars())
+
+    for version, description, migration in MIGRATIONS:
+        if version in applied_versions:
+            continue
+        logging.info(f"Applying migration {version}: {description}")
+        with engine.begin() as connection:
+            migration(connection)
+            connection.execute(insert(SchemaVersion).values(version=version,
+                                                            description=description,
+                                                            applied_at=datetime.now()))
@@ -1,13 +1,30 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, LargeBinary, DateTime, Float
-from sqlalchemy.orm import relationship, backref
+from sqlalchemy import Column, Integer, String, ForeignKey, LargeBinary, DateTime, Float, Index
+from sqlalchemy.orm import relationship, backref, deferred
 from models.database import Base
 
 class Model(Base):
+    """
+    Version of a trained model, the last version of a name being the current one
+    """
     __tablename__ = "model"
     model_id = Column(Integer, primary_key=True)
     project_id = Column(Integer, ForeignKey("project.project_id"))
     name = Column(String)
+    # Incremented each time the model is trained
+    version = Column(Integer)
     updated_at = Column(DateTime)
     mean_squared_error = Column(Float)
-    data = Column(LargeBinary)
+    # Comma separated list of the features the model was trained on
+    features = Column(String)
+    # Duration of the training, in seconds
+    training_time = Column(Float)
+    # End date of the last version the model learnt from
+    trained_until = Column(DateTime)
+    # Artifact file written by utils.modelstore
+    path = Column(String)
+    # Pickled model, only set on the models trained before the artifact files
+    data = deferred(Column(LargeBinary))
 
+    __table_args__ = (
+        Index("ix_model_project_id_name", "project_id", "name"),
+    )
@@ -4,7 +4,7 @@ from models.database import Base
 class Ownership(Base):
     __tablename__ = "ownership"
     ownership_id = Column(Integer, primary_key=True)
-    version_id = Column(Integer, ForeignKey("version.version_id"))
+    version_id = Column(Integer, ForeignKey("version.version_id"), index=True)
     file_id = Column(Integer, ForeignKey("file.file_id"))
     author_id = Column(Integer, ForeignKey("author.author_id"))
     added = Column(Integer)
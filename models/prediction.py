@@ -0,0 +1,41 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, Float, Index
+from models.database import Base
+
+class Prediction(Base):
+    """
+    Prediction of a version by a version of a model, explained feature by feature:
+    the value is the bias (mean prediction of the model) plus the contributions of the features
+
+    Attributes
+    ----------
+    model_id : int
+        version of the model (see models.model)
+    version_id : int
+        predicted version
+    value : float
+        predicted value
+    bias : float
+        expected value of the model, before the contributions of the features
+    """
+    __tablename__ = "prediction"
+    prediction_id = Column(Integer, primary_key=True)
+    model_id = Column(Integer, ForeignKey("model.model_id"))
+    version_id = Column(Integer, ForeignKey("version.version_id"))
+    value = Column(Float)
+    bias = Column(Float)
+    __table_args__ = (
+        Index("ix_prediction_model_id", "model_id"),
+    )
+
+class PredictionContribution(Base):
+    """
+    Contribution of a feature to a prediction, one row per prediction and feature
+    """
+    __tablename__ = "prediction_contribution"
+    prediction_contribution_id = Column(Integer, primary_key=True)
+    prediction_id = Column(Integer, ForeignKey("prediction.prediction_id"))
+    feature = Column(String)
+    contribution = Column(Float)
+    __table_args__ = (
+        Index("ix_prediction_contribution_prediction_id", "prediction_id"),
+    )
@@ -0,0 +1,9 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from models.database import Base
+
+class SchemaVersion(Base):
+    """Migration applied to the database, see models.migrations"""
+    __tablename__ = "schema_version"
+    version = Column(Integer, primary_key=True, autoincrement=False)
+    description = Column(String)
+    applied_at = Column(DateTime)
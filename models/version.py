@@ -1,5 +1,5 @@
 import logging
-from sqlalchemy import Column, Integer, String, ForeignKey, Table, DateTime, Float
+from sqlalchemy import Column, Integer, String, ForeignKey, Table, DateTime, Float, Index, text
 from sqlalchemy.orm import relationship, backref
 from sqlalchemy.ext.hybrid import hybrid_method
 from models.database import Base
@@ -33,6 +33,11 @@ class Version(Base):
     code_churn_max = Column(Integer)
     # Average code churn per file
     code_churn_avg = Column(Float)
+    # Incremented by each update of the row, so that the caches see the changes (see utils.featurestore)
+    revision = Column(Integer, default=0, onupdate=text("coalesce(revision, 0) + 1"))
+    __table_args__ = (
+        Index("ix_version_project_id_name", "project_id", "name"),
+    )
 
     @hybrid_method
     def include_filter(self, included_versions):
@@ -1,7 +1,104 @@
+import os
+import subprocess
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
 import pytest
 from dotenv import load_dotenv
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from ml.bugvelocity import BugVelocity
+from models.database import setup_database
+from models.project import Project
+from utils.modelstore import models_cache
+import models.author
 
 
 @pytest.fixture
 def helpers():
     load_dotenv()
+
+@pytest.fixture
+def session():
+    """Session of an in-memory database created from the models, with the project P (project_id 1)"""
+    engine = create_engine("sqlite://")
+    setup_database(engine)
+    session = sessionmaker(bind=engine)()
+    session.add(Project(name="P"))
+    session.commit()
+    yield session
+    session.close()
+
+def get_versions(count: int, seed: int):
+    """
+    Features of count random versions and their number of bugs, driven by bug_velocity first,
+    then by changes, noise being unrelated
+    """
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame({"bug_velocity": rng.random(count), "changes": rng.random(count), "noise": rng.random(count)})
+    return X, X["bug_velocity"].to_numpy() * 10 + X["changes"].to_numpy() * 2
+
+@pytest.fixture
+def history(monkeypatch):
+    """
+    Versions of the feature store loaded by the models, bugs being twice the bug velocity,
+    followed by the next release; add_versions appends the versions completed since
+    """
+    count = 40
+    start_dates = pd.date_range("2020-01-01", periods=count, freq="MS")
+    frame = pd.DataFrame({"version_id": range(1, count + 1), "name": [f"v{i}" for i in range(count)],
+                          "tag": [f"v{i}" for i in range(count)], "start_date": start_dates,
+                          "end_date": start_dates + pd.DateOffset(months=1), "has_metric": True,
+                          "bug_velocity": np.arange(count) % 10, "bugs": (np.arange(count) % 10) * 2.0})
+    versions = {"frame": frame}
+
+    def load_version_metrics(session, configuration, project_id, columns):
+        next_release = versions["frame"].iloc[[-1]].assign(name="Next Release", bugs=np.nan)
+        return pd.concat([versions["frame"], next_release], ignore_index=True)
+    monkeypatch.setattr("ml.ml.load_version_metrics", load_version_metrics)
+    monkeypatch.setattr("ml.bugvelocity.load_version_metrics", load_version_metrics)
+    return versions
+
+def add_versions(history, count: int, bugs_per_velocity: float) -> None:
+    frame = history["frame"]
+    start_dates = pd.date_range(frame["end_date"].iloc[-1], periods=count, freq="MS")
+    velocities = np.arange(count) % 10
+    history["frame"] = pd.concat([frame, pd.DataFrame({
+        "version_id": range(len(frame) + 1, len(frame) + count + 1), "name": [f"new{i}" for i in range(count)],
+        "tag": [f"new{i}" for i in range(count)], "start_date": start_dates,
+        "end_date": start_dates + pd.DateOffset(months=1), "has_metric": True,
+        "bug_velocity": velocities, "bugs": velocities * bugs_per_velocity})], ignore_index=True)
+
+def get_model_config(tmp_path) -> SimpleNamespace:
+    return SimpleNamespace(next_version_name="Next Release", training_mode="exact", training_jobs=1,
+                           model_store_path=str(tmp_path), model_store_compress=0, drift_tolerance=2.0)
+
+def create_trained_model(session, tmp_path):
+    """Train the bugvelocity model on the history, stored under tmp_path"""
+    models_cache.clear()
+    model = BugVelocity(1, session, get_model_config(tmp_path))
+    model.train()
+    return model
+
+@pytest.fixture
+def git_repository(tmp_path):
+    """Empty git repository whose current branch is devel"""
+    directory = tmp_path / "repository"
+    directory.mkdir()
+    subprocess.run(["git", "init", "-q", "-b", "devel"], cwd=directory, check=True)
+    return str(directory)
+
+def commit_file(directory: str, path: str, content: str, day: int, message: str = None) -> str:
+    """Commit a file on the given day of January 2022 and return the hash of the commit"""
+    with open(os.path.join(directory, path), "w") as file:
+        file.write(content)
+    date = f"2022-01-{day:02d}T12:00:00+00:00"
+    environment = {**os.environ, "GIT_AUTHOR_NAME": "dev", "GIT_AUTHOR_EMAIL": "dev@example.com",
+                   "GIT_COMMITTER_NAME": "dev", "GIT_COMMITTER_EMAIL": "dev@example.com",
+                   "GIT_AUTHOR_DATE": date, "GIT_COMMITTER_DATE": date}
+    subprocess.run(["git", "add", path], cwd=directory, check=True)
+    subprocess.run(["git", "commit", "-q", "-m", message or f"Change {path}"], cwd=directory, env=environment, check=True)
+    return subprocess.run(["git", "rev-parse", "HEAD"], cwd=directory, check=True,
+                          capture_output=True).stdout.decode("ascii").strip()
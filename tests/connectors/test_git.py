@@ -0,0 +1,113 @@
+import subprocess
+from datetime import date
+from types import SimpleNamespace
+
+from tests.__fixtures__ import *
+import connectors.git
+from connectors.git import GitConnector
+from models.branch import Branch
+from models.commit import Commit
+from models.dailycommitstat import DailyCommitStat
+from models.dmmbacklog import DmmBacklog
+
+class Connector(GitConnector):
+    """Git connector without SCM, syncing the commits of a local repository"""
+    def fetch_issues(self, since):
+        return iter([])
+
+    def fetch_releases(self):
+        return []
+
+    def save_versions(self, releases):
+        pass
+
+    def _get_issues(self, since, labels):
+        return []
+
+    def _get_releases(self, all, order_by, sort):
+        return []
+
+def sync_commits(session, directory, commit_miner="gitlog", workers=1):
+    """Sync the commits of devel, and return the hashes looked up in the database"""
+    config = SimpleNamespace(scm_path="git", exclude_authors=[], commit_miner=commit_miner,
+                             commit_miner_workers=workers)
+    connector = Connector(1, directory, None, None, "devel", session, config)
+    looked_up_hashes = []
+    get_existing_hashes = connector._get_existing_hashes
+    def record_existing_hashes(hashes):
+        looked_up_hashes.extend(hashes)
+        return get_existing_hashes(hashes)
+    connector._get_existing_hashes = record_existing_hashes
+    connector.create_commits_from_repo()
+    return looked_up_hashes
+
+def get_stored_hashes(session):
+    return [commit_hash for commit_hash, in session.query(Commit.hash).order_by(Commit.commit_id)]
+
+def test_first_sync_and_fast_forward(session, git_repository):
+    hashes = [commit_file(git_repository, "a.py", f"a = {day}\n", day) for day in range(1, 4)]
+
+    assert sync_commits(session, git_repository) == hashes
+    assert get_stored_hashes(session) == hashes
+    assert session.query(Branch.last_synced_head).one() == (hashes[-1],)
+    assert session.query(DmmBacklog).count() == 3
+
+    # Fast-forward: only the new commits are listed
+    new_hashes = [commit_file(git_repository, "a.py", f"a = {day}\n", day) for day in range(4, 6)]
+    assert sync_commits(session, git_repository) == new_hashes
+    assert get_stored_hashes(session) == hashes + new_hashes
+    assert session.query(Branch.last_synced_head).one() == (new_hashes[-1],)
+
+    # Up to date
+    assert sync_commits(session, git_repository) == []
+    assert session.query(Commit).count() == 5
+
+def test_sync_after_force_push(session, git_repository):
+    hashes = [commit_file(git_repository, "a.py", f"a = {day}\n", day) for day in range(1, 4)]
+    sync_commits(session, git_repository)
+
+    # The last commit is rewritten: the last synced head is no longer an ancestor of the branch
+    subprocess.run(["git", "reset", "-q", "--hard", "HEAD~1"], cwd=git_repository, check=True)
+    rewritten_hash = commit_file(git_repository, "a.py", "a = 'rewritten'\n", 4)
+
+    # All the commits are listed, the rewritten one replaces the unreachable one
+    assert sync_commits(session, git_repository) == hashes[:2] + [rewritten_hash]
+    assert get_stored_hashes(session) == hashes[:2] + [rewritten_hash]
+    assert session.query(Branch.last_synced_head).one() == (rewritten_hash,)
+    assert {commit_hash for commit_hash, in session.query(DmmBacklog.hash)} == set(hashes[:2] + [rewritten_hash])
+    # Counted once in the rollups, the rewritten commit being on another day
+    assert session.query(DailyCommitStat.day, DailyCommitStat.commits).order_by(DailyCommitStat.day).all() == \
+        [(date(2022, 1, day), 1) for day in (1, 2, 4)]
+
+def test_sync_deduplicates_across_chunks(session, git_repository, monkeypatch):
+    monkeypatch.setattr(connectors.git, "HASHES_QUERY_SIZE", 2)
+    hashes = [commit_file(git_repository, "a.py", f"a = {day}\n", day) for day in range(1, 6)]
+    sync_commits(session, git_repository)
+
+    # Synced again from scratch (e.g. the branch was lost), the hashes being looked up by chunks of 2
+    session.query(Branch).delete()
+    session.commit()
+    new_hash = commit_file(git_repository, "a.py", "a = 6\n", 6)
+
+    assert sync_commits(session, git_repository, commit_miner="pydriller") == hashes + [new_hash]
+    assert get_stored_hashes(session) == hashes + [new_hash]
+    assert session.query(DmmBacklog).count() == 6
+
+def test_parallel_mining_keeps_the_order(git_repository, monkeypatch):
+    monkeypatch.setattr(connectors.git, "COMMITS_BATCH_SIZE", 2)
+    for day in range(1, 12):
+        commit_file(git_repository, f"f{day % 3}.py", f"a = {day}\n", day)
+    values = {}
+    for workers in (1, 3):
+        engine = create_engine("sqlite://")
+        setup_database(engine)
+        session = sessionmaker(bind=engine)()
+        sync_commits(session, git_repository, commit_miner="pydriller", workers=workers)
+        values[workers] = session.query(Commit.hash, Commit.date, Commit.lines, Commit.files) \
+            .order_by(Commit.commit_id).all()
+        session.close()
+
+    # The chunks of the pool are stored in the order of the serial run, sorted by date
+    assert len(values[1]) == 11
+    assert values[3] == values[1]
+    assert [date for _, date, _, _ in values[3]] == sorted(date for _, date, _, _ in values[3])
@@ -0,0 +1,55 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from urllib.parse import parse_qs, urlparse
+
+from tests.__fixtures__ import *
+from connectors.githubapi import GitHubApiClient
+
+PAGES = 3
+
+class StubGitHubHandler(BaseHTTPRequestHandler):
+    """Serve PAGES pages of 2 issues and 1 pull request, page 2 is rate limited once"""
+    rate_limited = False
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)
+        page = int(query["page"][0])
+        assert query["per_page"] == ["100"]
+
+        if page == 2 and not StubGitHubHandler.rate_limited:
+            StubGitHubHandler.rate_limited = True
+            self.send_response(403)
+            self.send_header("X-RateLimit-Remaining", "0")
+            self.send_header("X-RateLimit-Reset", str(int(time.time()) - 2))
+            self.end_headers()
+            return
+
+        items = [{"number": page * 10 + i, "title": f"Issue {page}.{i}"} for i in range(2)]
+        items.append({"number": page * 10 + 9, "pull_request": {}})
+        body = json.dumps(items).encode()
+        self.send_response(200)
+        self.send_header("Link", f'<http://localhost/repos/o/r/issues?page={PAGES}&per_page=100>; rel="last"')
+        self.send_header("X-RateLimit-Remaining", "100")
+        self.send_header("X-RateLimit-Reset", str(int(time.time()) + 3600))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def test_get_issues():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubGitHubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    config = SimpleNamespace(scm_base_url=f"http://127.0.0.1:{server.server_port}", api_workers=2, http_cache_path="",
+                             api_host_concurrency=8, api_max_retries=5, retry_delay=60)
+
+    try:
+        issues = list(GitHubApiClient("token", "o/r", config).get_issues())
+    finally:
+        server.shutdown()
+
+    assert [issue["number"] for issue in issues] == [10, 11, 20, 21, 30, 31]
+    assert StubGitHubHandler.rate_limited
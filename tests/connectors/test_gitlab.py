@@ -0,0 +1,60 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+import pytest
+import requests
+from gitlab.exceptions import GitlabHttpError
+
+from tests.__fixtures__ import *
+from connectors.gitlab import GitlabClient, iterate_pages
+from utils.transport import TransportAdapter, get_source_statistics
+
+def test_iterate_pages():
+    items = list(range(23))
+    requested_pages = []
+    lock = threading.Lock()
+
+    def get_page(page):
+        with lock:
+            requested_pages.append(page)
+        return items[(page - 1) * 5:page * 5]
+
+    assert list(iterate_pages(get_page, 5, 3)) == items
+    # Pages 1 to 5 hold the items, at most 3 pages are requested beyond the last one
+    assert set(range(1, 6)) <= set(requested_pages) <= set(range(1, 9))
+
+def test_iterate_pages_empty():
+    assert list(iterate_pages(lambda page: [], 5, 2)) == []
+
+class RateLimitedHandler(BaseHTTPRequestHandler):
+    """Always answer 429 with a Retry-After hint"""
+    attempts = 0
+
+    def do_GET(self):
+        RateLimitedHandler.attempts += 1
+        self.send_response(429)
+        self.send_header("Retry-After", "0")
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+def test_gitlab_retried_by_the_transport_only():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), RateLimitedHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    config = SimpleNamespace(api_workers=1, api_host_concurrency=2, api_max_retries=2, retry_delay=0)
+    http = requests.Session()
+    http.mount("http://", TransportAdapter("gitlab-stub", config))
+    client = GitlabClient(url=f"http://127.0.0.1:{server.server_port}", session=http)
+
+    try:
+        with pytest.raises(GitlabHttpError):
+            client.http_get("/projects/1")
+    finally:
+        server.shutdown()
+
+    # The retries of the transport, without the ones of python-gitlab on top
+    assert RateLimitedHandler.attempts == 3
+    assert get_source_statistics("gitlab-stub").requests == 3
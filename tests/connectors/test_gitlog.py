@@ -0,0 +1,36 @@
+from datetime import datetime, timedelta, timezone
+
+from tests.__fixtures__ import *
+from connectors.gitlog import parse_git_log, parse_git_numstat
+
+def test_parse_git_log():
+    output = (
+        b"aaaa\x00Jane Doe\x002022-01-02T10:00:00+02:00\x00Initial commit\n\nbody\n\x00"
+        b"\n\n 2 files changed, 10 insertions(+)\n"
+        b"bbbb\x00John\x002022-01-03T10:00:00+00:00\x00empty\n\x00"
+        b"\ncccc\x00John\x002022-01-04T10:00:00+00:00\x00fix\n\x00"
+        b"\n\n 1 file changed, 3 insertions(+), 1 deletion(-)\n"
+    )
+    commits = list(parse_git_log(output))
+
+    assert [c["hash"] for c in commits] == ["aaaa", "bbbb", "cccc"]
+    assert commits[0]["committer"] == "Jane Doe"
+    assert commits[0]["date"] == datetime(2022, 1, 2, 10, tzinfo=timezone(timedelta(hours=2)))
+    assert commits[0]["message"] == "Initial commit\n\nbody"
+    assert (commits[0]["files"], commits[0]["insertions"], commits[0]["deletions"], commits[0]["lines"]) == (2, 10, 0, 10)
+    assert (commits[1]["files"], commits[1]["lines"]) == (0, 0)
+    assert (commits[2]["files"], commits[2]["insertions"], commits[2]["deletions"], commits[2]["lines"]) == (1, 3, 1, 4)
+
+def test_parse_git_log_empty():
+    assert list(parse_git_log(b"")) == []
+
+def test_parse_git_numstat():
+    output = (
+        b"\x00aaaa\x00Jane Doe\n\n10\t2\tsrc/a.py\n-\t-\tlogo.png\n"
+        b"\x00bbbb\x00John\n"
+        b"\x00cccc\x00John\n\n1\t0\tsrc/a.py\n"
+    )
+    assert list(parse_git_numstat(output)) == [("aaaa", "Jane Doe", "src/a.py", 10, 2),
+                                               ("aaaa", "Jane Doe", "logo.png", 0, 0),
+                                               ("cccc", "John", "src/a.py", 1, 0)]
+    assert list(parse_git_numstat(b"")) == []
@@ -0,0 +1,57 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from urllib.parse import parse_qs, urlparse
+
+
+from tests.__fixtures__ import *
+from connectors.jira import JiraConnector
+from models.issue import Issue
+
+TOTAL = 7
+# Page size enforced by the stand-in, below the requested one
+SERVER_PAGE_SIZE = 3
+
+class StubJiraHandler(BaseHTTPRequestHandler):
+    """Jira stand-in serving TOTAL issues by pages of SERVER_PAGE_SIZE"""
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        if url.path.endswith("/search"):
+            assert ",".join(query["fields"]) == "summary,created,updated,reporter"
+            start_at = int(query["startAt"][0])
+            issues = [{"key": f"P-{i}", "fields": {
+                          "summary": f"Issue {i}",
+                          "created": "2022-01-02T10:00:00.000+0000",
+                          "updated": "2022-01-03T10:00:00.000+0000",
+                          "reporter": {"name": "bot" if i == 4 else "jane"}}}
+                      for i in range(start_at, min(start_at + SERVER_PAGE_SIZE, TOTAL))]
+            body = {"startAt": start_at, "maxResults": SERVER_PAGE_SIZE, "total": TOTAL, "issues": issues}
+        elif url.path.endswith("/serverInfo"):
+            body = {"deploymentType": "Server", "versionNumbers": [9, 0, 0], "version": "9.0.0"}
+        else:
+            body = []
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(json.dumps(body).encode())
+
+    def log_message(self, format, *args):
+        pass
+
+def test_create_issues(session):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubJiraHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    config = SimpleNamespace(jira_base_url=f"http://127.0.0.1:{server.server_port}", jira_email="jane",
+                             jira_token="token", jira_project="P", jira_issue_type=[], issue_tags=[],
+                             exclude_issuers=["bot"], api_workers=2, http_cache_path="",
+                             api_host_concurrency=8, api_max_retries=5, retry_delay=60)
+
+    try:
+        JiraConnector(1, session, config).create_issues()
+    finally:
+        server.shutdown()
+
+    assert sorted(number for number, in session.query(Issue.number)) == ["P-0", "P-1", "P-2", "P-3", "P-5", "P-6"]
@@ -0,0 +1,50 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+import pandas as pd
+
+from tests.__fixtures__ import *
+from metrics.commits import classify_commit_messages, compute_commits_msg_quality, EMPTY, INSIGNIFICANT, ONE_WORD, VALID
+from models.commit import Commit
+from models.version import Version
+
+def test_classify_commit_messages():
+    messages = pd.Series([None, "  \n", "Fix typo", "Refactor", "Add the parser", "doc: README.md", "Hotfix"])
+    categories = classify_commit_messages(messages, ["fix", "Doc", "."])
+
+    assert categories.tolist() == [EMPTY, EMPTY, INSIGNIFICANT, ONE_WORD, VALID, INSIGNIFICANT, INSIGNIFICANT]
+
+def test_classify_commit_messages_without_words():
+    categories = classify_commit_messages(pd.Series(["fix", "fix it"]), [])
+
+    assert categories.tolist() == [ONE_WORD, VALID]
+
+def test_compute_commits_msg_quality(session):
+    versions = [Version(project_id=1, name="v1", tag="v1", start_date=datetime(2022, 1, 1), end_date=datetime(2022, 1, 10)),
+                Version(project_id=1, name="v2", tag="v2", start_date=datetime(2022, 1, 10), end_date=datetime(2022, 1, 20)),
+                # No commits
+                Version(project_id=1, name="v3", tag="v3", start_date=datetime(2022, 2, 1), end_date=datetime(2022, 2, 10))]
+    session.add_all(versions)
+    messages = [(datetime(2022, 1, 2), "Add the parser"), (datetime(2022, 1, 3), ""), (datetime(2022, 1, 4), "wip"),
+                (datetime(2022, 1, 5), "wip"),
+                # On the boundary of v1 and v2
+                (datetime(2022, 1, 10), "Add the exporter"),
+                (datetime(2022, 1, 12), "fix"), (datetime(2022, 1, 15), "Add the exporter"),
+                # Other project, and after the versions
+                (datetime(2022, 1, 15), "wip"), (datetime(2022, 3, 1), "wip")]
+    session.add_all([Commit(project_id=2 if i == 7 else 1, hash=str(i), date=date, message=message)
+                     for i, (date, message) in enumerate(messages)])
+    session.commit()
+
+    values = compute_commits_msg_quality(session, SimpleNamespace(insignificant_commits_message=["fix"]), 1, versions)
+
+    v1, v2, v3 = [values[version.version_id] for version in versions]
+    assert (v1["nb_commits"], v1["valid_commits"]) == (5, 2)
+    assert (v1["valid_commits_ratio"], v1["empty_commits_ratio"], v1["one_word_commits_ratio"],
+            v1["insignificant_commits_ratio"]) == (0.4, 0.2, 0.4, 0)
+    assert v1["frequent_messages"].values.tolist() == [["wip", 2]]
+    assert (v2["nb_commits"], v2["valid_commits"]) == (3, 2)
+    assert (v2["valid_commits_ratio"], v2["empty_commits_ratio"], v2["one_word_commits_ratio"],
+            v2["insignificant_commits_ratio"]) == (2 / 3, 0, 0, 1 / 3)
+    assert v2["frequent_messages"].values.tolist() == [["Add the exporter", 2]]
+    assert (v3["nb_commits"], v3["valid_commits"], v3["valid_commits_ratio"], v3["frequent_messages"]) == (0, 0, 0, 0)
@@ -0,0 +1,40 @@
+from tests.__fixtures__ import *
+from metrics.dmm import compute_dmm_metrics
+from models.commit import Commit
+from models.dmmbacklog import DmmBacklog
+
+FUNCTION = "def f{0}(a):\n    if a:\n        return {0}\n    return 0\n"
+# Not in the repository, e.g. lost by a force-push
+MISSING_HASH = "0" * 40
+
+def add_backlog(session, hashes):
+    session.add_all([Commit(project_id=1, hash=commit_hash) for commit_hash in hashes])
+    session.add_all([DmmBacklog(project_id=1, hash=commit_hash) for commit_hash in hashes])
+    session.commit()
+
+def get_backlog(session):
+    return {commit_hash for commit_hash, in session.query(DmmBacklog.hash)}
+
+def get_computed_hashes(session):
+    return {commit_hash for commit_hash, in session.query(Commit.hash).filter(Commit.dmm_unit_size.isnot(None))}
+
+def test_dmm_backlog_skips_missing_commits(session, git_repository):
+    content = ""
+    hashes = []
+    for day in range(1, 6):
+        content += FUNCTION.format(day)
+        hashes.append(commit_file(git_repository, "a.py", content, day))
+    add_backlog(session, hashes[:3] + [MISSING_HASH] + hashes[3:4])
+
+    compute_dmm_metrics(session, git_repository, 1, workers=2, chunk_size=2)
+
+    # The missing commit leaves the backlog without metrics, the others are computed
+    assert get_backlog(session) == set()
+    assert get_computed_hashes(session) == set(hashes[:4])
+
+    # The commits added since are computed by the next run
+    add_backlog(session, hashes[4:])
+    compute_dmm_metrics(session, git_repository, 1, workers=1, chunk_size=2)
+
+    assert get_backlog(session) == set()
+    assert get_computed_hashes(session) == set(hashes)
@@ -0,0 +1,48 @@
+import subprocess
+from datetime import datetime
+
+from tests.__fixtures__ import *
+from metrics.fixes import label_fix_inducing_commits
+from models.commit import Commit
+from models.issue import Issue
+
+def add_commits(session, directory):
+    """Store the commits of the repository, oldest first"""
+    output = subprocess.run(["git", "log", "--reverse", "--format=%H%x00%s"], cwd=directory, check=True,
+                            capture_output=True).stdout.decode("utf-8")
+    for day, line in enumerate(output.splitlines(), start=1):
+        commit_hash, message = line.split("\x00")
+        session.add(Commit(project_id=1, hash=commit_hash, message=message, date=datetime(2022, 1, day)))
+    session.commit()
+
+def get_labels(session):
+    return {commit_hash: (fix, fix_inducing) for commit_hash, fix, fix_inducing
+            in session.query(Commit.hash, Commit.fix, Commit.fix_inducing)}
+
+def test_label_fix_inducing_commits(session, git_repository):
+    base = commit_file(git_repository, "a.py", "a = 1\nb = 2\n", 1)
+    inducing = commit_file(git_repository, "a.py", "a = 1\nb = 3\n", 2, "Change b")
+    commit_file(git_repository, "b.py", "c = 1\n", 3)
+    fix = commit_file(git_repository, "a.py", "a = 1\nb = 2\n", 4, "Fix #7: restore b")
+    add_commits(session, git_repository)
+
+    # Issue 7 not synced yet: no fix
+    label_fix_inducing_commits(session, git_repository, 1, workers=1)
+    labels = get_labels(session)
+    assert set(labels.values()) == {(False, False)}
+
+    # Once the issue is synced, the commit referencing it is labeled as a fix, and the commit
+    # that last changed the lines it modifies as fix-inducing
+    session.add(Issue(project_id=1, number="7", source="git", created_at=datetime(2022, 1, 3)))
+    session.commit()
+    label_fix_inducing_commits(session, git_repository, 1, workers=1)
+
+    labels = get_labels(session)
+    assert labels[fix] == (True, False)
+    assert labels[inducing] == (False, True)
+    assert labels[base] == (False, False)
+    assert sum(fix_inducing for _, fix_inducing in labels.values()) == 1
+
+    # Labeled once
+    label_fix_inducing_commits(session, git_repository, 1, workers=1)
+    assert get_labels(session) == labels
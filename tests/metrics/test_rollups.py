@@ -0,0 +1,94 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import func
+
+from tests.__fixtures__ import *
+from importers.flatfile import FlatFileImporter
+from metrics.rollups import (count_issues, rebuild_daily_rollups, sum_commit_lines,
+                             update_daily_commit_stats, update_daily_issue_counts)
+from metrics.versions import compute_version_metrics
+from models.commit import Commit
+from models.dailycommitstat import DailyCommitStat
+from models.dailyissuecount import DailyIssueCount
+from models.issue import Issue
+from models.version import Version
+
+START = datetime(2022, 1, 1)
+
+def get_rollups(session):
+    return (sorted(session.query(DailyIssueCount.project_id, DailyIssueCount.day, DailyIssueCount.count)),
+            sorted(session.query(DailyCommitStat.project_id, DailyCommitStat.day, DailyCommitStat.committer,
+                                 DailyCommitStat.commits, DailyCommitStat.lines, DailyCommitStat.first_date)))
+
+def add_issues(session, numbers):
+    issues = [Issue(project_id=1, number=str(number), source="git", created_at=START + timedelta(hours=7 * number))
+              for number in numbers]
+    session.add_all(issues)
+    session.flush()
+    update_daily_issue_counts(session, 1, [issue.created_at for issue in issues])
+
+def add_commits(session, numbers):
+    commits = [Commit(project_id=1, hash=str(number), committer=f"dev{number % 3}", lines=number,
+                      date=START + timedelta(hours=5 * number)) for number in numbers]
+    session.add_all(commits)
+    session.flush()
+    update_daily_commit_stats(session, 1, [commit.date for commit in commits])
+
+def test_incremental_rollups_match_rebuild(session):
+    # Batches overlapping the same days, as the syncs of the connectors
+    for numbers in (range(0, 20), range(20, 30), range(30, 45)):
+        add_issues(session, numbers)
+        add_commits(session, numbers)
+    session.commit()
+    incremental = get_rollups(session)
+
+    rebuild_daily_rollups(session, 1)
+
+    assert get_rollups(session) == incremental
+    end = START + timedelta(days=9, hours=6)
+    assert count_issues(session, 1, START + timedelta(hours=3), end) == \
+        session.query(Issue).filter(Issue.created_at.between(START + timedelta(hours=3), end)).count()
+    assert sum_commit_lines(session, 1, START + timedelta(hours=3), end) == \
+        sum(lines for lines, in session.query(Commit.lines).filter(Commit.date.between(START + timedelta(hours=3), end)))
+
+def test_rebuild_drops_deleted_days(session):
+    add_issues(session, range(0, 10))
+    session.query(Issue).delete()
+
+    rebuild_daily_rollups(session, 1)
+
+    assert session.query(DailyIssueCount).count() == 0
+
+def write_issues_csv(path, numbers):
+    rows = [f"1,{number},Issue {number},{START + timedelta(hours=7 * number):%Y-%m-%d %H:%M:%S.%f},"
+            f"{START + timedelta(hours=7 * number):%Y-%m-%d %H:%M:%S.%f}" for number in numbers]
+    path.write_text("\n".join(["project_id,number,title,created_at,updated_at"] + rows))
+    return str(path)
+
+def test_import_issues_updates_rollups(session, tmp_path):
+    add_issues(session, range(0, 10))
+    session.commit()
+
+    FlatFileImporter(write_issues_csv(tmp_path / "new.csv", range(10, 20)), "issue", False, session, None).import_from_csv()
+    assert session.query(func.sum(DailyIssueCount.count)).scalar() == 20
+    incremental = get_rollups(session)
+    rebuild_daily_rollups(session, 1)
+    assert get_rollups(session) == incremental
+
+    # Overwritten, the days of the deleted issues are dropped
+    FlatFileImporter(write_issues_csv(tmp_path / "all.csv", range(15, 20)), "issue", True, session, None).import_from_csv()
+    assert session.query(func.sum(DailyIssueCount.count)).scalar() == 5
+    incremental = get_rollups(session)
+    rebuild_daily_rollups(session, 1)
+    assert get_rollups(session) == incremental
+
+def test_version_metrics_with_lagging_rollups(session):
+    # Commits inserted without their rollups, the first one in a partial day of the version
+    session.add_all([Commit(project_id=1, hash="a", committer="dev", lines=10, date=START + timedelta(hours=13)),
+                     Commit(project_id=1, hash="b", committer="dev", lines=5, date=START + timedelta(days=3))])
+    session.add(Version(project_id=1, name="v1", tag="v1", start_date=START + timedelta(hours=12),
+                        end_date=START + timedelta(days=5), code_churn_count=1))
+    session.commit()
+
+    # The committer missing from the rollups gets the first date of their commits
+    compute_version_metrics(session, "", 1)
@@ -0,0 +1,53 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from tests.__fixtures__ import *
+from ml.backtest import backtest, get_backtest_summary
+from ml.bugvelocity import BugVelocity
+from ml.commitrisk import CommitRisk
+from ml.ml import VersionModel
+
+def test_backtest():
+    versions = 12
+    df = pd.DataFrame({
+        "version_id": range(1, versions + 2),
+        "name": [f"v{i}" for i in range(versions)] + ["Next Release"],
+        "tag": [f"v{i}" for i in range(versions)] + ["main"],
+        "start_date": pd.date_range("2022-01-01", periods=versions + 1, freq="MS"),
+        "end_date": pd.date_range("2022-02-01", periods=versions + 1, freq="MS"),
+        "has_metric": True,
+        "bug_velocity": np.linspace(1, 2, versions + 1),
+        "bugs": list(range(10, 10 + versions)) + [None],
+    })
+    model = BugVelocity(1, None, SimpleNamespace(next_version_name="Next Release"))
+
+    result = backtest(model, df, min_versions=4, jobs=2)
+
+    # Every past version after the first 4 ones, trained on the versions before it
+    assert list(result["name"]) == [f"v{i}" for i in range(4, versions)]
+    assert list(result["train_versions"]) == list(range(4, versions))
+    assert list(result["actual"]) == list(range(14, 10 + versions))
+    assert (result["error"] == result["predicted"] - result["actual"]).all()
+    # The bugs only grow, a random forest can't predict beyond the versions it was trained on
+    assert (result["predicted"] <= result["actual"]).all()
+    assert get_backtest_summary(result).startswith("8 version(s) predicted")
+
+def test_backtested_models():
+    config = SimpleNamespace(next_version_name="Next Release")
+    assert isinstance(BugVelocity(1, None, config), VersionModel)
+    # Scores commits, not versions
+    assert not isinstance(CommitRisk(1, None, config), VersionModel)
+
+    class IncompleteModel(VersionModel):
+        def train(self):
+            pass
+
+        def predict(self):
+            return 0
+
+    # The hooks of the backtests and updates must be implemented
+    with pytest.raises(TypeError):
+        IncompleteModel(1, None, config)
@@ -0,0 +1,49 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+from tests.__fixtures__ import *
+from metrics.fixes import find_fix_commits
+from ml.commitrisk import CommitRisk, MESSAGE_FEATURES, NUMERIC_FEATURES, get_commit_features, load_commits
+from models.commit import Commit
+from models.version import Version
+from utils.modelstore import models_cache
+
+def test_find_fix_commits():
+    messages = pd.Series(["Fix #12 on login", "Refactor #7", "PROJ-3: fix the parser", None, "Bump to 1.2"])
+    assert find_fix_commits(messages, ["12", "PROJ-3"]).tolist() == [True, False, True, False, False]
+    assert find_fix_commits(messages, []).tolist() == [False] * 5
+
+def test_commitrisk(session, tmp_path):
+    rng = np.random.default_rng(0)
+    start = datetime(2022, 1, 1)
+    for i in range(600):
+        # Large commits about the parser induce bugs
+        risky = i % 5 == 0
+        session.add(Commit(project_id=1, hash=f"h{i}", committer=f"dev{i % 7}", date=start + timedelta(hours=i),
+                           message="rewrite the parser" if risky else "update the docs",
+                           insertions=int(rng.integers(200, 400) if risky else rng.integers(1, 20)),
+                           deletions=1, lines=0, files=3 if risky else 1,
+                           fix=i < 550, fix_inducing=risky and i < 550))
+    session.add(Version(project_id=1, name="Next Release", start_date=start + timedelta(hours=550),
+                        end_date=start + timedelta(hours=700)))
+    session.commit()
+    config = SimpleNamespace(next_version_name="Next Release", training_jobs=1,
+                             model_store_path=str(tmp_path), model_store_compress=3)
+
+    commits = load_commits(session, 1)
+    assert commits.loc[commits['committer'] == "dev0", 'committer_experience'].tolist()[:3] == [0, 1, 2]
+    assert get_commit_features(commits).shape == (600, len(NUMERIC_FEATURES) + MESSAGE_FEATURES)
+
+    model = CommitRisk(1, session, config)
+    model.train()
+    assert model.mse < 0.1
+
+    # The 50 commits of the next release are scored in a single batch
+    models_cache.clear()
+    scores = CommitRisk(1, session, config).score_commits()
+    assert len(scores) == 50
+    assert (scores['message'].head(10) == "rewrite the parser").all()
+    assert CommitRisk(1, session, config).predict() == 10
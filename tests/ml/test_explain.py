@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+from sqlalchemy import event, func
+from xgboost import XGBRegressor
+
+from tests.__fixtures__ import *
+from ml.explain import explain_predictions, save_explanations
+from models.prediction import Prediction, PredictionContribution
+
+def test_explain_forest():
+    X, y = get_versions(100, 0)
+    forest = RandomForestRegressor(n_estimators=50, random_state=1043).fit(X, y)
+
+    explanations = explain_predictions(forest, X)
+
+    # The bias plus the contributions is the prediction
+    assert list(explanations.columns) == ["bias", "bug_velocity", "changes", "noise"]
+    assert np.allclose(explanations.sum(axis=1), forest.predict(X))
+    contributions = explanations.drop(columns="bias").abs().mean()
+    assert contributions.idxmax() == "bug_velocity" and contributions.idxmin() == "noise"
+
+def test_explain_boosting():
+    X, y = get_versions(100, 0)
+    pipeline = make_pipeline(StandardScaler(), XGBRegressor(n_estimators=50, random_state=1043)).fit(X, y)
+
+    explanations = explain_predictions(pipeline, X)
+
+    assert np.allclose(explanations.sum(axis=1), pipeline.predict(X), atol=1e-4)
+    assert explanations.drop(columns="bias").abs().mean().idxmax() == "bug_velocity"
+
+def test_save_explanations(session):
+    X, y = get_versions(20, 0)
+    forest = RandomForestRegressor(n_estimators=10, random_state=1043).fit(X, y)
+    contributions = explain_predictions(forest, X)
+    explanations = pd.concat([pd.DataFrame({"version_id": range(1, 21)}),
+                              contributions.sum(axis=1).rename("prediction"), contributions], axis=1)
+
+    save_explanations(session, 1, explanations, list(X.columns))
+    # Storing the explanations again replaces them
+    save_explanations(session, 1, explanations, list(X.columns))
+
+    assert session.query(Prediction).filter(Prediction.model_id == 1).count() == 20
+    assert session.query(PredictionContribution).count() == 20 * 3
+    prediction = session.query(Prediction).filter(Prediction.version_id == 5).one()
+    stored = session.query(func.sum(PredictionContribution.contribution)) \
+        .filter(PredictionContribution.prediction_id == prediction.prediction_id).scalar()
+    assert np.isclose(prediction.bias + stored, forest.predict(X)[4])
+
+def test_explanations_stored_once_per_model_version(session, tmp_path, history):
+    model = create_trained_model(session, tmp_path)
+    # Stored with the new version of the model
+    assert session.query(Prediction).count() == len(history["frame"]) + 1
+
+    commits = []
+    event.listen(session, "after_commit", commits.append)
+    explanations = model.explain()
+
+    # The reports explain the predictions without writing
+    assert explanations["name"].iloc[-1] == "Next Release"
+    assert round(explanations["prediction"].iloc[-1]) == model.predict()
+    assert np.allclose(explanations[["bias", "bug_velocity"]].sum(axis=1), explanations["prediction"])
+    assert commits == []
+    assert session.query(Prediction).count() == len(history["frame"]) + 1
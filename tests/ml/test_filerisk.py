@@ -0,0 +1,66 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import insert
+
+from tests.__fixtures__ import *
+from metrics.files import aggregate_file_changes
+from ml.filerisk import FileRisk, get_fixed_in_next_version, load_file_metrics
+from models.file import File
+from models.filemetric import FileMetric
+from models.version import Version
+from utils.modelstore import models_cache
+
+def test_aggregate_file_changes():
+    changes = pd.DataFrame([("h1", "jane", "a.py", 10, 2), ("h2", "jane", "a.py", 1, 1),
+                            ("h3", "john", "a.py", 5, 0), ("h3", "john", "b.py", 3, 3)],
+                           columns=["hash", "committer", "path", "added", "deleted"])
+    df = aggregate_file_changes(changes, ["h2"]).set_index("path")
+    assert df.loc["a.py", ["added", "deleted", "commits", "authors", "fixes"]].tolist() == [16, 3, 3, 2, 1]
+    assert df.loc["a.py", "ownership"] == 2 / 3
+    assert df.loc["b.py", ["commits", "ownership", "fixes"]].tolist() == [1, 1.0, 0]
+
+def test_get_fixed_in_next_version():
+    files = pd.DataFrame({"version_id": [1, 1, 2, 2, 3],
+                          "start_date": pd.to_datetime(["2022-01-01"] * 2 + ["2022-02-01"] * 2 + ["2022-03-01"]),
+                          "path": ["a.py", "b.py", "a.py", "b.py", "a.py"],
+                          "fixes": [0, 0, 0, 2, 1]})
+    labels = get_fixed_in_next_version(files)
+    assert labels[:4].tolist() == [0.0, 1.0, 1.0, 0.0]
+    assert np.isnan(labels[4])
+
+def test_filerisk(session, tmp_path):
+    start = datetime(2022, 1, 1)
+    names = [f"v{i}" for i in range(5)] + ["Next Release"]
+    session.add_all([Version(project_id=1, name=name, start_date=start + timedelta(days=30 * i),
+                             end_date=start + timedelta(days=30 * (i + 1))) for i, name in enumerate(names)])
+    session.add_all([File(path=f"src/f{i}.py") for i in range(1, 401)])
+    session.flush()
+    rng = np.random.default_rng(0)
+    rows = []
+    for version_id in range(1, 7):
+        for file_id in range(1, 401):
+            # Complex files are fixed
+            complex_file = file_id % 4 == 0
+            rows.append({"version_id": version_id, "file_id": file_id, "nloc": int(rng.integers(10, 500)),
+                         "total_complexity": 100 if complex_file else 5, "commits": int(rng.integers(0, 5)),
+                         "legacy": False, "fixes": int(complex_file), "added": 1, "deleted": 1})
+    session.execute(insert(FileMetric), rows)
+    session.commit()
+    config = SimpleNamespace(next_version_name="Next Release", training_jobs=1,
+                             model_store_path=str(tmp_path), model_store_compress=3)
+
+    assert len(load_file_metrics(session, 1, "Next Release")) == 400
+
+    model = FileRisk(1, session, config)
+    model.train()
+    assert model.mse < 0.05
+
+    # The 400 files of the next release are scored in a single batch
+    models_cache.clear()
+    scores = FileRisk(1, session, config).score_files()
+    assert len(scores) == 400
+    assert scores['path'].head(100).str.extract(r"(\d+)")[0].astype(int).mod(4).eq(0).all()
+    assert FileRisk(1, session, config).predict() == 100
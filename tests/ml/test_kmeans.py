@@ -0,0 +1,45 @@
+import os
+from types import SimpleNamespace
+
+import pandas as pd
+from sklearn.datasets import make_blobs
+
+from tests.__fixtures__ import *
+import ml.kmeans
+from ml.kmeans import cluster_releases
+
+def test_cluster_releases(tmp_path, monkeypatch):
+    features, _ = make_blobs(n_samples=60, centers=3, n_features=5, random_state=0)
+    df = pd.DataFrame(features, columns=["avg_team_xp", "changes", "bug_velocity", "code_churn_avg",
+                                         "lizard_avg_complexity"])
+    config = SimpleNamespace(model_store_path=str(tmp_path), kmeans_algorithm="kmeans", training_jobs=2)
+    fits = []
+    fit_kmeans = ml.kmeans.fit_kmeans
+    def count_fits(algorithm, clusters, features):
+        fits.append(algorithm)
+        return fit_kmeans(algorithm, clusters, features)
+    monkeypatch.setattr(ml.kmeans, "fit_kmeans", count_fits)
+
+    clustering = cluster_releases(df, config, 1)
+    assert clustering["clusters"] == 3
+    assert clustering["centroids"].shape == (3, 5)
+    assert len(set(clustering["labels"])) == 3
+    assert len(fits) == 10
+
+    # Unchanged releases are not clustered again
+    assert list(cluster_releases(df, config, 1)["labels"]) == list(clustering["labels"])
+    assert len(fits) == 10
+
+    # A changed release is clustered again, replacing the previous clusters
+    df.loc[0, "changes"] += 1
+    cluster_releases(df, config, 1)
+    assert len(fits) == 20
+    assert os.listdir(tmp_path / "1" / "kmeans") == ["kmeans.joblib"]
+
+    # The latest clusters are kept per algorithm and per project
+    config.kmeans_algorithm = "minibatch"
+    assert cluster_releases(df, config, 1)["clusters"] == 3
+    cluster_releases(df, config, 2)
+    assert fits[20:] == ["minibatch"] * 20
+    assert sorted(os.listdir(tmp_path / "1" / "kmeans")) == ["kmeans.joblib", "minibatch.joblib"]
+    assert os.listdir(tmp_path / "2" / "kmeans") == ["minibatch.joblib"]
@@ -0,0 +1,87 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.model_selection import TimeSeriesSplit
+
+from tests.__fixtures__ import *
+from ml.codemetrics import CODEMETRICS_COLUMNS, EARLY_STOPPING_ROUNDS, FAST_XGBOOST_PARAMS, CodeMetrics
+from ml.training import EXACT, FAST, MAX_FOLDS, SEARCH, search_hyperparameters, split_time_ordered, \
+    train_risk_classifier
+
+GRID = {"max_depth": [2, 4]}
+
+def get_training_config(mode: str) -> SimpleNamespace:
+    return SimpleNamespace(next_version_name="Next Release", training_mode=mode, training_jobs=1)
+
+def test_split_time_ordered():
+    X, y = get_versions(20, 0)
+
+    X_train, X_test, y_train, y_test = split_time_ordered(X, y, test_size=0.25)
+
+    # The newest versions are the test set, in their order
+    assert list(X_train.index) == list(range(15)) and list(X_test.index) == list(range(15, 20))
+    assert np.array_equal(np.concatenate([y_train, y_test]), y)
+
+def test_search_hyperparameters_only_in_search_mode():
+    X, y = get_versions(20, 0)
+    estimator = RandomForestRegressor(n_estimators=5, random_state=1043)
+
+    for mode in (EXACT, FAST):
+        assert search_hyperparameters(estimator, GRID, X, y, get_training_config(mode)) == {}
+    assert search_hyperparameters(estimator, GRID, X, y, get_training_config(SEARCH))["max_depth"] in GRID["max_depth"]
+
+def test_search_hyperparameters_folds(monkeypatch):
+    folds = []
+    def record_folds(n_splits):
+        folds.append(n_splits)
+        return TimeSeriesSplit(n_splits=n_splits)
+    monkeypatch.setattr("ml.training.TimeSeriesSplit", record_folds)
+    estimator = RandomForestRegressor(n_estimators=5, random_state=1043)
+    config = get_training_config(SEARCH)
+
+    # At most MAX_FOLDS folds, one less than the versions for the short histories
+    for count in (30, 4):
+        X, y = get_versions(count, 0)
+        search_hyperparameters(estimator, GRID, X, y, config)
+    assert folds == [MAX_FOLDS, 3]
+
+    # Not enough versions for two folds
+    X, y = get_versions(2, 0)
+    assert search_hyperparameters(estimator, GRID, X, y, config) == {}
+    assert folds == [MAX_FOLDS, 3]
+
+def test_fast_mode_early_stopping(monkeypatch):
+    X, y = get_versions(80, 0)
+    frame = pd.DataFrame({name: np.nan for name in CODEMETRICS_COLUMNS}, index=X.index)
+    frame[["bug_velocity", "total_lines"]] = X[["bug_velocity", "changes"]]
+    frame["bugs"] = y
+    frame = frame.assign(name=[f"v{i}" for i in range(80)], has_metric=True,
+                         end_date=pd.date_range("2015-01-01", periods=80, freq="MS"))
+    monkeypatch.setattr("ml.codemetrics.load_version_metrics", lambda *args: frame)
+    model = CodeMetrics(1, None, get_training_config(FAST))
+    monkeypatch.setattr(model, "store", lambda: None)
+
+    model.train()
+
+    # Trees are added until the validation versions are no longer better predicted
+    regressor = model.model.named_steps["xgbregressor"]
+    rounds = regressor.get_booster().num_boosted_rounds()
+    assert rounds == regressor.best_iteration + 1 + EARLY_STOPPING_ROUNDS
+    assert rounds < FAST_XGBOOST_PARAMS["n_estimators"]
+    assert model.features == ["bug_velocity", "total_lines"]
+
+def test_train_risk_classifier():
+    X, y = get_versions(200, 0)
+    risky = (y > 8).astype(int)
+    config = get_training_config(FAST)
+
+    classifier, brier_score, training_time = train_risk_classifier(X, risky, config, "risk", "risky and clean rows")
+
+    assert 0 < risky.mean() < 0.5
+    assert 0 <= brier_score < 0.25 and training_time > 0
+    assert classifier.predict_proba(X).shape == (200, 2)
+    # The classifier needs both classes
+    with pytest.raises(ValueError, match="Both risky and clean rows are needed to train the risk model"):
+        train_risk_classifier(X, np.zeros(200, dtype=int), config, "risk", "risky and clean rows")
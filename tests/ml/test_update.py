@@ -0,0 +1,105 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+from xgboost import XGBRegressor
+
+from tests.__fixtures__ import *
+from ml.bugvelocity import BugVelocity, UPDATE_TREES_PER_VERSION
+from ml.codemetrics import CodeMetrics, UPDATE_ROUNDS_PER_VERSION
+from ml.ml import RETRAINED, UPDATE_WINDOW, UPDATED, UP_TO_DATE
+from models.model import Model
+
+CONFIG = SimpleNamespace(next_version_name="Next Release")
+
+def test_update_forest():
+    X, y = get_versions(30, 0)
+    forest = RandomForestRegressor(n_estimators=100, random_state=1043).fit(X, y)
+    X_recent, y_recent = get_versions(10, 1)
+
+    updated = BugVelocity(1, None, CONFIG).update_estimator(forest, X_recent, y_recent, 2)
+
+    # The oldest trees are replaced, the stored forest is unchanged
+    assert len(updated.estimators_) == len(forest.estimators_) == 100
+    assert updated.estimators_[:100 - 2 * UPDATE_TREES_PER_VERSION] == forest.estimators_[2 * UPDATE_TREES_PER_VERSION:]
+    assert not np.array_equal(updated.predict(X_recent), forest.predict(X_recent))
+
+def test_update_boosting():
+    X, y = get_versions(30, 0)
+    pipeline = make_pipeline(StandardScaler(), XGBRegressor(n_estimators=50, random_state=1043)).fit(X, y)
+    X_recent, y_recent = get_versions(10, 1)
+
+    updated = CodeMetrics(1, None, CONFIG).update_estimator(pipeline, X_recent, y_recent, 3)
+
+    booster = updated.named_steps['xgbregressor'].get_booster()
+    assert booster.num_boosted_rounds() == 50 + 3 * UPDATE_ROUNDS_PER_VERSION
+    assert pipeline.named_steps['xgbregressor'].get_booster().num_boosted_rounds() == 50
+    assert updated.named_steps['standardscaler'] is pipeline.named_steps['standardscaler']
+
+def test_update_early_stopped_boosting():
+    X, y = get_versions(60, 0)
+    scaler = StandardScaler().fit(X)
+    regressor = XGBRegressor(n_estimators=1000, early_stopping_rounds=5, random_state=1043) \
+        .fit(scaler.transform(X[:40]), y[:40], eval_set=[(scaler.transform(X[40:]), y[40:])], verbose=False)
+    pipeline = make_pipeline(scaler, regressor)
+    X_recent, _ = get_versions(10, 1)
+
+    updated = CodeMetrics(1, None, CONFIG).update_estimator(pipeline, X_recent, -y[:10], 2)
+
+    # The new rounds follow the best iteration and are used by the predictions
+    booster = updated.named_steps['xgbregressor'].get_booster()
+    assert booster.num_boosted_rounds() == regressor.best_iteration + 1 + 2 * UPDATE_ROUNDS_PER_VERSION
+    assert getattr(updated.named_steps['xgbregressor'], 'best_iteration', None) is None
+    assert not np.array_equal(updated.predict(X_recent), pipeline.predict(X_recent))
+
+def get_model_versions(session) -> int:
+    return session.query(Model).filter(Model.name == "bugvelocity").count()
+
+def test_update_up_to_date(session, tmp_path, history):
+    model = create_trained_model(session, tmp_path)
+
+    assert model.update() == UP_TO_DATE
+    assert get_model_versions(session) == 1
+
+def test_update_new_versions(session, tmp_path, history, monkeypatch):
+    model = create_trained_model(session, tmp_path)
+    trained_until = model.trained_until
+    add_versions(history, 3, 2.0)
+    windows = []
+    update_estimator = BugVelocity.update_estimator
+    def spy(self, estimator, X_recent, y_recent, new_versions):
+        windows.append((len(X_recent), new_versions))
+        return update_estimator(self, estimator, X_recent, y_recent, new_versions)
+    monkeypatch.setattr(BugVelocity, "update_estimator", spy)
+
+    assert model.update() == UPDATED
+
+    # The model learns from the most recent versions only, the new ones included
+    assert windows == [(UPDATE_WINDOW, 3)]
+    assert get_model_versions(session) == 2
+    assert model.trained_until > trained_until
+    assert model.update() == UP_TO_DATE
+
+def test_update_drift(session, tmp_path, history, monkeypatch):
+    model = create_trained_model(session, tmp_path)
+    # Ten times more bugs per bug velocity than before
+    add_versions(history, 3, 20.0)
+    monkeypatch.setattr(BugVelocity, "update_estimator", lambda *args: pytest.fail("drifted model updated"))
+
+    assert model.update() == RETRAINED
+    assert get_model_versions(session) == 2
+
+def test_update_changed_features(session, tmp_path, history, monkeypatch):
+    model = create_trained_model(session, tmp_path)
+    # Stored by a version of the model with other features
+    session.query(Model).update({Model.features: "bug_velocity,changes"})
+    session.commit()
+    add_versions(history, 3, 2.0)
+    monkeypatch.setattr(BugVelocity, "update_estimator", lambda *args: pytest.fail("model with other features updated"))
+
+    assert model.update() == RETRAINED
+    assert get_model_versions(session) == 2
+    assert model.features == ["bug_velocity"]
@@ -0,0 +1,78 @@
+from datetime import datetime
+
+from sqlalchemy import Column, ForeignKey, MetaData, Table, create_engine, inspect, insert
+from sqlalchemy.orm import sessionmaker
+
+from tests.__fixtures__ import *
+from models.commit import Commit
+from models.database import Base, setup_database
+from models.migrations import MIGRATIONS
+from models.model import Model
+from models.schemaversion import SchemaVersion
+
+# Tables and columns added to the schema of the first releases, which had no migrations
+NEW_TABLES = ["branch", "daily_commit_stats", "daily_issue_counts", "dmm_backlog", "file_metric",
+              "prediction", "prediction_contribution", "schema_version"]
+NEW_COLUMNS = {"commit": ["fix", "fix_inducing"],
+               "metric": ["revision"], "model": ["version", "features", "training_time", "trained_until", "path"],
+               "version": ["revision"]}
+
+def create_first_schema(engine) -> None:
+    """Create the schema of the first releases: the tables of the time, without the columns and indexes added since"""
+    metadata = MetaData()
+    for table in Base.metadata.sorted_tables:
+        if table.name in NEW_TABLES:
+            continue
+        Table(table.name, metadata,
+              *[Column(column.name, column.type, *[ForeignKey(key.target_fullname) for key in column.foreign_keys],
+                       primary_key=column.primary_key)
+                for column in table.columns if column.name not in NEW_COLUMNS.get(table.name, [])])
+    metadata.create_all(engine)
+
+def test_migrate_first_schema():
+    engine = create_engine("sqlite://")
+    create_first_schema(engine)
+    with engine.begin() as connection:
+        connection.execute(insert(Table("commit", MetaData(), autoload_with=engine)),
+                           [{"commit_id": 1, "project_id": 1, "hash": "a", "date": datetime(2022, 1, 1)}])
+        connection.execute(insert(Table("model", MetaData(), autoload_with=engine)),
+                           [{"model_id": 1, "project_id": 1, "name": "bugvelocity"}])
+
+    setup_database(engine)
+
+    session = sessionmaker(bind=engine)()
+    applied = [version for version, in session.query(SchemaVersion.version).order_by(SchemaVersion.version)]
+    assert applied == [version for version, _, _ in MIGRATIONS]
+    # The columns added since are there, the existing rows unlabeled
+    assert session.query(Commit.hash, Commit.fix, Commit.fix_inducing).all() == [("a", None, None)]
+    assert session.query(Model.name, Model.version, Model.path).all() == [("bugvelocity", 1, None)]
+    assert set(Base.metadata.tables) <= set(inspect(engine).get_table_names())
+
+    # Applied migrations are not applied again
+    setup_database(engine)
+    assert session.query(SchemaVersion).count() == len(MIGRATIONS)
+
+def test_deduplicate_commits():
+    engine = create_engine("sqlite://")
+    create_first_schema(engine)
+    with engine.begin() as connection:
+        connection.execute(insert(Table("commit", MetaData(), autoload_with=engine)), [
+            {"commit_id": 1, "project_id": 1, "hash": "a", "message": "first"},
+            {"commit_id": 2, "project_id": 1, "hash": "b", "message": "first"},
+            # Synced again by date
+            {"commit_id": 3, "project_id": 1, "hash": "a", "message": "again"},
+            {"commit_id": 4, "project_id": 1, "hash": "b", "message": "again"},
+            {"commit_id": 5, "project_id": 2, "hash": "a", "message": "first"}])
+
+    setup_database(engine)
+
+    # The first row of each (project_id, hash) is kept
+    session = sessionmaker(bind=engine)()
+    assert session.query(Commit.commit_id, Commit.project_id, Commit.hash, Commit.message) \
+        .order_by(Commit.commit_id).all() == [(1, 1, "a", "first"), (2, 1, "b", "first"), (5, 2, "a", "first")]
+    inspector = inspect(engine)
+    for table in ("commit", "issue", "version", "legacy", "ownership", "file"):
+        assert {index.name for index in Base.metadata.tables[table].indexes} <= \
+            {index["name"] for index in inspector.get_indexes(table)}
+    assert next(index for index in inspector.get_indexes("commit")
+                if index["name"] == "ix_commit_project_id_hash")["unique"]
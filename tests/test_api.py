@@ -0,0 +1,46 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from tests.__fixtures__ import *
+from api import BugPredictionApi
+from models.commit import Commit
+from models.file import File
+from models.issue import Issue
+from models.legacy import Legacy
+from models.project import Project
+from models.version import Version
+
+def create_api(session) -> BugPredictionApi:
+    session.add(Project(name="Other"))
+    session.flush()
+    start = datetime(2022, 1, 1)
+    session.add_all([Commit(project_id=1, hash=f"h{i}", date=start + timedelta(days=i), message=f"m{i}", lines=i)
+                     for i in range(25)])
+    session.add(Commit(project_id=2, hash="other", date=start, message="other", lines=0))
+    session.add_all([Issue(project_id=1, number=str(i), source="git", title=f"t{i}",
+                           created_at=start + timedelta(days=i)) for i in range(3)])
+    session.add(Version(project_id=1, name="1.0", tag="1.0", start_date=start, end_date=start + timedelta(days=10)))
+    session.add(File(path="src/a.py", language="Python"))
+    session.flush()
+    session.add(Legacy(version_id=1, file_id=1))
+    session.commit()
+    return BugPredictionApi(SimpleNamespace(source_project="P"), session)
+
+def test_api(session):
+    api = create_api(session)
+
+    commits = api.commits(["hash", "lines"])
+    assert list(commits.columns) == ["hash", "lines"]
+    assert commits["hash"].tolist() == [f"h{i}" for i in range(25)]
+
+    chunks = list(api.commits(["hash"], chunksize=10))
+    assert [len(chunk) for chunk in chunks] == [10, 10, 5]
+    assert chunks[2]["hash"].tolist()[-1] == "h24"
+
+    assert api.issues(["number", "title"])["title"].tolist() == ["t0", "t1", "t2"]
+    assert api.legacy_files()[["version_id", "path"]].values.tolist() == [[1, "src/a.py"]]
+
+    with pytest.raises(ValueError):
+        api.commits(["password"])
@@ -0,0 +1,31 @@
+from datetime import datetime
+
+from sqlalchemy.orm import sessionmaker
+
+from tests.__fixtures__ import *
+from models.metric import Metric
+from models.version import Version
+from utils.featurestore import get_database_state, METRIC_COLUMNS, VERSION_COLUMNS
+
+def test_database_state_changes_with_updates(session):
+    session.add(Version(project_id=1, name="v1", tag="v1", start_date=datetime(2022, 1, 1),
+                        end_date=datetime(2022, 2, 1), bugs=3))
+    session.commit()
+    session.add(Metric(version_id=1, total_lines=100))
+    session.commit()
+    state = get_database_state(session, 1)
+    assert get_database_state(session, 1) == state
+
+    # Updated in place by another process, the counts and the ids unchanged
+    other_session = sessionmaker(bind=session.get_bind())()
+    other_session.query(Version).filter(Version.version_id == 1).one().bugs = 9
+    other_session.commit()
+    updated_state = get_database_state(session, 1)
+    assert updated_state != state
+
+    other_session.query(Metric).filter(Metric.version_id == 1).update({Metric.total_lines: 120})
+    other_session.commit()
+    assert get_database_state(session, 1) != updated_state
+
+def test_revisions_not_exported():
+    assert "revision" not in VERSION_COLUMNS + METRIC_COLUMNS
@@ -0,0 +1,57 @@
+import threading
+from types import SimpleNamespace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from tests.__fixtures__ import *
+from utils.httpcache import HttpCache
+from utils.transport import TransportAdapter
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Serve a body per path with an ETag, answer 304 when the ETag matches"""
+    requests_count = 0
+
+    def do_GET(self):
+        StubHandler.requests_count += 1
+        etag = f'"{self.path}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        body = self.path.encode() * 10
+        self.send_response(200)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def test_http_cache(tmp_path):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}"
+    # Room for two bodies of 20 bytes
+    cache = HttpCache(str(tmp_path / "cache.sqlite"), 45)
+    http = requests.Session()
+    config = SimpleNamespace(api_workers=1, api_host_concurrency=8, api_max_retries=0, retry_delay=60)
+    http.mount("http://", TransportAdapter("test", config, cache))
+
+    try:
+        first = http.get(url + "/a")
+        second = http.get(url + "/a")
+        http.get(url + "/b")
+        http.get(url + "/c")
+        evicted = http.get(url + "/a")
+    finally:
+        server.shutdown()
+
+    assert first.text == second.text == evicted.text == "/a" * 10
+    assert second.status_code == 200 and second.from_cache
+    assert not hasattr(evicted, "from_cache")
+    assert StubHandler.requests_count == 5
+    statistics = cache.get_statistics()
+    assert (statistics["hits"], statistics["misses"], statistics["entries"]) == (1, 4, 2)
@@ -0,0 +1,45 @@
+import time
+from datetime import datetime
+
+
+from tests.__fixtures__ import *
+from models.issue import Issue
+from utils.ingestion import ingest
+
+DELAY = 0.3
+
+class StubConnector:
+    """Fetch 3 issues, then releases, each fetch taking DELAY seconds"""
+
+    def __init__(self, prefix):
+        self.prefix = prefix
+        self.saved_releases = None
+
+    def get_last_issue_date(self):
+        return None
+
+    def fetch_issues(self, since):
+        time.sleep(DELAY)
+        for number in range(3):
+            yield (f"{self.prefix}-{number}", f"Issue {number}", datetime(2022, 1, number + 1), None)
+
+    def fetch_releases(self):
+        time.sleep(DELAY)
+        return ["v1", "v2"]
+
+    def save_versions(self, releases):
+        self.saved_releases = releases
+
+def test_ingest(session):
+    git = StubConnector("G")
+
+    started_at = time.monotonic()
+    ingest(session, 1, {"git": git, "jira": StubConnector("J")}, git)
+    elapsed = time.monotonic() - started_at
+
+    # The three sources are fetched at the same time
+    assert elapsed < 2 * DELAY
+    assert git.saved_releases == ["v1", "v2"]
+    issues = session.query(Issue.source, Issue.number).order_by(Issue.number).all()
+    assert issues == [("git", "G-0"), ("git", "G-1"), ("git", "G-2"),
+                      ("jira", "J-0"), ("jira", "J-1"), ("jira", "J-2")]
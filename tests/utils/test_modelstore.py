@@ -0,0 +1,42 @@
+import pickle
+from types import SimpleNamespace
+
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+
+from tests.__fixtures__ import *
+from models.model import Model
+from utils.modelstore import get_current_model, load_model, models_cache, save_model
+
+def test_model_versions(session, tmp_path):
+    X = np.random.default_rng(0).random((500, 3))
+    y = X.sum(axis=1)
+    estimator = RandomForestRegressor(n_estimators=200, random_state=0).fit(X, y)
+
+    for compress in (3, 0):
+        config = SimpleNamespace(model_store_path=str(tmp_path), model_store_compress=compress)
+        model = save_model(session, config, 1, "rf", estimator, 0.5, ["a", "b", "c"], 1.2)
+    assert (model.version, model.features, model.path.endswith("v2.joblib")) == (2, "a,b,c", True)
+    assert session.query(Model).count() == 2
+
+    # Loaded from the memory-mapped artifact once, then from the cache
+    models_cache.clear()
+    cold = load_model(session, 1, "rf")
+    warm = load_model(session, 1, "rf")
+    assert warm is cold
+    assert cold.predict(X[:1]) == estimator.predict(X[:1])
+
+    # A version stored by another process replaces the cached estimator
+    stale_entry = models_cache[(1, "rf")]
+    retrained = RandomForestRegressor(n_estimators=10, random_state=1).fit(X, y)
+    save_model(session, config, 1, "rf", retrained, 0.4, ["a", "b", "c"], 0.3)
+    models_cache[(1, "rf")] = stale_entry
+    reloaded = load_model(session, 1, "rf")
+    assert reloaded is not cold
+    assert reloaded.predict(X[:1]) == retrained.predict(X[:1])
+
+    # Models trained before the artifact files are unpickled from the database
+    session.add(Model(project_id=1, name="legacy", version=1, data=pickle.dumps(estimator)))
+    session.commit()
+    assert load_model(session, 1, "legacy").predict(X[:1]) == estimator.predict(X[:1])
+    assert get_current_model(session, 1, "missing") is None
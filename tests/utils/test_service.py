@@ -0,0 +1,51 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+
+from tests.__fixtures__ import *
+from utils.service import create_server
+
+class StubService:
+
+    def __init__(self):
+        self.requests = 0
+
+    def predict(self, model_name: str) -> dict:
+        return {"model": model_name, "predicted_bugs": 12}
+
+    def risk(self) -> dict:
+        raise ValueError("No next version")
+
+    def report(self, report_name: str) -> str:
+        return f"<html>{report_name}</html>"
+
+    def end_request(self) -> None:
+        self.requests += 1
+
+def get(port: int, path: str):
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}{path}") as response:
+            return response.status, response.read().decode("utf-8")
+    except urllib.error.HTTPError as error:
+        return error.code, error.read().decode("utf-8")
+
+def test_serve():
+    service = StubService()
+    server = create_server(service, port=0)
+    port = server.server_address[1]
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        assert get(port, "/predict?model=codemetrics") == (200, json.dumps({"model": "codemetrics", "predicted_bugs": 12}))
+        assert get(port, "/report?name=churn") == (200, "<html>churn</html>")
+        status, body = get(port, "/predict?model=unknown")
+        assert (status, json.loads(body)) == (404, {"error": "Unknown model: unknown"})
+        status, body = get(port, "/risk")
+        assert (status, json.loads(body)) == (500, {"error": "No next version"})
+        assert get(port, "/missing")[0] == 404
+    finally:
+        server.shutdown()
+        server.server_close()
+    # Each request ends its transaction, errors included
+    assert service.requests == 5
@@ -0,0 +1,77 @@
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+import pytest
+import requests
+
+from tests.__fixtures__ import *
+import utils.transport
+from utils.transport import TransportAdapter, get_host_semaphore, get_source_statistics
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Answer 503 then 429 with a Retry-After hint before serving /flaky, always 503 on /down"""
+    attempts = 0
+
+    def do_GET(self):
+        StubHandler.attempts += 1
+        if self.path == "/down" or StubHandler.attempts == 1:
+            self.send_response(503)
+        elif StubHandler.attempts == 2:
+            self.send_response(429)
+            self.send_header("Retry-After", "0")
+        else:
+            body = b"ok"
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+def test_transport_retries():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}"
+    config = SimpleNamespace(api_workers=1, api_host_concurrency=2, api_max_retries=2, retry_delay=0)
+    http = requests.Session()
+    http.mount("http://", TransportAdapter("stub", config))
+
+    try:
+        flaky = http.get(url + "/flaky")
+        down = http.get(url + "/down")
+    finally:
+        server.shutdown()
+
+    assert flaky.status_code == 200 and flaky.text == "ok"
+    assert down.status_code == 503
+    statistics = get_source_statistics("stub")
+    assert (statistics.requests, statistics.retries, statistics.errors) == (6, 4, 1)
+
+def test_transport_backoff_releases_host(monkeypatch):
+    # Nothing listens on the port anymore: the connections are refused
+    with socket.socket() as listener:
+        listener.bind(("127.0.0.1", 0))
+        port = listener.getsockname()[1]
+    config = SimpleNamespace(api_workers=1, api_host_concurrency=1, api_max_retries=2, retry_delay=0)
+    semaphore = get_host_semaphore(f"127.0.0.1:{port}", 1)
+    slot_free_while_sleeping = []
+
+    def sleep(delay):
+        # The other workers of the host get through during the backoff
+        acquired = semaphore.acquire(blocking=False)
+        if acquired:
+            semaphore.release()
+        slot_free_while_sleeping.append(acquired)
+    monkeypatch.setattr(utils.transport.time, "sleep", sleep)
+    http = requests.Session()
+    http.mount("http://", TransportAdapter("refused", config))
+
+    with pytest.raises(requests.ConnectionError):
+        http.get(f"http://127.0.0.1:{port}/")
+    assert slot_free_while_sleeping == [True, True]
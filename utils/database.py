@@ -1,11 +1,60 @@
 import os
-from typing import List
+from typing import Dict, List
+
+import sqlalchemy as db
+from sqlalchemy import event, func
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
 from configuration import Configuration
 
 from models.file import File
 from models.version import Version
 from utils.proglang import guess_programing_language
 
+# Applied to each SQLite connection by the "performance" profile
+SQLITE_PERFORMANCE_PRAGMAS = [
+    # Readers don't block the writer, and a commit only appends to the log
+    "PRAGMA journal_mode=WAL",
+    # Safe with WAL: only the last transactions can be lost on a power failure, never corrupted
+    "PRAGMA synchronous=NORMAL",
+    # 64 MB of page cache (negative values are in KB)
+    "PRAGMA cache_size=-65536",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA temp_store=MEMORY",
+]
+
+def create_database_engine(configuration: Configuration) -> Engine:
+    """
+    Create the engine of the target database, tuned by the configured profile
+    """
+    url = db.engine.make_url(configuration.target_database)
+    if configuration.database_profile == "none":
+        return db.create_engine(url)
+
+    if url.get_backend_name() == "sqlite":
+        if url.database and url.database != ":memory:":
+            # Keep the connections open (as SQLAlchemy 2.0 does) instead of reconnecting
+            # on each transaction, so that the pragmas and the page cache are preserved
+            engine = db.create_engine(url, poolclass=QueuePool,
+                                      connect_args={"check_same_thread": False})
+        else:
+            engine = db.create_engine(url)
+
+        @event.listens_for(engine, "connect")
+        def set_sqlite_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            for pragma in SQLITE_PERFORMANCE_PRAGMAS:
+                cursor.execute(pragma)
+            cursor.close()
+
+        return engine
+
+    # Server databases: keep a pool of connections and check them before use
+    return db.create_engine(url,
+                            pool_size=configuration.database_pool_size,
+                            pool_pre_ping=True)
+
 def save_file_if_not_found(session, file_path):
     file = session.query(File).filter(File.path == file_path).first()
     if not file:
@@ -17,6 +66,25 @@ def save_file_if_not_found(session, file_path):
         session.commit()
     return file
 
+def save_files_if_not_found(session, file_paths: List[str], chunk_size: int = 500) -> Dict[str, int]:
+    """
+    Get the identifiers of many files at once, the missing files being inserted in a single batch
+
+    Return the file_id per path
+    """
+    file_ids = {}
+    for i in range(0, len(file_paths), chunk_size):
+        file_ids.update(session.query(File.path, func.min(File.file_id)) \
+                            .filter(File.path.in_(file_paths[i:i + chunk_size])) \
+                            .group_by(File.path).all())
+    new_files = [File(path=file_path, language=guess_programing_language(os.path.splitext(file_path)[-1]))
+                 for file_path in dict.fromkeys(file_paths) if file_path not in file_ids]
+    if new_files:
+        session.add_all(new_files)
+        session.flush()
+        file_ids.update((file.path, file.file_id) for file in new_files)
+    return file_ids
+
 def get_included_and_current_versions_filter(session, configuration: Configuration) -> List[str]:
     
     if not configuration.include_versions:
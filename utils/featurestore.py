@@ -0,0 +1,102 @@
+"""
+Feature store: the filtered Version ⨝ Metric frame shared by the models, the reports and the exporters
+
+The frame is loaded once per process and per set of filters, with only the columns requested
+so far: missing columns are loaded on demand and added to the cached frame. The cache is
+dropped as soon as the versions or metrics of the project change, in this process or in
+another one: rows added or deleted, or updated in place (their revision is incremented).
+"""
+import logging
+from typing import Dict, List, Tuple
+
+import pandas as pd
+from sqlalchemy import func
+
+from configuration import Configuration
+from models.metric import Metric
+from models.version import Version
+from utils.database import get_included_and_current_versions_filter
+
+# Columns of each row, whatever the requested columns
+KEY_COLUMNS = ["version_id", "name", "tag", "start_date", "end_date", "has_metric"]
+
+VERSION_COLUMNS = [column.name for column in Version.__table__.columns if column.name != "revision"]
+METRIC_COLUMNS = [column.name for column in Metric.__table__.columns if column.name not in ("version_id", "revision")]
+
+# (project_id, included versions, excluded versions) -> (database state, frame)
+cache: Dict[Tuple, Tuple[Tuple, pd.DataFrame]] = {}
+
+def get_database_state(session, project_id: int) -> Tuple:
+    """
+    Cheap fingerprint of the versions and metrics of the project: the counts and the max ids
+    change with the inserts and deletes, the sums of the revisions with the updates
+    """
+    return tuple(session.query(
+        func.count(Version.version_id), func.max(Version.version_id), func.sum(Version.revision),
+        func.count(Metric.metrics_id), func.max(Metric.metrics_id), func.sum(Metric.revision)) \
+        .outerjoin(Metric, Metric.version_id == Version.version_id) \
+        .filter(Version.project_id == project_id).one())
+
+def get_column(name: str):
+    if name in VERSION_COLUMNS:
+        return getattr(Version, name)
+    if name in METRIC_COLUMNS:
+        return getattr(Metric, name)
+    raise ValueError(f"Unknown version or metric column: {name}")
+
+def query_columns(session, project_id: int, columns: List[str],
+                  included_versions: List[str], excluded_versions: List[str]) -> pd.DataFrame:
+    statement = session.query(*[get_column(name) for name in columns]) \
+        .outerjoin(Metric, Metric.version_id == Version.version_id) \
+        .filter(Version.project_id == project_id) \
+        .filter(Version.include_filter(included_versions)) \
+        .filter(Version.exclude_filter(excluded_versions)) \
+        .statement
+    return pd.read_sql(statement, session.get_bind())
+
+def load_version_metrics(session, configuration: Configuration, project_id: int,
+                         columns: List[str]) -> pd.DataFrame:
+    """
+    Load the versions of the project (included, current and not excluded) with their metrics
+
+    Parameters:
+    -----------
+    - session : Session
+        SQLAlchemy session
+    - configuration : Configuration
+        Included and excluded versions
+    - project_id : int
+        Project Identifier
+    - columns : List[str]
+        Columns of Version or Metric to be loaded
+
+    Return a frame with KEY_COLUMNS followed by the requested columns, one row per version.
+    has_metric is False for the versions without metrics (e.g. no code analysis yet).
+    The frame is a copy of the cached one, consumers are free to modify it.
+    """
+    included_versions = get_included_and_current_versions_filter(session, configuration)
+    excluded_versions = configuration.exclude_versions
+    key = (project_id, tuple(sorted(included_versions)), tuple(sorted(excluded_versions)))
+    state = get_database_state(session, project_id)
+
+    cached_state, frame = cache.get(key, (None, None))
+    if cached_state != state:
+        logging.info("Loading the versions and metrics frame")
+        frame = query_columns(session, project_id,
+                              ["version_id", "name", "tag", "start_date", "end_date", "metrics_id"],
+                              included_versions, excluded_versions)
+        frame["has_metric"] = frame.pop("metrics_id").notna()
+
+    missing_columns = [name for name in dict.fromkeys(columns) if name not in frame.columns]
+    if missing_columns:
+        logging.info("Loading the columns %s", missing_columns)
+        frame = frame.merge(query_columns(session, project_id, ["version_id"] + missing_columns,
+                                          included_versions, excluded_versions),
+                            on="version_id", how="left")
+    cache[key] = (state, frame)
+
+    return frame[KEY_COLUMNS + [name for name in dict.fromkeys(columns) if name not in KEY_COLUMNS]].copy()
+
+def clear_cache() -> None:
+    """Drop all the cached frames"""
+    cache.clear()
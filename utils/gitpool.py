@@ -0,0 +1,25 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from pydriller import Git
+
+# Repository handle of the current worker process
+worker_git: Git = None
+
+def open_worker_repository(repo_dir: str, lock) -> None:
+    """
+    Open the repository handle of a worker process
+    pydriller writes into the git config when opening a repository, hence the lock
+    """
+    global worker_git
+    with lock:
+        worker_git = Git(repo_dir)
+
+def git_process_pool(repo_dir: str, workers: int = None) -> ProcessPoolExecutor:
+    """
+    Create a pool of processes, each one with its own pydriller handle on the repository
+    The handle is available as utils.gitpool.worker_git in the tasks of the pool
+    """
+    return ProcessPoolExecutor(max_workers=workers,
+                               initializer=open_worker_repository,
+                               initargs=(repo_dir, multiprocessing.Lock()))
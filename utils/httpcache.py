@@ -0,0 +1,149 @@
+"""
+On-disk cache of HTTP responses for the GitHub, GitLab and Jira clients
+
+Responses carrying an ETag or a Last-Modified header are stored in a SQLite file.
+The next GET of the same URL is sent as a conditional request (If-None-Match,
+If-Modified-Since) and a 304 Not Modified answer is served from the cache: the
+body is not downloaded again and, on GitHub, the request doesn't count against
+the rate limit. The least recently used responses are evicted beyond the size cap.
+Requests are revalidated by the TransportAdapter of utils.transport.
+"""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+# Headers describing the encoding of the body on the wire, not the decoded body that is stored
+WIRE_HEADERS = ("content-encoding", "content-length", "transfer-encoding")
+
+class HttpCache:
+    """
+    Store of HTTP responses, shared by the threads of the process
+
+    Attributes:
+    -----------
+        - path       SQLite file of the cache
+        - max_size   Maximum size of the stored bodies, in bytes
+    """
+
+    def __init__(self, path: str, max_size: int):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.max_size = max_size
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("""CREATE TABLE IF NOT EXISTS http_response (
+                                       key TEXT PRIMARY KEY, url TEXT, status INTEGER, headers TEXT,
+                                       body BLOB, size INTEGER, accessed_at REAL)""")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS ix_http_response_accessed_at ON http_response (accessed_at)")
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[dict]:
+        """Get a stored response and mark it as recently used"""
+        with self.lock:
+            row = self.connection.execute("SELECT status, headers, body FROM http_response WHERE key = ?",
+                                          (key,)).fetchone()
+            if row is None:
+                return None
+            self.connection.execute("UPDATE http_response SET accessed_at = ? WHERE key = ?", (time.time(), key))
+        status, headers, body = row
+        return {"status": status, "headers": CaseInsensitiveDict(json.loads(headers)), "body": body}
+
+    def put(self, key: str, url: str, status: int, headers: Dict[str, str], body: bytes) -> None:
+        """Store a response, then evict the least recently used ones beyond the size cap"""
+        if len(body) > self.max_size:
+            return
+        with self.lock:
+            self.connection.execute("INSERT OR REPLACE INTO http_response VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                    (key, url, status, json.dumps(headers), body, len(body), time.time()))
+            self.__evict()
+
+    def __evict(self) -> None:
+        size, = self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM http_response").fetchone()
+        while size > self.max_size:
+            key, entry_size = self.connection.execute(
+                "SELECT key, size FROM http_response ORDER BY accessed_at LIMIT 1").fetchone()
+            self.connection.execute("DELETE FROM http_response WHERE key = ?", (key,))
+            self.evictions += 1
+            size -= entry_size
+
+    def count(self, hit: bool) -> None:
+        with self.lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get_statistics(self) -> dict:
+        with self.lock:
+            entries, size = self.connection.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM http_response").fetchone()
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "entries": entries, "size": size}
+
+    def get_summary(self) -> str:
+        statistics = self.get_statistics()
+        return (f"HTTP cache: {statistics['hits']} hit(s), {statistics['misses']} miss(es), "
+                f"{statistics['evictions']} eviction(s), {statistics['entries']} response(s) "
+                f"stored ({statistics['size'] / 1024 / 1024:.1f} MB)")
+
+def get_cache_key(request: requests.PreparedRequest) -> str:
+    # Responses depend on the credentials and on the requested media type
+    vary = "\n".join([request.url, request.headers.get("Authorization", ""), request.headers.get("Accept", "")])
+    return hashlib.sha256(vary.encode("utf-8")).hexdigest()
+
+def add_conditional_headers(request: requests.PreparedRequest, entry: Optional[dict]) -> None:
+    """Turn a request into a conditional one, validated by the stored response"""
+    if entry:
+        if "ETag" in entry["headers"]:
+            request.headers["If-None-Match"] = entry["headers"]["ETag"]
+        if "Last-Modified" in entry["headers"]:
+            request.headers["If-Modified-Since"] = entry["headers"]["Last-Modified"]
+
+def store_response(cache: HttpCache, key: str, response: requests.Response) -> None:
+    """Store a response that can be revalidated later"""
+    if response.status_code == 200 and ("ETag" in response.headers or "Last-Modified" in response.headers):
+        headers = {name: value for name, value in response.headers.items() if name.lower() not in WIRE_HEADERS}
+        cache.put(key, response.request.url, response.status_code, headers, response.content)
+
+def build_cached_response(not_modified: requests.Response, entry: dict) -> requests.Response:
+    """Build the response of a 304 answer from the stored one, with the fresh headers of the 304"""
+    response = requests.Response()
+    response.status_code = entry["status"]
+    response.reason = "OK"
+    response.headers = CaseInsensitiveDict(entry["headers"])
+    response.headers.update({name: value for name, value in not_modified.headers.items()
+                             if name.lower() not in WIRE_HEADERS})
+    response._content = entry["body"]
+    response.encoding = get_encoding_from_headers(response.headers)
+    response.url = not_modified.url
+    response.request = not_modified.request
+    response.connection = not_modified.connection
+    response.elapsed = not_modified.elapsed
+    response.from_cache = True
+    return response
+
+caches: Dict[str, HttpCache] = {}
+
+def get_http_cache(configuration) -> Optional[HttpCache]:
+    """Get the HTTP cache of the process, None if disabled"""
+    if not configuration.http_cache_path:
+        return None
+    if configuration.http_cache_path not in caches:
+        logging.info(f"Using the HTTP cache {configuration.http_cache_path}")
+        caches[configuration.http_cache_path] = HttpCache(configuration.http_cache_path,
+                                                          configuration.http_cache_size * 1024 * 1024)
+    return caches[configuration.http_cache_path]
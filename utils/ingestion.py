@@ -0,0 +1,101 @@
+"""
+Concurrent ingestion of the issues and releases of a project
+
+The issues of each bug source (GitHub/GitLab, Jira) and the releases of the SCM are
+fetched at the same time, each source in its own thread, while a single writer task
+of the asyncio event loop writes what they fetch into the database: the network calls
+overlap, so the ingestion takes as long as the slowest source, but the database
+session is only used by the writer, from the thread of the event loop.
+"""
+import asyncio
+import logging
+import threading
+from typing import Dict
+
+from utils.issuewriter import IssueWriter
+from utils.timeit import timeit
+
+# Items buffered between the fetchers and the writer, the fetchers wait beyond
+QUEUE_SIZE = 2000
+
+# Kinds of the items sent to the writer
+ISSUE, ISSUES_END, RELEASES = range(3)
+
+@timeit
+def ingest(session, project_id: int, issue_connectors: Dict[str, object], versions_connector=None) -> None:
+    """
+    Sync the issues of several sources and the versions of a project concurrently
+
+    Parameters:
+    -----------
+    - session : Session
+        SQLAlchemy session, only used by the writer
+    - project_id : int
+        Project Identifier
+    - issue_connectors : Dict[str, connector]
+        Connector (GitConnector or JiraConnector) per source of issues ("git", "jira")
+    - versions_connector : GitConnector
+        Connector of the SCM releases, None to keep the existing versions
+    """
+    asyncio.run(ingest_async(session, project_id, issue_connectors, versions_connector))
+
+async def ingest_async(session, project_id: int, issue_connectors: Dict[str, object],
+                       versions_connector=None) -> None:
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+    # Set when the writer failed, the fetchers then stop early
+    stopped = threading.Event()
+
+    def put(item) -> None:
+        asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
+
+    def fetch_issues(source: str, connector, since) -> None:
+        logging.info(f"Fetching the issues of {source} updated since {since}")
+        for issue in connector.fetch_issues(since):
+            if stopped.is_set():
+                return
+            put((ISSUE, source, issue))
+        put((ISSUES_END, source, None))
+
+    def fetch_releases() -> None:
+        logging.info("Fetching the releases")
+        put((RELEASES, None, versions_connector.fetch_releases()))
+
+    issue_writers = {source: IssueWriter(session, project_id, source) for source in issue_connectors}
+
+    def write(kind: int, source: str, payload) -> None:
+        if kind == ISSUE:
+            issue_writers[source].write(*payload)
+        elif kind == ISSUES_END:
+            issue_writers[source].close()
+        else:
+            versions_connector.save_versions(payload)
+
+    async def write_items() -> None:
+        error = None
+        while (item := await queue.get()) is not None:
+            if error is not None:
+                # Keep draining the queue so that no fetcher stays blocked
+                continue
+            try:
+                write(*item)
+            except Exception as exception:
+                error = exception
+                stopped.set()
+        if error is not None:
+            raise error
+
+    writer = asyncio.create_task(write_items())
+    # The last sync dates are read before the fetchers start, the session isn't shared with them
+    fetchers = [asyncio.to_thread(fetch_issues, source, connector, connector.get_last_issue_date())
+                for source, connector in issue_connectors.items()]
+    if versions_connector is not None:
+        fetchers.append(asyncio.to_thread(fetch_releases))
+
+    # A failing source doesn't prevent the others from being written
+    results = await asyncio.gather(*fetchers, return_exceptions=True)
+    await queue.put(None)
+    await writer
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
@@ -0,0 +1,76 @@
+import logging
+from datetime import datetime
+
+from sqlalchemy import bindparam, update
+
+from models.issue import Issue
+from metrics.rollups import update_daily_issue_counts
+
+ISSUES_BATCH_SIZE = 500
+
+class IssueWriter:
+    """
+    Write the issues of a source into the database by batches, as they are fetched:
+    new issues are inserted and existing ones (same number) updated
+
+    Attributes:
+    -----------
+     - session      Database connection managed by sqlachemy
+     - project_id   Identifier of the project
+     - source       Source of the issues ("git" or "jira")
+    """
+
+    def __init__(self, session, project_id: int, source: str):
+        self.session = session
+        self.project_id = project_id
+        self.source = source
+        self.batch = {}
+        self.inserted = 0
+        self.updated = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+
+    def close(self) -> None:
+        """Write the pending batch once all the issues are written"""
+        self.flush()
+        logging.info(f"Synced {self.inserted} new and {self.updated} updated issue(s) from {self.source}")
+
+    def write(self, number, title: str, created_at: datetime, updated_at: datetime) -> None:
+        # An issue updated while being synced may be listed twice, the last one wins
+        self.batch[str(number)] = {"title": title, "created_at": created_at, "updated_at": updated_at}
+        if len(self.batch) >= ISSUES_BATCH_SIZE:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write the pending batch in a single transaction"""
+        if not self.batch:
+            return
+
+        existing_issue_ids = dict(self.session.query(Issue.number, Issue.issue_id) \
+                                      .filter(Issue.project_id == self.project_id) \
+                                      .filter(Issue.source == self.source) \
+                                      .filter(Issue.number.in_(list(self.batch))).all())
+
+        updated_issues = [{"b_issue_id": existing_issue_ids[number], "b_title": values["title"],
+                           "b_updated_at": values["updated_at"]}
+                          for number, values in self.batch.items() if number in existing_issue_ids]
+        if updated_issues:
+            self.session.execute(update(Issue.__table__) \
+                                     .where(Issue.issue_id == bindparam("b_issue_id")) \
+                                     .values(title=bindparam("b_title"), updated_at=bindparam("b_updated_at")),
+                                 updated_issues)
+
+        new_issues = [Issue(project_id=self.project_id, number=number, source=self.source, **values)
+                      for number, values in self.batch.items() if number not in existing_issue_ids]
+        self.session.add_all(new_issues)
+        update_daily_issue_counts(self.session, self.project_id, [issue.created_at for issue in new_issues])
+        self.session.commit()
+
+        self.inserted += len(new_issues)
+        self.updated += len(updated_issues)
+        self.batch = {}
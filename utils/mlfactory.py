@@ -6,6 +6,8 @@ from dependency_injector.wiring import Provide, inject
 
 from ml.bugvelocity import BugVelocity
 from ml.codemetrics import CodeMetrics
+from ml.commitrisk import CommitRisk
+from ml.filerisk import FileRisk
 from models.model import Model
 from utils.container import Container
 
@@ -36,6 +38,24 @@ class MlFactory:
                     config = config
                 )
             )
+        elif model_name == "commitrisk":
+            logging.info("Using CommitRisk Model")
+            ml_factory_provider.override(
+                providers.Factory(
+                    CommitRisk,
+                    session = session,
+                    config = config
+                )
+            )
+        elif model_name == "filerisk":
+            logging.info("Using FileRisk Model")
+            ml_factory_provider.override(
+                providers.Factory(
+                    FileRisk,
+                    session = session,
+                    config = config
+                )
+            )
         else:
             logging.error(f"Unknown ml model: {model_name}")
             sys.exit('Unknown ml model')
@@ -47,7 +67,7 @@ class MlFactory:
                                    config = Provide[Container.configuration],
                                    ml_factory_provider = Provide[Container.ml_factory_provider.provider]) -> None:
         
-        trained_models = session.query(Model.name).filter(Model.project_id == project_id).all()
+        trained_models = session.query(Model.name).filter(Model.project_id == project_id).distinct().all()
         trained_models = [r for r, in trained_models]
 
         if 'bugvelocity' in trained_models:
@@ -0,0 +1,116 @@
+"""
+Versioned store of the trained models
+
+Each training adds a version of the model: the estimator is written with joblib into an
+artifact file under OTTM_MODEL_STORE_PATH, and a Model row records its path with the mean
+squared error, the features and the training time. Loading only reads the Model row of the
+current version as long as the estimator is cached in memory for the same version.
+"""
+import logging
+import os
+import pickle
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import joblib
+from sqlalchemy import desc, func
+
+from models.model import Model
+from utils.timeit import timeit
+
+# Estimator and version (model_id, updated_at) per (project_id, name) of the process
+models_cache: Dict[Tuple[int, str], Tuple[Tuple[int, datetime], object]] = {}
+
+def get_artifact_path(configuration, project_id: int, name: str, version: int) -> str:
+    # Compressed artifacts can't be memory-mapped, see load_artifact
+    extension = ".joblib.z" if configuration.model_store_compress else ".joblib"
+    return os.path.join(configuration.model_store_path, str(project_id), name, f"v{version}{extension}")
+
+def load_artifact(path: str):
+    """Load an artifact file, with the NumPy arrays of uncompressed ones memory-mapped"""
+    return joblib.load(path, mmap_mode="r" if path.endswith(".joblib") else None)
+
+def get_current_model(session, project_id: int, name: str) -> Optional[Model]:
+    """Get the Model row of the last version of a model, None if it was never trained"""
+    return session.query(Model) \
+        .filter(Model.project_id == project_id) \
+        .filter(Model.name == name) \
+        .order_by(desc(Model.version), desc(Model.model_id)) \
+        .first()
+
+@timeit
+def save_model(session, configuration, project_id: int, name: str, estimator, mse: float,
+               features: List[str] = None, training_time: float = None, trained_until: datetime = None) -> Model:
+    """
+    Store a trained estimator as the new version of a model
+
+    Parameters:
+    -----------
+    - session : Session
+        SQLAlchemy session
+    - configuration : Configuration
+        Directory (OTTM_MODEL_STORE_PATH) and compression (OTTM_MODEL_STORE_COMPRESS) of the artifacts
+    - project_id : int
+        Project Identifier
+    - name : str
+        Name of the model (e.g. "bugvelocity")
+    - estimator : object
+        Trained estimator
+    - mse : float
+        Mean squared error of the estimator
+    - features : List[str]
+        Features the estimator was trained on
+    - training_time : float
+        Duration of the training, in seconds
+    - trained_until : datetime
+        End date of the last version the estimator learnt from
+
+    Return the Model row of the new version
+    """
+    last_version = session.query(func.max(Model.version)) \
+        .filter(Model.project_id == project_id) \
+        .filter(Model.name == name) \
+        .scalar()
+    version = (last_version or 0) + 1
+
+    path = get_artifact_path(configuration, project_id, name, version)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Written aside then renamed, so that a crash never leaves a truncated artifact
+    joblib.dump(estimator, path + ".tmp", compress=configuration.model_store_compress)
+    os.replace(path + ".tmp", path)
+
+    model = Model(project_id=project_id,
+                  name=name,
+                  version=version,
+                  updated_at=datetime.now(),
+                  mean_squared_error=mse,
+                  features=",".join(features) if features is not None else None,
+                  training_time=training_time,
+                  trained_until=trained_until,
+                  path=path)
+    session.add(model)
+    session.commit()
+    logging.info(f"Stored version {version} of model {name} into {path}")
+
+    models_cache[(project_id, name)] = ((model.model_id, model.updated_at), estimator)
+    return model
+
+@timeit
+def load_model(session, project_id: int, name: str):
+    """Load the estimator of the current version of a model, None if it was never trained"""
+    model = get_current_model(session, project_id, name)
+    if model is None:
+        return None
+
+    key = (project_id, name)
+    model_version = (model.model_id, model.updated_at)
+    if key in models_cache and models_cache[key][0] == model_version:
+        return models_cache[key][1]
+
+    if model.path:
+        estimator = load_artifact(model.path)
+    else:
+        # Trained before the artifact files
+        estimator = pickle.loads(model.data)
+    models_cache[key] = (model_version, estimator)
+    return estimator
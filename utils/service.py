@@ -0,0 +1,159 @@
+"""
+Local prediction and report service (serve command)
+
+The process keeps the container, the database session, the restored models and the
+frame of the feature store warm between requests. Requests are served one at a time,
+as they share the session, and each one ends its database transaction so that the
+next one sees what populate or train committed in the meantime: the feature store
+and the model store drop their cached frame and models as soon as the data changed.
+"""
+import json
+import logging
+import os
+import socketserver
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from metrics.versions import assess_next_release_risk
+from models.project import Project
+from utils.mlfactory import MlFactory
+
+AVAILABLE_MODELS = ["bugvelocity", "codemetrics", "commitrisk", "filerisk"]
+AVAILABLE_REPORTS = ["release", "churn", "bugvelocity", "kmeans"]
+
+class PredictionService:
+    """
+    Predictions, risk score and reports of a project, computed from warm state
+
+    Attributes:
+    -----------
+     - session                      Database connection managed by sqlachemy
+     - configuration                Configuration
+     - project                      Project
+     - ml_factory_provider          Provider of the models
+     - html_exporter_provider       Provider of the HtmlExporter
+     - ml_html_exporter_provider    Provider of the MlHtmlExporter
+     - directory                    Folder where the reports are rendered
+    """
+
+    def __init__(self, session, configuration, project: Project, ml_factory_provider,
+                 html_exporter_provider, ml_html_exporter_provider, directory: str):
+        self.session = session
+        self.configuration = configuration
+        self.project_id = project.project_id
+        self.ml_factory_provider = ml_factory_provider
+        self.html_exporter_provider = html_exporter_provider
+        self.ml_html_exporter_provider = ml_html_exporter_provider
+        self.directory = directory
+        self.models = {}
+
+    def get_model(self, model_name: str):
+        if model_name not in self.models:
+            MlFactory.create_training_ml_model(model_name)
+            self.models[model_name] = self.ml_factory_provider(self.project_id)
+        return self.models[model_name]
+
+    def predict(self, model_name: str) -> dict:
+        return {"model": model_name, "predicted_bugs": int(self.get_model(model_name).predict())}
+
+    def risk(self) -> dict:
+        return assess_next_release_risk(self.session, self.configuration, self.project_id)
+
+    def report(self, report_name: str) -> str:
+        """Render a report and get its HTML"""
+        project = self.session.get(Project, self.project_id)
+        filename = f"{report_name}.html"
+        if report_name == "kmeans":
+            self.ml_html_exporter_provider(self.directory).generate_kmeans_release_report(project, filename)
+        else:
+            MlFactory.create_predicting_ml_model(self.project_id)
+            exporter = self.html_exporter_provider(self.directory)
+            if report_name == "churn":
+                exporter.generate_churn_report(project, filename)
+            elif report_name == "bugvelocity":
+                exporter.generate_bugvelocity_report(project, filename)
+            else:
+                exporter.generate_release_report(project, filename)
+        with open(os.path.join(self.directory, filename)) as file:
+            return file.read()
+
+    def end_request(self) -> None:
+        # Ends the read transaction, without counting as a write for the feature store
+        self.session.rollback()
+
+class ServiceRequestHandler(BaseHTTPRequestHandler):
+    """
+    HTTP handler of the service:
+     - GET /predict?model=<name>   predicted number of bugs of the next release
+     - GET /risk                   risk score of the next release
+     - GET /report?name=<name>     HTML report (release, churn, bugvelocity, kmeans)
+     - GET /health                 liveness
+    """
+    service: PredictionService = None
+
+    def do_GET(self):
+        started_at = time.perf_counter()
+        url = urlparse(self.path)
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        try:
+            if url.path == "/predict":
+                model_name = query.get("model", "bugvelocity")
+                if model_name not in AVAILABLE_MODELS:
+                    self.send_json(404, {"error": f"Unknown model: {model_name}"})
+                else:
+                    self.send_json(200, self.service.predict(model_name))
+            elif url.path == "/risk":
+                self.send_json(200, self.service.risk())
+            elif url.path == "/report":
+                report_name = query.get("name", "release")
+                if report_name not in AVAILABLE_REPORTS:
+                    self.send_json(404, {"error": f"Unknown report: {report_name}"})
+                else:
+                    self.send_body(200, "text/html; charset=utf-8", self.service.report(report_name).encode("utf-8"))
+            elif url.path == "/health":
+                self.send_json(200, {"status": "ok"})
+            else:
+                self.send_json(404, {"error": f"Unknown path: {url.path}"})
+        except Exception as e:
+            logging.exception(f"Failed to serve {self.path}")
+            self.send_json(500, {"error": str(e)})
+        finally:
+            self.service.end_request()
+        logging.info(f"Served {self.path} in {(time.perf_counter() - started_at) * 1000:.1f} ms")
+
+    def send_json(self, status: int, value: dict) -> None:
+        self.send_body(status, "application/json", json.dumps(value).encode("utf-8"))
+
+    def send_body(self, status: int, content_type: str, body: bytes) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def address_string(self) -> str:
+        # Clients of a Unix socket have no address
+        return self.client_address[0] if self.client_address else "local"
+
+    def log_message(self, format, *args):
+        logging.debug(format, *args)
+
+class UnixHTTPServer(socketserver.UnixStreamServer):
+
+    def get_request(self):
+        request, _ = super().get_request()
+        return request, None
+
+def create_server(service: PredictionService, host: str = "127.0.0.1", port: int = 8000,
+                  socket_path: str = None) -> socketserver.BaseServer:
+    """
+    Create the server of a service, listening on a Unix socket if socket_path is set,
+    otherwise on host:port. Requests are served one at a time.
+    """
+    handler = type("BoundServiceRequestHandler", (ServiceRequestHandler,), {"service": service})
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        return UnixHTTPServer(socket_path, handler)
+    return HTTPServer((host, port), handler)
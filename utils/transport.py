@@ -0,0 +1,196 @@
+"""
+HTTP transport shared by the GitHub, GitLab and Jira connectors
+
+Every client sends its requests through a TransportAdapter mounted on a pooled
+keep-alive requests session: gzip is negotiated, the number of concurrent requests
+per host is bounded, failed requests are retried with a jittered exponential backoff
+or after the delay hinted by the server (Retry-After, rate limit reset), responses
+are revalidated against the HTTP cache and statistics are gathered per source.
+"""
+import logging
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import DEFAULT_POOLSIZE, HTTPAdapter
+
+from utils.httpcache import HttpCache, get_http_cache, get_cache_key, add_conditional_headers, \
+    build_cached_response, store_response
+
+# Statuses worth retrying: rate limited or transient server errors
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# Methods safe to send again after a connection error or a server error
+IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS", "PUT", "DELETE")
+BACKOFF_BASE = 1
+
+class SourceStatistics:
+    """Requests, retries and errors of a source, e.g. "github" """
+
+    def __init__(self, source: str):
+        self.source = source
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.retries = 0
+        self.errors = 0
+        self.first_request_at = None
+        self.last_response_at = None
+
+    def record(self, started_at: float, failed: bool, retried: bool) -> None:
+        with self.lock:
+            self.requests += 1
+            self.retries += retried
+            self.errors += failed and not retried
+            if self.first_request_at is None or started_at < self.first_request_at:
+                self.first_request_at = started_at
+            self.last_response_at = time.monotonic()
+
+    def get_summary(self) -> str:
+        with self.lock:
+            duration = (self.last_response_at or 0) - (self.first_request_at or 0)
+            throughput = self.requests / duration if duration > 0 else 0
+            return (f"{self.source}: {self.requests} request(s) in {duration:.1f}s ({throughput:.1f}/s), "
+                    f"{self.retries} retried, {self.errors} failed")
+
+statistics: Dict[str, SourceStatistics] = {}
+host_semaphores: Dict[str, threading.BoundedSemaphore] = {}
+registry_lock = threading.Lock()
+
+def get_source_statistics(source: str) -> SourceStatistics:
+    with registry_lock:
+        if source not in statistics:
+            statistics[source] = SourceStatistics(source)
+        return statistics[source]
+
+def get_host_semaphore(host: str, concurrency: int) -> threading.BoundedSemaphore:
+    """Semaphore bounding the concurrent requests to a host, shared by all the sources"""
+    with registry_lock:
+        if host not in host_semaphores:
+            host_semaphores[host] = threading.BoundedSemaphore(concurrency)
+        return host_semaphores[host]
+
+def get_transport_summary() -> List[str]:
+    """Get a summary line per source"""
+    with registry_lock:
+        sources = list(statistics.values())
+    return [source.get_summary() for source in sources]
+
+def get_hinted_delay(response: requests.Response) -> Optional[float]:
+    """Get the delay hinted by the server before the next request, None if there is no hint"""
+    retry_after = response.headers.get("Retry-After")
+    if retry_after:
+        if retry_after.isdigit():
+            return float(retry_after)
+        try:
+            return (parsedate_to_datetime(retry_after) - datetime.now(timezone.utc)).total_seconds()
+        except (TypeError, ValueError):
+            return None
+
+    # GitHub (X-RateLimit-*) and GitLab (RateLimit-*) rate limits, reset as epoch seconds
+    for prefix in ("X-RateLimit-", "RateLimit-"):
+        if response.headers.get(prefix + "Remaining") == "0" and response.headers.get(prefix + "Reset", "").isdigit():
+            return int(response.headers[prefix + "Reset"]) - time.time() + 1
+    return None
+
+def get_retry_delay(response: requests.Response, attempt: int, max_delay: float) -> Optional[float]:
+    """
+    Get the delay before retrying a request, None if the response must not be retried:
+    the delay hinted by the server if any, otherwise an exponential backoff with full jitter
+    """
+    hinted_delay = get_hinted_delay(response)
+    # GitHub answers 403 when the rate limit is exceeded
+    if response.status_code not in RETRY_STATUSES and not (response.status_code == 403 and hinted_delay is not None):
+        return None
+    if response.status_code != 429 and response.request.method not in IDEMPOTENT_METHODS:
+        return None
+    if hinted_delay is not None:
+        return min(max(hinted_delay, 0), max_delay)
+    return get_backoff_delay(attempt, max_delay)
+
+def get_backoff_delay(attempt: int, max_delay: float) -> float:
+    return random.uniform(0, min(max_delay, BACKOFF_BASE * 2 ** attempt))
+
+class TransportAdapter(HTTPAdapter):
+    """
+    Transport adapter of requests retrying, limiting, caching and measuring the requests of a source
+
+    Attributes:
+    -----------
+        - source        Name of the source in the statistics (e.g. "github")
+        - config        Configuration (retries, concurrency per host, maximum delay)
+        - cache         HTTP cache, None if disabled
+    """
+
+    def __init__(self, source: str, config, cache: HttpCache = None, **kwargs):
+        super().__init__(pool_maxsize=max(DEFAULT_POOLSIZE, config.api_workers), **kwargs)
+        self.source = source
+        self.configuration = config
+        self.cache = cache
+        self.statistics = get_source_statistics(source)
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        if self.cache is None or request.method != "GET" or kwargs.get("stream"):
+            return self.send_with_retries(request, **kwargs)
+
+        key = get_cache_key(request)
+        entry = self.cache.get(key)
+        add_conditional_headers(request, entry)
+
+        response = self.send_with_retries(request, **kwargs)
+
+        if entry and response.status_code == 304:
+            self.cache.count(hit=True)
+            return build_cached_response(response, entry)
+        self.cache.count(hit=False)
+        store_response(self.cache, key, response)
+        return response
+
+    def send_with_retries(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        semaphore = get_host_semaphore(urlparse(request.url).netloc, self.configuration.api_host_concurrency)
+        max_retries = self.configuration.api_max_retries
+        max_delay = self.configuration.retry_delay
+
+        for attempt in range(max_retries + 1):
+            started_at = time.monotonic()
+            failure = None
+            with semaphore:
+                try:
+                    response = super().send(request, **kwargs)
+                except (requests.ConnectionError, requests.Timeout) as error:
+                    failure = error
+
+            if failure is not None:
+                retry = attempt < max_retries and request.method in IDEMPOTENT_METHODS
+                self.statistics.record(started_at, failed=True, retried=retry)
+                if not retry:
+                    raise failure
+                # Slept without holding a slot of the host, as the other workers may get through
+                delay = get_backoff_delay(attempt, max_delay)
+                logging.info(f"{self.source}: {failure}, retrying {request.method} {request.url} in {delay:.1f}s")
+                time.sleep(delay)
+                continue
+
+            delay = get_retry_delay(response, attempt, max_delay) if attempt < max_retries else None
+            self.statistics.record(started_at, failed=response.status_code >= 400, retried=delay is not None)
+            if delay is None:
+                return response
+            logging.info(f"{self.source}: HTTP {response.status_code}, "
+                         f"retrying {request.method} {request.url} in {delay:.1f}s")
+            response.close()
+            time.sleep(delay)
+
+def install_transport(http: requests.Session, source: str, config) -> requests.Session:
+    """Send the requests of a session through a TransportAdapter"""
+    adapter = TransportAdapter(source, config, get_http_cache(config))
+    http.mount("https://", adapter)
+    http.mount("http://", adapter)
+    http.headers["Accept-Encoding"] = "gzip, deflate"
+    return http
+
+def create_http_session(source: str, config) -> requests.Session:
+    """Create a pooled keep-alive session sending its requests through a TransportAdapter"""
+    return install_transport(requests.Session(), source, config)